@@ -8,22 +8,39 @@ Outputs (in this folder):
   - potter_records.json   : raw parsed records from Potter's docx (190 entries)
   - potter_mapping.csv    : Potter <-> tree mapping with gap analysis
 
+Names in MAPPING take the tree title given there; every other name is matched
+automatically (see src/scripts/name_matching.py) and kept if the match is at least
+AUTO_CONFIDENCE. Each row records how it was matched.
+
 Run from anywhere; paths are relative to this script.
 """
-import json, re, csv, os, sys, zipfile, urllib.request
-from collections import defaultdict
-from xml.etree import ElementTree as ET
+import json, re, csv, os, sys, urllib.request
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 REPO = os.path.abspath(os.path.join(HERE, '..'))
+SCRIPTS_DIR = os.path.abspath(os.path.join(HERE, '..', '..', 'src', 'scripts'))
+sys.path.insert(0, SCRIPTS_DIR)
+from dataset_ingest import DocxSource, Field, load_records  # noqa: E402
+from name_matching import NameMatcher  # noqa: E402
+from predecessor_gaps import PredecessorGaps  # noqa: E402
+from techgraph import TechGraph  # noqa: E402
 TREE_PATH = os.path.join(REPO, 'src/app/api/inventions/techtree-data.json')
 DOCX_URL = 'https://raw.githubusercontent.com/briancpotter/inventiondating/main/inventions_full_analysis.docx'
 DOCX_LOCAL = os.path.join(HERE, 'potter_full_analysis.docx')
 RECORDS_JSON = os.path.join(HERE, 'potter_records.json')
 MAPPING_CSV = os.path.join(HERE, 'potter_mapping.csv')
 
-WNS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
-NS = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+# Potter's docx: one "N. Name" Heading2 per invention, then "Label: value" paragraphs
+POTTER_SOURCE = DocxSource(
+    DOCX_LOCAL, heading_style='Heading2', heading=r'^(\d+)\.\s+(.+)$',
+    heading_fields=('num', 'name'), heading_convert=('int', 'str'),
+    fields=[
+        Field('year', 'Year actually invented', r'\s*(-?\d+)', convert='int', first=True),
+        Field('plausible', 'Earliest plausible'),
+        Field('straightforward', 'Earliest straightforward'),
+        Field('confidence', 'Confidence'),
+    ],
+)
 
 
 def fetch_docx():
@@ -33,46 +50,8 @@ def fetch_docx():
 
 
 def parse_docx():
-    with zipfile.ZipFile(DOCX_LOCAL) as z:
-        xml = z.read('word/document.xml').decode('utf-8')
-    root = ET.fromstring(xml)
-    paragraphs = []
-    for p in root.iter(f'{WNS}p'):
-        pstyle = ''
-        pPr = p.find('w:pPr', NS)
-        if pPr is not None:
-            ps = pPr.find('w:pStyle', NS)
-            if ps is not None:
-                pstyle = ps.get(f'{WNS}val', '')
-        text = ''.join(t.text or '' for t in p.iter(f'{WNS}t'))
-        paragraphs.append((pstyle, text))
-
-    records, current = [], None
-    for s, t in paragraphs:
-        if s == 'Heading2' and re.match(r'^\d+\.\s', t):
-            if current:
-                records.append(current)
-            m = re.match(r'^(\d+)\.\s+(.+)$', t)
-            current = {'num': int(m.group(1)), 'name': m.group(2).strip(), 'raw': []}
-        elif current is not None:
-            current['raw'].append((s, t))
-    if current:
-        records.append(current)
-
-    def parse(rec):
-        for s, t in rec['raw']:
-            m = re.match(r'Year actually invented:\s*(-?\d+)', t)
-            if m and 'year' not in rec:
-                rec['year'] = int(m.group(1))
-            m = re.match(r'Earliest plausible:\s*(.+)', t)
-            if m: rec['plausible'] = m.group(1).strip()
-            m = re.match(r'Earliest straightforward:\s*(.+)', t)
-            if m: rec['straightforward'] = m.group(1).strip()
-            m = re.match(r'Confidence:\s*(.+)', t)
-            if m: rec['confidence'] = m.group(1).strip()
-    for r in records:
-        parse(r)
-    clean = [{k: v for k, v in r.items() if k != 'raw'} for r in records]
+    # Parsed records are cached by docx hash, so an unchanged docx is not reparsed
+    clean = load_records(POTTER_SOURCE, cache_dir=HERE)
     with open(RECORDS_JSON, 'w') as f:
         json.dump(clean, f, indent=2)
     return clean
@@ -94,7 +73,7 @@ def parse_year_range(s):
     return int(nums[0])
 
 
-# Hand-curated Potter -> tree node title mapping.
+# Hand-curated Potter -> tree node title mapping, overriding the automatic matcher.
 # Built by searching tree titles + subtitles. None = no tree match.
 MAPPING = {
     'Voltaic Pile': 'Voltaic pile',
@@ -316,45 +295,42 @@ FLAG_PHENOMENON = {
 
 # Edges treated as predecessors for the "all types" gap metric.
 EXCLUDE_TYPES = {'Independently invented', 'Concurrent development'}
+# Automatic matches below this confidence are left unmatched (but reported)
+AUTO_CONFIDENCE = {'high', 'medium'}
 
 
 def build_mapping_csv():
     with open(RECORDS_JSON) as f:
         potter = json.load(f)
-    with open(TREE_PATH) as f:
-        tree = json.load(f)
-
-    nodes_by_title = {n['title']: n for n in tree['nodes']}
-    nodes_by_id = {n['id']: n for n in tree['nodes']}
-    incoming = defaultdict(list)
-    for link in tree['links']:
-        incoming[link['target']].append(link)
+    graph = TechGraph.load(TREE_PATH)
+    gaps = PredecessorGaps(graph, EXCLUDE_TYPES)
+    matcher = NameMatcher(graph)
+    matches = matcher.match_records(potter, overrides=MAPPING)
 
     rows = []
     matched = unmatched = 0
-    for p in potter:
-        tree_title = MAPPING.get(p['name'])
-        node = nodes_by_title.get(tree_title) if tree_title else None
+    confidences = {}
+    rejected = []
+    for p, match in zip(potter, matches):
+        confidences[match.confidence] = confidences.get(match.confidence, 0) + 1
+        accepted = match.method == 'override' or match.confidence in AUTO_CONFIDENCE
+        node = match.code if accepted else None
+        if match.matched and not accepted:
+            rejected.append(match)
         earliest = parse_year_range(p.get('plausible'))
         potter_gap = (p['year'] - earliest) if earliest is not None else ''
 
-        if node:
+        if node is not None:
             matched += 1
-            preds = [link for link in incoming[node['id']] if link['type'] not in EXCLUDE_TYPES]
-            pred_rows = []
-            for link in preds:
-                src = nodes_by_id.get(link['source'])
-                if src:
-                    pred_rows.append((src['year'], src['title'], link['type']))
-            pred_rows.sort()
-            if pred_rows:
-                latest_y, latest_t, latest_type = max(pred_rows)
-                tree_gap = node['year'] - latest_y
-                binding = f"{latest_t} ({latest_y}) [{latest_type}]"
+            latest = gaps.binding[node]
+            if latest >= 0:
+                tree_gap = gaps.gap[node]
+                latest_type = graph.type_names[graph.edge_type[gaps.binding_edge[node]]]
+                binding = f"{graph.titles[latest]} ({graph.years[latest]}) [{latest_type}]"
             else:
                 tree_gap = ''
                 binding = '(no in-edges)'
-            date_diff = node['year'] - p['year']
+            date_diff = graph.years[node] - p['year']
         else:
             unmatched += 1
             tree_gap = binding = ''
@@ -374,13 +350,16 @@ def build_mapping_csv():
             'flag_binding_year': flag_year if flag_year is not None else '',
             'flag_binding_phenomenon': flag_phenom,
             'flag_gap': flag_gap,
-            'tree_title': node['title'] if node else '',
-            'tree_subtitle': node.get('subtitle', '') if node else '',
-            'tree_year': node['year'] if node else '',
-            'tree_id': node['id'] if node else '',
+            'tree_title': graph.titles[node] if node is not None else '',
+            'tree_subtitle': graph.subtitles[node] if node is not None else '',
+            'tree_year': graph.years[node] if node is not None else '',
+            'tree_id': graph.ids[node] if node is not None else '',
             'date_diff_tree_minus_potter': date_diff,
             'tree_binding_predecessor': binding,
             'tree_gap': tree_gap,
+            'match_method': match.method,
+            'match_confidence': match.confidence,
+            'match_score': f'{match.score:.3f}',
         })
 
     fieldnames = list(rows[0].keys())
@@ -391,10 +370,31 @@ def build_mapping_csv():
             w.writerow(r)
     print(f'Wrote {MAPPING_CSV}')
     print(f'  matched: {matched}/{len(potter)}, unmatched: {unmatched}')
+    print('  confidence: ' + ', '.join(f'{k} {v}' for k, v in sorted(confidences.items())))
+    # How the matcher alone would have done on the hand-mapped names
+    agree = total = 0
+    for p, match in zip(potter, matches):
+        if match.method == 'override' and match.matched:
+            auto = matcher.match(p['name'], p['year'])
+            total += 1
+            agree += auto.confidence in AUTO_CONFIDENCE and auto.code == match.code
+    print(f'  automatic matcher agrees with MAPPING on {agree}/{total} mapped names')
+    for m in matches:
+        if m.stale_override:
+            print(f'  stale MAPPING entry, not in the tree: {m.name} -> {m.stale_override} (matched automatically)')
+    for m in rejected:
+        print(f'  not accepted ({m.confidence}, {m.score:.2f}): {m.name} -> {graph.titles[m.code]}')
+    for r in rows:
+        if not r['tree_title'] and r['match_method'] == 'auto':
+            print(f"  unmatched: {r['potter_name']}")
     return rows
 
 
-if __name__ == '__main__':
+def main():
     fetch_docx()
     parse_docx()
     build_mapping_csv()
+
+
+if __name__ == '__main__':
+    main()
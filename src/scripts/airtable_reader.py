@@ -0,0 +1,95 @@
+"""
+Streaming reads of Airtable tables, one page of records at a time.
+
+table.all() downloads every page before returning anything. iter_records instead
+yields records as their page arrives, with the same field projection, formula and
+view options, so processing starts after one round trip and only a few pages are
+held in memory at once however large the table is.
+
+Pages are fetched on a background thread, up to `prefetch` pages ahead of the
+caller, so the next request is in flight while the current page is being processed.
+Stopping early (break, or an exception in the caller) stops the thread after the
+request it is making.
+
+Airtable keeps a server-side cursor for a paginated listing and lets it expire when
+the client is idle too long between pages (LIST_RECORDS_ITERATOR_NOT_AVAILABLE),
+which a slow consumer such as the image downloader can run into. The listing is
+then restarted from the beginning and records already yielded are skipped by id.
+"""
+import queue
+import threading
+from typing import Dict, Iterator, List
+
+ITERATOR_EXPIRED = 'LIST_RECORDS_ITERATOR_NOT_AVAILABLE'
+# Airtable's largest page
+PAGE_SIZE = 100
+_END = object()
+
+
+def iter_pages(table, **options) -> Iterator[List[Dict]]:
+    """Pages of table.iterate(**options), restarting if Airtable expires the listing.
+    Each record is yielded once, even across restarts."""
+    seen = set()
+    while True:
+        try:
+            for page in table.iterate(**options):
+                fresh = [record for record in page if record['id'] not in seen]
+                seen.update(record['id'] for record in fresh)
+                if fresh:
+                    yield fresh
+            return
+        except Exception as e:
+            if ITERATOR_EXPIRED not in str(e):
+                raise
+            print(f"Airtable listing expired after {len(seen)} records, restarting it")
+
+
+def _prefetch(pages: Iterator[List[Dict]], depth: int) -> Iterator[List[Dict]]:
+    buffer = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_END)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+def iter_records(table, fields: List[str] = None, formula: str = None, view: str = None,
+                 max_records: int = None, page_size: int = PAGE_SIZE, prefetch: int = 1) -> Iterator[Dict]:
+    """Yield the records of a pyairtable Table matching formula (and view), with only
+    the given fields, reading up to prefetch pages ahead (0 for none)."""
+    options = {'page_size': page_size}
+    for key, value in (('fields', fields), ('formula', formula), ('view', view), ('max_records', max_records)):
+        if value is not None:
+            options[key] = value
+    pages = iter_pages(table, **options)
+    if prefetch:
+        pages = _prefetch(pages, prefetch)
+    for page in pages:
+        yield from page
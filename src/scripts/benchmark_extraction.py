@@ -0,0 +1,84 @@
+"""
+Compare the single-pass relationship extractor with the per-keyword regexes it replaced.
+
+Pages come from the scraper's page cache (see page_cache.py) or from plain-text files.
+For each page both extractors are timed, and the totals, the slowest pages and the
+number of relationships each found are printed.
+
+Usage:
+  python src/scripts/benchmark_extraction.py --cache .wiki_cache.sqlite
+  python src/scripts/benchmark_extraction.py page1.txt page2.txt
+"""
+import argparse
+import re
+import sqlite3
+import time
+
+from page_cache import unpack
+from relationship_extraction import RELATIONSHIP_KEYWORDS, RelationshipExtractor
+
+
+def find_relationships_per_keyword(relationship_keywords, text):
+    """The original find_relationships: one regex per keyword, each over the lowercased page."""
+    relationships = []
+    for rel_type, keywords in relationship_keywords.items():
+        for keyword in keywords:
+            pattern = rf'([\w\s]+)\s+{keyword}\s+([\w\s]+)'
+            for match in re.finditer(pattern, text.lower()):
+                relationships.append((match.group(1).strip(), match.group(2).strip(), rel_type))
+    return relationships
+
+
+def load_pages(cache_path, files, limit):
+    pages = []
+    if cache_path:
+        db = sqlite3.connect(cache_path)
+        for (blob,) in db.execute('SELECT page FROM pages LIMIT ?', (limit,)):
+            page = unpack(blob)
+            pages.append((page['title'], page['text']))
+        db.close()
+    for path in files:
+        with open(path, encoding='utf-8') as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark relationship extraction on saved pages.')
+    parser.add_argument('files', nargs='*', help='Plain-text pages to extract from')
+    parser.add_argument('--cache', metavar='PATH', help="Use pages saved in the scraper's page cache")
+    parser.add_argument('--limit', type=int, default=500, help='Most pages to read from the cache')
+    args = parser.parse_args()
+
+    pages = load_pages(args.cache, args.files, args.limit)
+    if not pages:
+        parser.error('no pages: pass --cache or some text files')
+
+    keywords = RELATIONSHIP_KEYWORDS
+    extractor = RelationshipExtractor(keywords)
+    timings = []
+    totals = {'per-keyword': [0.0, 0], 'single-pass': [0.0, 0]}
+    for title, text in pages:
+        start = time.perf_counter()
+        old = find_relationships_per_keyword(keywords, text)
+        old_time = time.perf_counter() - start
+        start = time.perf_counter()
+        new = extractor.extract(text)
+        new_time = time.perf_counter() - start
+        totals['per-keyword'][0] += old_time
+        totals['per-keyword'][1] += len(old)
+        totals['single-pass'][0] += new_time
+        totals['single-pass'][1] += len(new)
+        timings.append((old_time, new_time, len(text), title))
+
+    size = sum(len(text) for _, text in pages)
+    print(f"{len(pages)} pages, {size / 2**20:.1f} MiB of text")
+    for name, (elapsed, found) in totals.items():
+        print(f"  {name:<12} {elapsed:8.3f}s  {size / 2**20 / max(elapsed, 1e-9):8.2f} MiB/s  {found} relationships")
+    print("\nSlowest pages for the per-keyword extractor:")
+    for old_time, new_time, length, title in sorted(timings, reverse=True)[:10]:
+        print(f"  {old_time:8.3f}s vs {new_time:7.3f}s  {length:>8} chars  {title}")
+
+
+if __name__ == '__main__':
+    main()
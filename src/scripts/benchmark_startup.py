@@ -0,0 +1,72 @@
+"""
+Start-up time of the Python tools: how long importing each script, or getting the
+CLI's help, takes in a fresh interpreter, and which heavy dependencies that loads.
+
+Each case runs in its own subprocess, repeated, and the median wall time is reported
+next to that of an empty interpreter. "eager imports" times the heavy dependencies on
+their own, which is what every import of update_images.py used to cost.
+
+Usage:
+  python src/scripts/benchmark_startup.py
+  python src/scripts/benchmark_startup.py --repeat 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ['requests', 'PIL', 'pyairtable', 'dotenv', 'bs4', 'networkx']
+
+# (label, code run with -c from this directory)
+CASES = [
+    ('empty interpreter', 'pass'),
+    ('eager imports', 'import requests, PIL.Image, pyairtable, dotenv'),
+    ('import update_images', 'import update_images'),
+    ('import data_validation', 'import data_validation'),
+    ('import wiki_fetch', 'import wiki_fetch'),
+    ('import wiki_dump', 'import wiki_dump'),
+    ('import wiki_scraper', 'import wiki_scraper'),
+    ('cli --help', 'import techtree_cli, contextlib, io\n'
+                   'with contextlib.redirect_stdout(io.StringIO()): techtree_cli.main(["--help"])'),
+    ('cli images --help', 'import techtree_cli, contextlib, io\n'
+                          'with contextlib.redirect_stdout(io.StringIO()):\n'
+                          '    try: techtree_cli.main(["images", "--help"])\n'
+                          '    except SystemExit: pass'),
+]
+REPORT_MODULES = 'import sys; print(" ".join(m for m in %r if m in sys.modules))' % HEAVY
+
+
+def time_case(code: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def loaded_modules(code: str) -> str:
+    result = subprocess.run([sys.executable, '-c', f"{code}\n{REPORT_MODULES}"], cwd=HERE,
+                            check=True, capture_output=True, text=True)
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the start-up of the Python tools.')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per case; the median is reported')
+    args = parser.parse_args()
+
+    print(f"{'case':24} {'median':>8} {'over empty':>11}  heavy modules loaded")
+    baseline = None
+    for label, code in CASES:
+        seconds = time_case(code, args.repeat)
+        if baseline is None:
+            baseline = seconds
+        print(f"{label:24} {seconds * 1000:6.0f}ms {(seconds - baseline) * 1000:9.0f}ms  {loaded_modules(code) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Time and peak memory of the analysis scripts on synthetic trees of increasing size.
+
+Runs data_validation.validate_data on Airtable-shaped records and
+build_potter_mapping.build_mapping_csv on a techtree-data.json-shaped file, both
+generated by synthetic_techtree.py. No Airtable access is needed. The synthetic tree
+contains every title in the Potter MAPPING, so build_mapping_csv does its full work.
+
+Loading techtree-data.json is also measured both ways: as the dicts of full records
+the scripts used to build (nodes by id and title, incoming link lists) and as a
+TechGraph with its in-adjacency and title index built. "retained" is what the loaded
+structure still holds once loading is done.
+
+Usage:
+  python src/scripts/benchmark_validation.py
+  python src/scripts/benchmark_validation.py --sizes 2500 25000 250000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import synthetic_techtree
+from collections import defaultdict
+from data_validation import validate_data
+from techgraph import TechGraph
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'analysis', 'brian_potter'))
+import build_potter_mapping  # noqa: E402
+
+DEFAULT_SIZES = [2500, 25000, 250000]
+
+
+def measure(fn):
+    """Return (seconds, peak MiB, retained MiB) for fn(). Timed and traced in separate
+    runs, since tracemalloc slows allocation-heavy code down considerably."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        result = fn()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+    return elapsed, peak / 2**20, retained / 2**20
+
+
+def load_dicts(path):
+    with open(path) as f:
+        tree = json.load(f)
+    nodes_by_title = {n['title']: n for n in tree['nodes']}
+    nodes_by_id = {n['id']: n for n in tree['nodes']}
+    incoming = defaultdict(list)
+    for link in tree['links']:
+        incoming[link['target']].append(link)
+    return nodes_by_title, nodes_by_id, incoming
+
+
+def load_graph(path):
+    graph = TechGraph.load(path)
+    graph.in_adjacency, graph.title_index
+    return graph
+
+
+def bench_size(n, workdir):
+    titles = [t for t in build_potter_mapping.MAPPING.values() if t]
+    tree = synthetic_techtree.generate(n, extra_titles=titles)
+
+    dated, connections, all_innovations = synthetic_techtree.to_airtable(tree)
+    results = {'validate_data': measure(lambda: validate_data(dated, connections, all_innovations))}
+
+    tree_path = os.path.join(workdir, f'techtree-{n}.json')
+    with open(tree_path, 'w') as f:
+        json.dump(synthetic_techtree.to_techtree_json(tree), f)
+    results['load (dicts)'] = measure(lambda: load_dicts(tree_path))
+    results['load (TechGraph)'] = measure(lambda: load_graph(tree_path))
+    build_potter_mapping.TREE_PATH = tree_path
+    build_potter_mapping.MAPPING_CSV = os.path.join(workdir, f'potter-mapping-{n}.csv')
+    results['build_mapping_csv'] = measure(build_potter_mapping.build_mapping_csv)
+    return len(tree['nodes']), len(tree['links']), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the analysis scripts on synthetic data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Numbers of innovations to generate (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>9} {'links':>9}  {'analysis':<20} {'time (s)':>9} {'peak (MiB)':>11} {'retained (MiB)':>15}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            nodes, links, results = bench_size(n, workdir)
+            for name, (elapsed, peak, retained) in results.items():
+                print(f"{nodes:>9} {links:>9}  {name:<20} {elapsed:>9.3f} {peak:>11.1f} {retained:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
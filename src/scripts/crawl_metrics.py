@@ -0,0 +1,182 @@
+"""
+Counters, histograms and a progress line for wiki_scraper.py crawls.
+
+Histograms keep counts in geometric buckets (each sqrt(2) wider than the last), so
+recording is O(1) and memory is fixed however long the crawl runs; percentiles are
+read back as bucket upper bounds, within about 40% of the true value. The slowest
+individual operations are kept separately, by name, to show which pages dominate
+crawl time.
+"""
+import heapq
+import json
+import math
+import threading
+import time
+from typing import Dict
+
+# Operations kept in the slowest list
+SLOWEST = 20
+
+
+class Histogram:
+    def __init__(self, smallest: float):
+        self.smallest = smallest
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        bucket = 0 if value <= self.smallest else math.ceil(2 * math.log2(value / self.smallest))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.smallest * 2 ** (bucket / 2), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class CrawlMetrics:
+    """Thread-safe crawl counters (count), timings in seconds and sizes in bytes (observe).
+
+    Timings go in histograms named after the stage ('fetch', 'parse', 'extract'), with
+    a floor of 0.1 ms; 'response_bytes' has a floor of 1 kB. Gauges such as the
+    frontier size are sampled by whoever knows them, through set_gauge.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.slowest = []
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name: str, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float, label: str = None):
+        """Record value in histogram name; with a label, also consider it for the
+        slowest list."""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                smallest = 1024 if name.endswith('bytes') else 1e-4
+                histogram = self.histograms[name] = Histogram(smallest)
+            histogram.add(value)
+            if label is not None:
+                entry = (value, name, label)
+                if len(self.slowest) < SLOWEST:
+                    heapq.heappush(self.slowest, entry)
+                elif entry > self.slowest[0]:
+                    heapq.heapreplace(self.slowest, entry)
+
+    def timer(self, name: str, label: str = None) -> 'Timer':
+        return Timer(self, name, label)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def progress_line(self) -> str:
+        with self.lock:
+            elapsed = self.elapsed()
+            c = self.counters
+            pages = c.get('pages', 0)
+            attempts = pages + c.get('fetch_errors', 0) + c.get('analyze_errors', 0)
+            errors = c.get('fetch_errors', 0) + c.get('analyze_errors', 0)
+            fetch = self.histograms.get('fetch')
+            extract = self.histograms.get('extract')
+            parts = [
+                f"{elapsed:7.0f}s",
+                f"{pages} pages ({pages / elapsed if elapsed else 0:.1f}/s)",
+                f"{c.get('bytes', 0) / 2 ** 20:.1f} MiB",
+                f"frontier {self.gauges.get('frontier', 0)}",
+                f"depth {self.gauges.get('depth', 0)}",
+            ]
+            if fetch:
+                parts.append(f"fetch p50 {fetch.percentile(50) * 1000:.0f}ms p90 {fetch.percentile(90) * 1000:.0f}ms")
+            if extract:
+                parts.append(f"extract p50 {extract.percentile(50) * 1000:.1f}ms")
+            parts.append(f"errors {100 * errors / attempts if attempts else 0:.1f}%")
+        return ' | '.join(parts)
+
+    def to_dict(self) -> Dict:
+        with self.lock:
+            elapsed = self.elapsed()
+            return {
+                'elapsed_seconds': elapsed,
+                'pages_per_second': self.counters.get('pages', 0) / elapsed if elapsed else 0.0,
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {name: h.summary() for name, h in sorted(self.histograms.items())},
+                'slowest': [
+                    {'seconds': value, 'stage': name, 'page': label}
+                    for value, name, label in sorted(self.slowest, reverse=True)
+                ],
+            }
+
+    def dump(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class Timer:
+    def __init__(self, metrics: CrawlMetrics, name: str, label: str = None):
+        self.metrics = metrics
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, self.label)
+        return False
+
+
+class ProgressReporter:
+    """Prints metrics.progress_line() every interval seconds on a daemon thread."""
+
+    def __init__(self, metrics: CrawlMetrics, interval: float):
+        self.metrics = metrics
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            print(f"[progress] {self.metrics.progress_line()}", flush=True)
+
+    def start(self):
+        if self.interval > 0:
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
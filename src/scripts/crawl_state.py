@@ -0,0 +1,194 @@
+"""
+Crawl bookkeeping for wiki_scraper.py: the visited set and the checkpoint journal.
+
+The visited set records every canonical title the crawl has queued. VisitedSet is an
+exact in-memory set. BloomFilter is a fixed-size alternative for crawls of millions
+of titles: memory is set up front from the expected number of titles and the accepted
+false-positive rate, at the cost of occasionally treating an unseen title as seen (and
+so skipping it) at about that rate.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterator, List
+
+from graph_store import EdgeWriter, load_arrays
+
+
+class VisitedSet:
+    def __init__(self):
+        self.items = set()
+
+    def add(self, item: str) -> bool:
+        """Record item and return True if it was not there already."""
+        if item in self.items:
+            return False
+        self.items.add(item)
+        return True
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        # Standard sizing: m = -n ln p / (ln 2)^2 bits and k = m/n ln 2 hashes
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> bool:
+        """Record item and return True if it was (probably) not there already."""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class CrawlJournal:
+    """Append-only record of a crawl's progress, from which it can be resumed.
+
+    A checkpoint directory holds:
+      crawl.json   the seeds and max_depth the crawl was started with
+      edges.bin    every (tech1, tech2, relationship) as it is found, in the compact
+                   edge format of graph_store.py
+      pages.jsonl  one line per analyzed page: its title, the titles it was requested
+                   under, its depth, and the titles it newly queued; and one line per
+                   batch of titles finished without being analyzed (no such page, or
+                   a redirect to a page queued under its own title)
+
+    Both logs are append-only and flushed to disk every flush_interval seconds, edges
+    first, so a page is never on disk as finished without its edges. Together they
+    hold the partial graph, the visited set and the frontier: everything queued but
+    not yet analyzed is still to do. A torn last line or block from an interrupted
+    write is ignored, and a page whose record never made it is simply fetched again.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 30.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.edges = None
+        self.pages = None
+        # Page records wait here until the edges before them are on disk
+        self.pending_pages = []
+        self.last_flush = time.monotonic()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path('crawl.json'))
+
+    def start(self, seeds: List[str], max_depth: int):
+        """Begin a new crawl, discarding any previous checkpoint in the directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path('crawl.json'), 'w') as f:
+            json.dump({'seeds': seeds, 'max_depth': max_depth}, f)
+        self.edges = EdgeWriter(self.path('edges.bin'))
+        self.pages = open(self.path('pages.jsonl'), 'w', encoding='utf-8')
+
+    def resume(self) -> Dict:
+        """Read back a checkpoint and reopen its logs for appending.
+
+        Returns the crawl's seeds and max_depth, its edges, the titles already
+        analyzed, every queued title with its depth, and the known aliases.
+        """
+        with open(self.path('crawl.json')) as f:
+            state = json.load(f)
+        state['edges'] = load_arrays(self.path('edges.bin')) if os.path.exists(self.path('edges.bin')) else []
+        state['queued'] = {title: 0 for title in state['seeds']}
+        state['done'] = set()
+        state['aliases'] = {}
+        for record in read_jsonl(self.path('pages.jsonl')):
+            if 'finished' in record:
+                state['done'].update(record['finished'])
+                if record['title']:
+                    state['aliases'].update((alias, record['title']) for alias in record['finished'])
+                continue
+            state['done'].add(record['title'])
+            state['done'].update(record['requested'])
+            for alias in record['requested']:
+                if alias != record['title']:
+                    state['aliases'][alias] = record['title']
+            for title in record['queued']:
+                state['queued'].setdefault(title, record['depth'] + 1)
+        self.edges = EdgeWriter(self.path('edges.bin'), append=True)
+        self.pages = open(self.path('pages.jsonl'), 'a', encoding='utf-8')
+        return state
+
+    def record_edges(self, relationships: List[tuple]):
+        with self.lock:
+            self.edges.add_many(relationships)
+
+    def record_page(self, title: str, requested: List[str], depth: int, queued: List[str]):
+        """Mark a page analyzed. Call after its edges are recorded and its links queued."""
+        line = json.dumps({'title': title, 'requested': requested, 'depth': depth, 'queued': queued},
+                          ensure_ascii=False)
+        with self.lock:
+            self.pending_pages.append(line + '\n')
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def record_finished(self, requested: List[str], title: str = None):
+        """Mark titles done without analyzing a page for them: ones with no page, or,
+        given title, aliases of a page that is analyzed under its own title."""
+        line = json.dumps({'finished': requested, 'title': title}, ensure_ascii=False)
+        with self.lock:
+            self.pending_pages.append(line + '\n')
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        self.edges.flush()
+        os.fsync(self.edges.fileno())
+        self.pages.write(''.join(self.pending_pages))
+        self.pending_pages = []
+        self.pages.flush()
+        os.fsync(self.pages.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if self.edges:
+                self._flush()
+                self.edges.close()
+                self.pages.close()
+                self.edges = self.pages = None
+
+
+def read_jsonl(path: str) -> Iterator:
+    """Yield each complete JSON line of path, skipping a torn final line."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
@@ -1,9 +1,23 @@
 import os
-from dotenv import load_dotenv
 import math
-from pyairtable import Api
+from array import array
+from functools import cached_property
+from airtable_reader import iter_records
+from name_index import NGramIndex
+from techgraph import TechGraph
+
+VIEW = "Used for deployment, do not edit directly"
+# The only fields the rules read
+INNOVATION_FIELDS = ['Name', 'Secondary name', 'Date', 'Image URL']
+CONNECTION_FIELDS = ['ID', 'From', 'To', 'Type']
 
 def load_data():
+    """Return (dated inventions, connections, undated inventions) from Airtable.
+    Undated inventions are only used to name connection endpoints."""
+    # Imported here so the validation rules can be used without the Airtable client
+    from dotenv import load_dotenv
+    from pyairtable import Api
+
     # Load environment variables and Airtable connection
     load_dotenv('.env.local')
     api_key = os.getenv("AIRTABLE_API_KEY")
@@ -18,167 +32,218 @@ def load_data():
         innovations_table = base.table("Innovations")
         connections_table = base.table("Connections")
         
-        # Get all records
-        innovations = innovations_table.all(view="Used for deployment, do not edit directly")
-        connections = connections_table.all(view="Used for deployment, do not edit directly")
-        
-        # Filter inventions with dates (excluding undated and year 9999)
+        # Stream the records, sorting inventions into dated (excluding year 9999) and
+        # undated as each page arrives
         valid_inventions = []
-        for inv in innovations:
+        undated_inventions = []
+        for inv in iter_records(innovations_table, fields=INNOVATION_FIELDS, view=VIEW):
             try:
                 date_value = inv['fields'].get('Date')
                 if date_value and not math.isnan(float(date_value)):
                     year = int(float(date_value))
                     if year != 9999:
                         valid_inventions.append(inv)
+                        continue
             except (ValueError, TypeError):
                 # Skip if Date is not a valid number
                 pass
-        
-        return valid_inventions, connections
+            undated_inventions.append(inv)
+        connections = list(iter_records(connections_table, fields=CONNECTION_FIELDS, view=VIEW))
+
+        return valid_inventions, connections, undated_inventions
     except Exception as e:
         print(f"Error loading data: {e}")
         import traceback
         traceback.print_exc()
-        return [], []
+        return [], [], None
 
-def validate_data(inventions, connections):
-    # Create lookup dictionary for inventions by ID and get all inventions (including undated)
-    invention_dict = {inv['id']: inv for inv in inventions}
-    
-    # Get all innovations to look up names even for undated inventions
-    try:
-        api = Api(os.getenv("AIRTABLE_API_KEY"))
-        base = api.base(os.getenv("AIRTABLE_BASE_ID"))
-        all_innovations = base.table("Innovations").all(view="Used for deployment, do not edit directly")
-        all_invention_dict = {inv['id']: inv for inv in all_innovations}
-    except:
-        all_invention_dict = invention_dict  # Fallback to dated inventions only
-    
-    # Track incoming and outgoing connections
-    incoming_connections = {inv['id']: 0 for inv in inventions}
-    outgoing_connections = {inv['id']: 0 for inv in inventions}
-    
-    # Results tracking
-    issues = {
-        'time_paradoxes': [],
-        'no_image': [],
-        'zero_outgoing': 0,
-        'zero_incoming': 0,
-        'orphans': [],
-        'missing_endpoint': [],
-        'undated_endpoint': [],
-        'duplicates': []
-    }
-
-    # Track seen connections to detect duplicates
-    seen_connections = {}
-    
-    # Check connections
-    for conn in connections:
-        # Use the ID field from fields if available
-        connection_id = conn['fields'].get('ID', conn['id'])
-        from_id = conn['fields'].get('From')
-        to_id = conn['fields'].get('To')
-        
-        # Check for missing endpoints
-        if not from_id or not to_id:
-            # Get the name of the endpoint that is present
-            present_id = from_id if from_id else to_id
-            present_id = present_id[0] if isinstance(present_id, list) else present_id
-            present_name = "Unknown"
-            
-            if present_id in all_invention_dict:
-                present_name = all_invention_dict[present_id]['fields'].get('Name', 'Unknown')
-            
-            issues['missing_endpoint'].append({
-                'id': connection_id,
-                'missing': 'From' if not from_id else 'To',
-                'present_name': present_name
-            })
-            continue
-            
-        # Handle array or string values
-        from_id = from_id[0] if isinstance(from_id, list) else from_id
-        to_id = to_id[0] if isinstance(to_id, list) else to_id
-
-        # Check for duplicate connections
-        connection_key = (from_id, to_id)
-        if connection_key in seen_connections:
-            # Get names for the duplicate
-            dup_from_name = all_invention_dict.get(from_id, {}).get('fields', {}).get('Name', 'Unknown')
-            dup_to_name = all_invention_dict.get(to_id, {}).get('fields', {}).get('Name', 'Unknown')
-            issues['duplicates'].append({
-                'id': connection_id,
-                'original_id': seen_connections[connection_key],
-                'from_name': dup_from_name,
-                'to_name': dup_to_name
-            })
-            continue
-        seen_connections[connection_key] = connection_id
+class ValidationColumns(TechGraph):
+    """The tech graph plus the derived columns the rules share, computed on first use.
 
-        # Get names for both endpoints if possible
-        from_name = "Unknown"
-        to_name = "Unknown"
-        
-        if from_id in all_invention_dict:
-            from_name = all_invention_dict[from_id]['fields'].get('Name', 'Unknown')
-        if to_id in all_invention_dict:
-            to_name = all_invention_dict[to_id]['fields'].get('Name', 'Unknown')
-        
-        # Check if both endpoints exist in our valid inventions
-        if from_id not in invention_dict or to_id not in invention_dict:
-            # This means one of the endpoints is undated
-            issues['undated_endpoint'].append({
-                'id': connection_id,
-                'from_id': from_id,
-                'to_id': to_id,
-                'from_name': from_name,
-                'to_name': to_name,
-                'undated': 'From' if from_id not in invention_dict else 'To'
-            })
-            continue
-            
-        # If we got here, both endpoints exist and are dated
-        from_year = int(invention_dict[from_id]['fields']['Date'])
-        to_year = int(invention_dict[to_id]['fields']['Date'])
-        
-        outgoing_connections[from_id] += 1
-        incoming_connections[to_id] += 1
-        
-        # Check for time paradoxes
-        if from_year > to_year:
-            issues['time_paradoxes'].append({
-                'id': connection_id,
-                'from': invention_dict[from_id]['fields']['Name'],
-                'from_year': from_year,
-                'to': invention_dict[to_id]['fields']['Name'],
-                'to_year': to_year
-            })
-    
-    # Check for missing images and count connection issues
-    for inv_id, inv in invention_dict.items():
-        if not inv['fields'].get('Image URL'):
-            issues['no_image'].append(inv['fields'].get('Name', 'Unknown'))
+    Dated inventions hold codes 0 to dated_count - 1, in load order, so per-invention
+    rules only look at that range.
+    """
+
+    @cached_property
+    def names(self):
+        return [title or 'Unknown' for title in self.titles]
+
+    @cached_property
+    def first_seen(self):
+        """For each connection, the position of the first connection with the same endpoints."""
+        width = len(self.ids) + 1
+        seen = {}
+        return array('l', (
+            seen.setdefault((f + 1) * width + t + 1, i)
+            for i, (f, t) in enumerate(zip(self.edge_from, self.edge_to))
+        ))
+
+    @cached_property
+    def live(self):
+        """Connections with both endpoints that are not duplicates of an earlier one."""
+        return bytearray(
+            f >= 0 and t >= 0 and s == i
+            for i, (f, t, s) in enumerate(zip(self.edge_from, self.edge_to, self.first_seen))
+        )
+
+    @cached_property
+    def dated_edges(self):
+        """Positions of live connections whose endpoints are both dated."""
+        dated = self.dated
+        return array('l', (
+            i for i, (f, t, ok) in enumerate(zip(self.edge_from, self.edge_to, self.live))
+            if ok and dated[f] and dated[t]
+        ))
+
+    @cached_property
+    def out_degree(self):
+        counts = array('l', [0]) * len(self.ids)
+        edge_from = self.edge_from
+        for i in self.dated_edges:
+            counts[edge_from[i]] += 1
+        return counts
+
+    @cached_property
+    def in_degree(self):
+        counts = array('l', [0]) * len(self.ids)
+        edge_to = self.edge_to
+        for i in self.dated_edges:
+            counts[edge_to[i]] += 1
+        return counts
+
+# Two dated inventions are reported as possible duplicates when a name or secondary
+# name of one is at least this similar (trigram Jaccard) to a name or secondary name
+# of the other, and their dates are at most NEAR_DUPLICATE_YEARS apart
+NEAR_DUPLICATE_SIMILARITY = 0.7
+NEAR_DUPLICATE_YEARS = 10
+
+# Registered checks, run in registration order. Each takes a ValidationColumns and
+# returns its entry for the issues dict, so a new check is one decorated function.
+RULES = {}
+
+def rule(name):
+    def register(fn):
+        RULES[name] = fn
+        return fn
+    return register
 
-        has_outgoing = outgoing_connections[inv_id] > 0
-        has_incoming = incoming_connections[inv_id] > 0
+@rule('time_paradoxes')
+def check_time_paradoxes(cols):
+    years, names = cols.years, cols.names
+    return [
+        {
+            'id': cols.edge_ids[i],
+            'from': names[f],
+            'from_year': years[f],
+            'to': names[t],
+            'to_year': years[t]
+        }
+        for i, f, t in ((i, cols.edge_from[i], cols.edge_to[i]) for i in cols.dated_edges)
+        if years[f] > years[t]
+    ]
 
-        if not has_outgoing:
-            issues['zero_outgoing'] += 1
+@rule('no_image')
+def check_no_image(cols):
+    return [cols.names[i] for i in range(cols.dated_count) if not cols.has_image[i]]
 
-        if not has_incoming:
-            issues['zero_incoming'] += 1
+@rule('zero_outgoing')
+def check_zero_outgoing(cols):
+    return cols.out_degree[:cols.dated_count].count(0)
 
-        # Orphans have neither incoming nor outgoing connections
-        if not has_outgoing and not has_incoming:
-            issues['orphans'].append(inv['fields'].get('Name', 'Unknown'))
+@rule('zero_incoming')
+def check_zero_incoming(cols):
+    return cols.in_degree[:cols.dated_count].count(0)
 
+@rule('orphans')
+def check_orphans(cols):
+    out_degree, in_degree = cols.out_degree, cols.in_degree
+    return [
+        cols.names[i] for i in range(cols.dated_count)
+        if not out_degree[i] and not in_degree[i]
+    ]
+
+@rule('missing_endpoint')
+def check_missing_endpoint(cols):
+    issues = []
+    for i, (f, t) in enumerate(zip(cols.edge_from, cols.edge_to)):
+        if f >= 0 and t >= 0:
+            continue
+        present = f if f >= 0 else t
+        issues.append({
+            'id': cols.edge_ids[i],
+            'missing': 'From' if f < 0 else 'To',
+            'present_name': cols.names[present] if present >= 0 else 'Unknown'
+        })
     return issues
 
+@rule('undated_endpoint')
+def check_undated_endpoint(cols):
+    dated, names, ids = cols.dated, cols.names, cols.ids
+    return [
+        {
+            'id': cols.edge_ids[i],
+            'from_id': ids[f],
+            'to_id': ids[t],
+            'from_name': names[f],
+            'to_name': names[t],
+            'undated': 'From' if not dated[f] else 'To'
+        }
+        for i, (f, t, ok) in enumerate(zip(cols.edge_from, cols.edge_to, cols.live))
+        if ok and not (dated[f] and dated[t])
+    ]
+
+@rule('duplicates')
+def check_duplicates(cols):
+    return [
+        {
+            'id': cols.edge_ids[i],
+            'original_id': cols.edge_ids[s],
+            'from_name': cols.names[cols.edge_from[i]],
+            'to_name': cols.names[cols.edge_to[i]]
+        }
+        for i, (f, t, s) in enumerate(zip(cols.edge_from, cols.edge_to, cols.first_seen))
+        if f >= 0 and t >= 0 and s != i
+    ]
+
+@rule('near_duplicates')
+def check_near_duplicates(cols):
+    index = NGramIndex()
+    for i in range(cols.dated_count):
+        # Bucket by decade and look one bucket either side, then apply the exact window
+        decade = cols.years[i] // 10
+        for text in (cols.names[i], cols.subtitles[i]):
+            if text and text != 'Unknown':
+                index.add(i, text, decade)
+    years, names = cols.years, cols.names
+    return [
+        {
+            'name': names[a],
+            'year': years[a],
+            'other_name': names[b],
+            'other_year': years[b],
+            'similarity': score
+        }
+        for (a, b), score in sorted(index.similar_pairs(NEAR_DUPLICATE_SIMILARITY, bucket_window=1).items())
+        if abs(years[a] - years[b]) <= NEAR_DUPLICATE_YEARS
+    ]
+
+def validate_data(inventions, connections, all_inventions=None):
+    # Get all innovations to look up names even for undated inventions
+    if all_inventions is None:
+        try:
+            from pyairtable import Api
+            api = Api(os.getenv("AIRTABLE_API_KEY"))
+            base = api.base(os.getenv("AIRTABLE_BASE_ID"))
+            all_inventions = list(iter_records(base.table("Innovations"), fields=INNOVATION_FIELDS, view=VIEW))
+        except:
+            all_inventions = []  # Fall back to dated inventions only
+
+    cols = ValidationColumns.from_airtable(inventions, connections, all_inventions)
+    return {name: check(cols) for name, check in RULES.items()}
+
 def main():
-    inventions, connections = load_data()
-    issues = validate_data(inventions, connections)
+    inventions, connections, undated = load_data()
+    issues = validate_data(inventions, connections, undated)
     
     # Print results
     print(f"Data Validation Results\n{'='*30}")
@@ -202,6 +267,10 @@ def main():
     for dup in issues['duplicates']:
         print(f"  - Connection {dup['id']} duplicates {dup['original_id']}: {dup['from_name']} → {dup['to_name']}")
 
+    print(f"\nPossible duplicate inventions (similar names, dated within {NEAR_DUPLICATE_YEARS} years): {len(issues['near_duplicates'])}")
+    for dup in issues['near_duplicates']:
+        print(f"  - {dup['name']} ({dup['year']}) ~ {dup['other_name']} ({dup['other_year']}), similarity {dup['similarity']:.2f}")
+
     print(f"\nInventions with no outgoing connections: {issues['zero_outgoing']}")
     print(f"Inventions with no incoming connections: {issues['zero_incoming']}")
 
@@ -0,0 +1,284 @@
+"""
+Streaming ingest of external invention-dating datasets (docx, CSV, JSON) into lists
+of record dicts, for comparison with the tech tree.
+
+A source describes how to read one file:
+  DocxSource  records start at headings of a given style and pattern; the paragraphs
+              under a heading fill its fields through "Label: value" extractors
+  CsvSource   one record per row, columns renamed (and optionally converted)
+  JsonSource  a JSON array (optionally under a key) or JSON Lines, fields renamed
+
+Docx bodies are read with ElementTree.iterparse straight out of the zip, one
+paragraph at a time. Each paragraph is matched once against a compiled
+"^Label:" pattern and only the extractor for that label runs, instead of every
+field's regex being tried on every line.
+
+load_records caches parsed records next to a cache directory, keyed by a hash of
+the source file's bytes and of the source's own settings, so an unchanged input is
+never parsed twice. A source can also be described by a JSON spec (see
+source_from_spec), so a new dataset needs a spec file rather than a new script.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+WNS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Bump when parsing changes in a way that should invalidate cached records
+INGEST_VERSION = 1
+
+CONVERTERS = {
+    'str': lambda v: v.strip(),
+    'int': int,
+    'float': float,
+}
+
+
+class Field:
+    """Extracts one record field from the text after a label.
+
+    pattern is applied (re.match) to the text after "label:"; the field gets the
+    convert()ed first group, or the whole match if the pattern has no group. With
+    first=True, later paragraphs with the same label do not overwrite the value.
+    """
+
+    def __init__(self, name: str, label: str, pattern: str = r'\s*(.+)', convert: str = 'str', first: bool = False):
+        self.name = name
+        self.label = label
+        self.pattern_text = pattern
+        self.pattern = re.compile(pattern)
+        self.convert_name = convert
+        self.convert = CONVERTERS[convert]
+        self.first = first
+
+    def extract(self, value: str):
+        m = self.pattern.match(value)
+        if m is None:
+            return None
+        return self.convert(m.group(1) if m.groups() else m.group())
+
+    def spec(self) -> Dict:
+        return {'name': self.name, 'label': self.label, 'pattern': self.pattern_text,
+                'convert': self.convert_name, 'first': self.first}
+
+
+class Source:
+    type = None
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def records(self) -> Iterator[Dict]:
+        raise NotImplementedError
+
+    def spec(self) -> Dict:
+        """The settings that, with the file contents, determine the records."""
+        raise NotImplementedError
+
+
+class DocxSource(Source):
+    """Records under headings of a docx. heading is a pattern whose groups give
+    heading_fields (e.g. r'^(\\d+)\\.\\s+(.+)$' with ('num', 'name'))."""
+    type = 'docx'
+
+    def __init__(self, path: str, heading_style: str, heading: str, heading_fields: Tuple[str, ...],
+                 heading_convert: Tuple[str, ...] = (), fields: List[Field] = ()):
+        super().__init__(path)
+        self.heading_style = heading_style
+        self.heading_text = heading
+        self.heading = re.compile(heading)
+        self.heading_fields = tuple(heading_fields)
+        self.heading_convert = tuple(heading_convert) or ('str',) * len(self.heading_fields)
+        self.fields = list(fields)
+        self.by_label = {f.label: f for f in self.fields}
+        # One pass picks out the label; only that label's extractor runs
+        self.label = re.compile('^(' + '|'.join(re.escape(f.label) for f in self.fields) + '):') if self.fields else None
+
+    def paragraphs(self) -> Iterator[Tuple[str, str]]:
+        """(style, text) of every paragraph, in document order, streamed out of the zip."""
+        with zipfile.ZipFile(self.path) as z, z.open('word/document.xml') as f:
+            depth = 0
+            for event, elem in ET.iterparse(f, events=('start', 'end')):
+                if elem.tag != f'{WNS}p':
+                    continue
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth:
+                    # Nested in another paragraph (e.g. a text box): read with it
+                    continue
+                for p in elem.iter(f'{WNS}p'):
+                    style = ''
+                    ppr = p.find(f'{WNS}pPr')
+                    if ppr is not None:
+                        ps = ppr.find(f'{WNS}pStyle')
+                        if ps is not None:
+                            style = ps.get(f'{WNS}val', '')
+                    yield style, ''.join(t.text or '' for t in p.iter(f'{WNS}t'))
+                elem.clear()
+
+    def records(self):
+        current = None
+        for style, text in self.paragraphs():
+            if style == self.heading_style:
+                m = self.heading.match(text)
+                if m:
+                    if current is not None:
+                        yield current
+                    current = {
+                        name: CONVERTERS[convert](value)
+                        for name, convert, value in zip(self.heading_fields, self.heading_convert, m.groups())
+                    }
+                    continue
+            if current is None or self.label is None:
+                continue
+            m = self.label.match(text)
+            if m is None:
+                continue
+            field = self.by_label[m.group(1)]
+            if field.first and field.name in current:
+                continue
+            value = field.extract(text[m.end():])
+            if value is not None:
+                current[field.name] = value
+        if current is not None:
+            yield current
+
+    def spec(self):
+        return {'type': self.type, 'heading_style': self.heading_style, 'heading': self.heading_text,
+                'heading_fields': list(self.heading_fields), 'heading_convert': list(self.heading_convert),
+                'fields': [f.spec() for f in self.fields]}
+
+
+class CsvSource(Source):
+    """One record per row. columns maps record field -> CSV column; convert maps
+    record field -> converter name. Empty cells are left out."""
+    type = 'csv'
+
+    def __init__(self, path: str, columns: Dict[str, str], convert: Dict[str, str] = None, delimiter: str = ','):
+        super().__init__(path)
+        self.columns = dict(columns)
+        self.convert = dict(convert or {})
+        self.delimiter = delimiter
+
+    def records(self):
+        converters = {name: CONVERTERS[c] for name, c in self.convert.items()}
+        with open(self.path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f, delimiter=self.delimiter):
+                record = {}
+                for name, column in self.columns.items():
+                    value = row.get(column)
+                    if value is None or value == '':
+                        continue
+                    record[name] = converters[name](value) if name in converters else value
+                yield record
+
+    def spec(self):
+        return {'type': self.type, 'columns': self.columns, 'convert': self.convert, 'delimiter': self.delimiter}
+
+
+class JsonSource(Source):
+    """Records from a JSON array (under key, if given) or, for .jsonl files, one JSON
+    object per line, streamed. fields maps record field -> key in each object; by
+    default every key is kept."""
+    type = 'json'
+
+    def __init__(self, path: str, fields: Dict[str, str] = None, key: str = None):
+        super().__init__(path)
+        self.fields = dict(fields) if fields else None
+        self.key = key
+
+    def _objects(self) -> Iterator[Dict]:
+        with open(self.path, encoding='utf-8') as f:
+            if self.path.endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                data = json.load(f)
+                yield from (data[self.key] if self.key else data)
+
+    def records(self):
+        for obj in self._objects():
+            if self.fields is None:
+                yield obj
+            else:
+                yield {name: obj[k] for name, k in self.fields.items() if obj.get(k) not in (None, '')}
+
+    def spec(self):
+        return {'type': self.type, 'fields': self.fields, 'key': self.key}
+
+
+def source_from_spec(spec: Dict, base_dir: str = '.') -> Source:
+    """Build a source from a JSON-style spec with a 'type', a 'path' (relative to
+    base_dir) and that source type's settings."""
+    spec = dict(spec)
+    kind = spec.pop('type')
+    path = os.path.join(base_dir, spec.pop('path'))
+    if kind == 'docx':
+        spec['fields'] = [Field(**f) for f in spec.get('fields', [])]
+        return DocxSource(path, **spec)
+    if kind == 'csv':
+        return CsvSource(path, **spec)
+    if kind == 'json':
+        return JsonSource(path, **spec)
+    raise ValueError(f"Unknown source type: {kind}")
+
+
+def source_hash(source: Source) -> str:
+    digest = hashlib.sha256()
+    with open(source.path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(json.dumps([INGEST_VERSION, source.spec()], sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_records(source: Source, cache_dir: Optional[str] = None) -> List[Dict]:
+    """Parsed records of source, from cache_dir when the source is unchanged."""
+    if cache_dir is None:
+        return list(source.records())
+    stem = os.path.splitext(os.path.basename(source.path))[0]
+    key = source_hash(source)
+    cache_path = os.path.join(cache_dir, f".{stem}.{key[:16]}.records.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)
+    records = list(source.records())
+    os.makedirs(cache_dir, exist_ok=True)
+    # Older caches of the same file are stale now
+    for name in os.listdir(cache_dir):
+        if name.startswith(f".{stem}.") and name.endswith('.records.json'):
+            os.remove(os.path.join(cache_dir, name))
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(records, f)
+    os.replace(tmp, cache_path)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse a dating dataset described by a JSON spec into records.')
+    parser.add_argument('spec', help='JSON spec: {"type": "docx"|"csv"|"json", "path": ..., ...}')
+    parser.add_argument('--out', help='Write the records here as JSON (default: print a summary only)')
+    parser.add_argument('--cache-dir', help='Reuse parsed records from here while the source is unchanged')
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        source = source_from_spec(json.load(f), os.path.dirname(os.path.abspath(args.spec)))
+    records = load_records(source, args.cache_dir)
+    print(f"{len(records)} records from {source.path}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(records, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
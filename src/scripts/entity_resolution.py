@@ -0,0 +1,196 @@
+"""
+Resolve phrases extracted by wiki_scraper.py to tech tree nodes, and turn scraped
+edges into candidate Connections.
+
+Every node's title, subtitle and Wikipedia article title is tokenized (normalized
+as in name_index.py, with a plural 's' dropped) into a token trie. A phrase is
+resolved by walking the trie from each of its tokens, which finds every node name
+occurring in it in time linear in the phrase length times the longest name. A name
+covering the whole phrase scores its full weight. A name covering part of it scores
+less, and less again if it does not end the phrase, since in "newcomen steam engine
+design" the head is at the end. Phrases that contain no node name at all can fall
+back to a trigram similarity lookup.
+
+The scraper's edges read "tech1 <keyword> tech2" ("X was inspired by Y", "X uses Y",
+"X developed from Y"), so the tree connection they suggest runs from tech2 to tech1.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from name_index import NGramIndex, tokens
+from techgraph import TechGraph
+from wiki_fetch import title_from_url
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TREE_PATH = os.path.join(REPO, 'src', 'app', 'api', 'inventions', 'techtree-data.json')
+
+# Scraper relationship -> Connections type
+CONNECTION_TYPES = {
+    'inspired': 'Inspiration',
+    'prerequisite': 'Prerequisite',
+    'component': 'Component',
+    'improvement': 'Improvement',
+}
+# Weight of a match by the kind of name it matched
+TITLE_WEIGHT = 1.0
+SUBTITLE_WEIGHT = 0.9
+WIKIPEDIA_WEIGHT = 0.95
+# Multiplier for a partial match that does not end the phrase
+NON_HEAD_PENALTY = 0.7
+# Multiplier for trigram-similarity matches
+FUZZY_WEIGHT = 0.8
+END = ''
+
+
+class EntityResolver:
+    def __init__(self, graph: TechGraph, fuzzy_threshold: float = 0.0):
+        """fuzzy_threshold > 0 enables the trigram fallback for phrases that contain
+        no node name, at that Jaccard similarity."""
+        self.graph = graph
+        self.trie = {}
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy = NGramIndex() if fuzzy_threshold else None
+        self._resolved = {}
+        for code, (title, subtitle) in enumerate(zip(graph.titles, graph.subtitles)):
+            self.add_name(code, title, TITLE_WEIGHT)
+            self.add_name(code, subtitle, SUBTITLE_WEIGHT)
+
+    def add_name(self, code: int, name: str, weight: float):
+        words = tokens(name)
+        if not words:
+            return
+        node = self.trie
+        for word in words:
+            node = node.setdefault(word, {})
+        entries = node.setdefault(END, {})
+        entries[code] = max(weight, entries.get(code, 0))
+        if self.fuzzy is not None:
+            self.fuzzy.add(code, name)
+        self._resolved.clear()
+
+    @classmethod
+    def from_techtree_json(cls, data: Dict, fuzzy_threshold: float = 0.0) -> 'EntityResolver':
+        resolver = cls(TechGraph.from_techtree_json(data), fuzzy_threshold)
+        for node in data['nodes']:
+            if node.get('wikipedia'):
+                resolver.add_name(resolver.graph.index[node['id']], title_from_url(node['wikipedia']), WIKIPEDIA_WEIGHT)
+        return resolver
+
+    @classmethod
+    def load(cls, path: str = TREE_PATH, fuzzy_threshold: float = 0.0) -> 'EntityResolver':
+        with open(path) as f:
+            return cls.from_techtree_json(json.load(f), fuzzy_threshold)
+
+    def resolve(self, phrase: str, limit: int = 3) -> List[Tuple[int, float]]:
+        """Return up to limit (node code, score) candidates for phrase, best first."""
+        cached = self._resolved.get((phrase, limit))
+        if cached is not None:
+            return cached
+        words = tokens(phrase)
+        scores = {}
+        for start in range(len(words)):
+            node = self.trie
+            for stop in range(start, len(words)):
+                node = node.get(words[stop])
+                if node is None:
+                    break
+                entries = node.get(END)
+                if not entries:
+                    continue
+                coverage = (stop + 1 - start) / len(words)
+                factor = coverage ** 0.5 * (1.0 if stop == len(words) - 1 else NON_HEAD_PENALTY)
+                for code, weight in entries.items():
+                    score = weight * factor
+                    if score > scores.get(code, 0):
+                        scores[code] = score
+        if not scores and self.fuzzy is not None:
+            for code, similarity in self.fuzzy.query(phrase, self.fuzzy_threshold):
+                scores[code] = similarity * FUZZY_WEIGHT
+        result = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        self._resolved[(phrase, limit)] = result
+        return result
+
+    def connection_candidates(self, edges: Iterable[Tuple[str, str, str]], min_score: float = 0.6) -> List[Dict]:
+        """Resolve scraped (tech1, tech2, relationship) edges to proposed Connections.
+
+        Only each phrase's best node is used. Candidates between nodes the tree already
+        connects (in either direction) are dropped, and the rest are merged by
+        (from, to, type), with the number of scraped edges supporting each.
+        """
+        graph = self.graph
+        existing = set()
+        for f, t in zip(graph.edge_from, graph.edge_to):
+            existing.add((f, t))
+            existing.add((t, f))
+
+        candidates = {}
+        for tech1, tech2, relationship in edges:
+            target = self.resolve(tech1, 1)
+            source = self.resolve(tech2, 1)
+            if not source or not target:
+                continue
+            (source_code, source_score), (target_code, target_score) = source[0], target[0]
+            score = source_score * target_score
+            if source_code == target_code or score < min_score or (source_code, target_code) in existing:
+                continue
+            key = (source_code, target_code, CONNECTION_TYPES.get(relationship, 'default'))
+            candidate = candidates.get(key)
+            if candidate is None:
+                candidate = candidates[key] = {
+                    'From': graph.titles[source_code], 'To': graph.titles[target_code], 'Type': key[2],
+                    'From id': graph.ids[source_code], 'To id': graph.ids[target_code],
+                    'Score': 0.0, 'Support': 0, 'From phrase': tech2, 'To phrase': tech1,
+                }
+            candidate['Support'] += 1
+            if score > candidate['Score']:
+                candidate.update({'Score': round(score, 3), 'From phrase': tech2, 'To phrase': tech1})
+        return sorted(candidates.values(), key=lambda c: (-c['Support'], -c['Score'], c['From'], c['To']))
+
+
+def load_edges(path: str):
+    """Edges from a graph_store edge file or a GraphML export of the scraper graph."""
+    if path.endswith('.graphml'):
+        import networkx as nx
+        graph = nx.read_graphml(path)
+        return [(s, t, data.get('relationship', 'unknown')) for s, t, data in graph.edges(data=True)]
+    from graph_store import load_arrays
+    return load_arrays(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Propose tech tree Connections from scraped relationships.')
+    parser.add_argument('edges', help='Edge file (or .graphml) written by wiki_scraper.py')
+    parser.add_argument('--tree', default=TREE_PATH, help='techtree-data.json to resolve against')
+    parser.add_argument('--out', default='connection_candidates.csv', help='CSV of proposed Connections')
+    parser.add_argument('--min-score', type=float, default=0.6,
+                        help='Lowest product of the two endpoint scores to propose (default: %(default)s)')
+    parser.add_argument('--fuzzy', type=float, default=0.0, metavar='THRESHOLD',
+                        help='Trigram similarity fallback for phrases containing no node name, 0 to disable')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    resolver = EntityResolver.load(args.tree, args.fuzzy)
+    edges = load_edges(args.edges)
+    indexed = time.perf_counter()
+    phrases = {phrase for tech1, tech2, _ in edges for phrase in (tech1, tech2)}
+    resolved = sum(1 for phrase in phrases if resolver.resolve(phrase))
+    candidates = resolver.connection_candidates(edges, args.min_score)
+    done = time.perf_counter()
+
+    print(f"Indexed {len(resolver.graph)} nodes and loaded {len(edges)} edges in {indexed - start:.2f}s")
+    print(f"Resolved {resolved} of {len(phrases)} distinct phrases in {done - indexed:.2f}s")
+    print(f"Proposed {len(candidates)} new connections")
+    with open(args.out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['From', 'To', 'Type', 'Score', 'Support', 'From phrase',
+                                               'To phrase', 'From id', 'To id'])
+        writer.writeheader()
+        writer.writerows(candidates)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Compact edge-list storage for the graphs wiki_scraper.py builds.
+
+An edge file is a header followed by blocks, appended as edges arrive:
+  string block  b'S', u32 count, u32 byte length, that many strings joined by NUL
+  edge block    b'E', u32 count, then count u32 sources, count u32 targets and
+                count u32 relationship codes, all little-endian
+
+Technology names and relationship types share one string table, numbered in the
+order the string blocks write them, so an edge costs 12 bytes and every name is
+stored once. Columns load straight into arrays with frombytes, without parsing a
+record at a time. A block cut short by an interrupted write is ignored on load.
+
+GraphML stays available as a final conversion (see write_graphml and main), for
+tools that want it. networkx is only imported by the functions that use it.
+"""
+import argparse
+import struct
+import sys
+from array import array
+from typing import Iterator, List, Tuple
+
+MAGIC = b'TTEDGES1'
+HEADER = struct.Struct('<cI')
+# Edges buffered before a block is written
+BLOCK_EDGES = 4096
+
+
+def _u32_array(data: bytes) -> array:
+    column = array('I')
+    column.frombytes(data)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def _scan(data: bytes, path: str) -> Iterator[Tuple[str, object, int]]:
+    # Yields each complete block with the offset just past it
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not an edge file")
+    pos = len(MAGIC)
+    while pos + HEADER.size <= len(data):
+        kind, count = HEADER.unpack_from(data, pos)
+        pos += HEADER.size
+        if kind == b'S':
+            if pos + 4 > len(data):
+                return
+            (length,) = struct.unpack_from('<I', data, pos)
+            pos += 4
+            if pos + length > len(data):
+                return
+            strings = data[pos:pos + length].decode('utf-8').split('\0') if count else []
+            pos += length
+            yield 'S', strings, pos
+        elif kind == b'E':
+            size = 4 * count
+            if pos + 3 * size > len(data):
+                return
+            columns = tuple(_u32_array(data[pos + i * size:pos + (i + 1) * size]) for i in range(3))
+            pos += 3 * size
+            yield 'E', columns, pos
+        else:
+            raise ValueError(f"{path}: unknown block type {kind!r}")
+
+
+def read_blocks(path: str) -> Iterator[Tuple[str, object]]:
+    """Yield ('S', [strings]) and ('E', (sources, targets, relationships)) per complete block."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    for kind, block, _ in _scan(data, path):
+        yield kind, block
+
+
+class EdgeList:
+    """Edges as parallel arrays of codes into strings."""
+
+    def __init__(self):
+        self.strings = []
+        self.sources = array('I')
+        self.targets = array('I')
+        self.relationships = array('I')
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self) -> Iterator[Tuple[str, str, str]]:
+        strings = self.strings
+        for s, t, r in zip(self.sources, self.targets, self.relationships):
+            yield strings[s], strings[t], strings[r]
+
+
+def load_arrays(path: str) -> EdgeList:
+    """Load an edge file as it was written, duplicates included."""
+    edges = EdgeList()
+    for kind, block in read_blocks(path):
+        if kind == 'S':
+            edges.strings.extend(block)
+        else:
+            sources, targets, relationships = block
+            edges.sources.extend(sources)
+            edges.targets.extend(targets)
+            edges.relationships.extend(relationships)
+    return edges
+
+
+def load_networkx(path: str) -> 'nx.DiGraph':
+    """Load an edge file into a DiGraph like the scraper's: one edge per pair, with the
+    relationship it was last written with."""
+    import networkx as nx
+    graph = nx.DiGraph()
+    graph.add_edges_from((s, t, {'relationship': r}) for s, t, r in load_arrays(path))
+    return graph
+
+
+class EdgeWriter:
+    """Appends edges to an edge file, interning strings as they first appear."""
+
+    def __init__(self, path: str, append: bool = False):
+        """With append=True an existing file is continued: its string table is read
+        back, and a torn block at its end is cut off first."""
+        self.codes = {}
+        end = 0
+        if append:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = b''
+            if data:
+                end = len(MAGIC)
+                for kind, block, end in _scan(data, path):
+                    if kind == 'S':
+                        for s in block:
+                            self.codes[s] = len(self.codes)
+        if end:
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+        self.new_strings = []
+        self.sources = array('I')
+        self.targets = array('I')
+        self.relationships = array('I')
+
+    def code(self, s: str) -> int:
+        code = self.codes.get(s)
+        if code is None:
+            code = self.codes[s] = len(self.codes)
+            self.new_strings.append(s)
+        return code
+
+    def add(self, source: str, target: str, relationship: str):
+        self.sources.append(self.code(source))
+        self.targets.append(self.code(target))
+        self.relationships.append(self.code(relationship))
+        if len(self.sources) >= BLOCK_EDGES:
+            self.write_blocks()
+
+    def add_many(self, edges):
+        for source, target, relationship in edges:
+            self.add(source, target, relationship)
+
+    def write_blocks(self):
+        """Write buffered strings and edges; strings first, so a complete edge block
+        never refers to a string that is not on disk."""
+        if self.new_strings:
+            blob = '\0'.join(self.new_strings).encode('utf-8')
+            self.file.write(HEADER.pack(b'S', len(self.new_strings)) + struct.pack('<I', len(blob)) + blob)
+            self.new_strings = []
+        if self.sources:
+            self.file.write(HEADER.pack(b'E', len(self.sources)))
+            for column in (self.sources, self.targets, self.relationships):
+                if sys.byteorder != 'little':
+                    column = array('I', column)
+                    column.byteswap()
+                self.file.write(column.tobytes())
+            self.sources = array('I')
+            self.targets = array('I')
+            self.relationships = array('I')
+
+    def flush(self):
+        self.write_blocks()
+        self.file.flush()
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def write_edges(graph: 'nx.DiGraph', path: str):
+    """Write a scraper graph to an edge file."""
+    writer = EdgeWriter(path)
+    writer.add_many((s, t, data.get('relationship', 'unknown')) for s, t, data in graph.edges(data=True))
+    writer.close()
+
+
+def write_graphml(edge_path: str, graphml_path: str):
+    import networkx as nx
+    nx.write_graphml(load_networkx(edge_path), graphml_path)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Summarize an edge file or convert it to GraphML.')
+    parser.add_argument('edges', help='Edge file written by wiki_scraper.py')
+    parser.add_argument('--graphml', metavar='PATH', help='Write the graph as GraphML to PATH')
+    args = parser.parse_args(argv)
+
+    edges = load_arrays(args.edges)
+    print(f"{len(edges)} edges, {len(edges.strings)} distinct strings")
+    if args.graphml:
+        write_graphml(args.edges, args.graphml)
+        print(f"Wrote {args.graphml}")
+
+
+if __name__ == '__main__':
+    main()
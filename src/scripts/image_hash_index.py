@@ -0,0 +1,262 @@
+"""
+Perceptual-hash index of the thumbnails in public/tech-images, to find records that
+ended up with visually the same image and records whose image is a placeholder.
+
+Each image gets a 128-bit difference hash (dHash): the image is shrunk to 9x9 grey
+pixels and each bit says whether a pixel is brighter than its right-hand or its lower
+neighbour. Re-encoding, resizing and small crops change only a few bits, so two
+thumbnails of the same picture are a small Hamming distance apart. The vertical half
+matters: on its own the horizontal 64 bits put unrelated tall, pale images (a diagram
+and a photo of a shoe) as close together as real duplicates. The hashes go into a BK-tree, which
+answers "every image within distance d of this one" by visiting only the subtrees the
+triangle inequality allows, instead of comparing against all ~2,500 thumbnails.
+
+Hashes are cached in .image-hashes.json at the repo root, with each file's size and
+modification time, so a refresh only re-hashes files that changed. update_images.py
+adds each image it writes as it goes and warns straight away when the new image
+matches a placeholder or another thumbnail.
+
+Usage:
+  python src/scripts/image_hash_index.py                 # refresh and report
+  python src/scripts/image_hash_index.py --distance 4
+  python src/scripts/image_hash_index.py --query some-image.webp
+"""
+import argparse
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IMAGES_DIR = os.path.join(REPO, 'public', 'tech-images')
+INDEX_PATH = os.path.join(REPO, '.image-hashes.json')
+# Images that mean "no real image": a thumbnail close to one of these is reported
+PLACEHOLDERS = [os.path.join(REPO, 'public', 'placeholder-invention.jpg')]
+IMAGE_EXTENSIONS = ('.webp', '.jpg', '.jpeg', '.png', '.gif')
+# Most differing bits (of 128) for two images to count as the same picture. Copies of
+# the same picture in the tree differ by at most 3; unrelated images by 14 or more.
+MAX_DISTANCE = 8
+
+
+def dhash(path: str) -> int:
+    """128-bit difference hash of the image at path: 64 horizontal bits, then 64 vertical."""
+    from PIL import Image, ImageOps
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # Transparent areas are shown on white, as update_images.py flattens them
+            img = img.convert('RGBA')
+            background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+            img = Image.alpha_composite(background, img)
+        pixels = img.convert('L').resize((9, 9), Image.Resampling.LANCZOS).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 9])
+    return value
+
+
+def distance(a: int, b: int) -> int:
+    # Not int.bit_count(), which needs Python 3.10
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over hashes under Hamming distance. Each node is
+    [hash, keys with that hash, {distance: child}]."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value: int, key: str):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [key], {}]
+            return
+        node = self.root
+        while True:
+            d = distance(value, node[0])
+            if d == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [key], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> Iterator[Tuple[int, str]]:
+        """(distance, key) for every key whose hash is within radius of value."""
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = distance(value, node[0])
+            if d <= radius:
+                for key in node[1]:
+                    yield d, key
+            # Anything within radius of value lies in a child at distance d ± radius
+            for child_distance, child in node[2].items():
+                if d - radius <= child_distance <= d + radius:
+                    stack.append(child)
+
+
+class ImageHashIndex:
+    """Hashes of the images in a directory, keyed by filename, with a BK-tree over
+    them. The tree is built on first query and kept up to date by update()."""
+
+    def __init__(self, images_dir: str = IMAGES_DIR, path: str = INDEX_PATH):
+        self.images_dir = images_dir
+        self.path = path
+        # filename -> [size, mtime_ns, hash as 32 hex digits]
+        self.entries: Dict[str, list] = {}
+        self._tree = None
+        self._placeholders = None
+
+    @classmethod
+    def load(cls, images_dir: str = IMAGES_DIR, path: str = INDEX_PATH) -> 'ImageHashIndex':
+        index = cls(images_dir, path)
+        try:
+            with open(path) as f:
+                index.entries = json.load(f)['images']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        return index
+
+    def save(self):
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'images': self.entries}, f, indent=0, sort_keys=True)
+        os.replace(self.path + '.tmp', self.path)
+
+    def hash_of(self, filename: str) -> int:
+        return int(self.entries[filename][2], 16)
+
+    def update(self, filename: str) -> bool:
+        """Hash images_dir/filename if it is new or has changed since it was last
+        hashed. Returns whether it was (re-)hashed. The new hash is searchable straight
+        away, so of two images written one after the other the second is reported as a
+        duplicate of the first."""
+        st = os.stat(os.path.join(self.images_dir, filename))
+        entry = self.entries.get(filename)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return False
+        value = dhash(os.path.join(self.images_dir, filename))
+        self.entries[filename] = [st.st_size, st.st_mtime_ns, f"{value:032x}"]
+        if entry is not None:
+            # A BK-tree cannot move a key, so rebuild on the next query
+            self._tree = None
+        elif self._tree is not None:
+            self._tree.add(value, filename)
+        return True
+
+    def refresh(self) -> Tuple[int, int]:
+        """Bring the index in line with images_dir. Returns (images hashed, entries
+        dropped because their file is gone)."""
+        present = {name for name in os.listdir(self.images_dir) if name.lower().endswith(IMAGE_EXTENSIONS)}
+        hashed = 0
+        for name in sorted(present):
+            try:
+                hashed += self.update(name)
+            except OSError as e:
+                print(f"Could not hash {name}: {e}")
+        removed = [name for name in self.entries if name not in present]
+        for name in removed:
+            del self.entries[name]
+        if removed:
+            self._tree = None
+        return hashed, len(removed)
+
+    @property
+    def tree(self) -> BKTree:
+        if self._tree is None:
+            self._tree = BKTree()
+            for name in sorted(self.entries):
+                self._tree.add(self.hash_of(name), name)
+        return self._tree
+
+    def placeholder_hashes(self) -> Dict[str, int]:
+        if self._placeholders is None:
+            self._placeholders = {os.path.relpath(p, REPO): dhash(p) for p in PLACEHOLDERS if os.path.exists(p)}
+        return self._placeholders
+
+    def similar(self, value: int, max_distance: int = MAX_DISTANCE) -> List[Tuple[int, str]]:
+        """(distance, filename) of the indexed images within max_distance of value, closest first."""
+        return sorted(self.tree.search(value, max_distance))
+
+    def duplicates_of(self, filename: str, max_distance: int = MAX_DISTANCE) -> List[Tuple[int, str]]:
+        return [(d, name) for d, name in self.similar(self.hash_of(filename), max_distance) if name != filename]
+
+    def placeholder_matches(self, filename: str, max_distance: int = MAX_DISTANCE) -> List[Tuple[int, str]]:
+        value = self.hash_of(filename)
+        return sorted((distance(value, h), name) for name, h in self.placeholder_hashes().items()
+                      if distance(value, h) <= max_distance)
+
+    def duplicate_groups(self, max_distance: int = MAX_DISTANCE) -> List[List[str]]:
+        """Groups of filenames linked by chains of near-duplicate pairs, largest first."""
+        parent = {}
+
+        def find(name):
+            root = name
+            while parent.get(root, root) != root:
+                root = parent[root]
+            parent[name] = root
+            return root
+
+        for name in sorted(self.entries):
+            for _, other in self.duplicates_of(name, max_distance):
+                a, b = find(name), find(other)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+        groups = {}
+        for name in parent:
+            groups.setdefault(find(name), []).append(name)
+        return sorted((sorted(group) for group in groups.values()), key=lambda g: (-len(g), g))
+
+    def placeholders(self, max_distance: int = MAX_DISTANCE) -> List[Tuple[str, int, str]]:
+        """(filename, distance, placeholder) for every image close to a placeholder."""
+        found = []
+        for name, value in self.placeholder_hashes().items():
+            found += [(match, d, name) for d, match in self.similar(value, max_distance)]
+        return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find near-duplicate and placeholder images in public/tech-images.')
+    parser.add_argument('--distance', type=int, default=MAX_DISTANCE,
+                        help=f'Most differing hash bits (of 128) to count as the same image (default: {MAX_DISTANCE})')
+    parser.add_argument('--query', metavar='IMAGE', help='Only list the images similar to this one (a filename in the images directory, or any path)')
+    parser.add_argument('--images-dir', default=IMAGES_DIR, help='Directory of thumbnails to index')
+    parser.add_argument('--index', default=INDEX_PATH, help='Hash cache file')
+    args = parser.parse_args()
+
+    index = ImageHashIndex.load(args.images_dir, args.index)
+    hashed, removed = index.refresh()
+    index.save()
+    print(f"{len(index.entries)} images indexed ({hashed} hashed, {removed} removed)")
+
+    if args.query:
+        in_dir = os.path.join(args.images_dir, os.path.basename(args.query))
+        value = dhash(args.query if os.path.exists(args.query) else in_dir)
+        matches = [(d, name) for d, name in index.similar(value, args.distance) if name != os.path.basename(args.query)]
+        print(f"\n{len(matches)} image(s) within {args.distance} bits of {args.query}:")
+        for d, name in matches:
+            print(f"  {d:2}  {name}")
+        return
+
+    groups = index.duplicate_groups(args.distance)
+    print(f"\nNear-duplicate groups (within {args.distance} bits): {len(groups)}")
+    for group in groups:
+        print('  ' + ', '.join(group))
+
+    matches = index.placeholders(args.distance)
+    print(f"\nImages matching a placeholder: {len(matches)}")
+    for name, d, placeholder in matches:
+        print(f"  {name} ({d} bits from {placeholder})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Character n-gram index for finding similar invention names without comparing every pair.
+
+Names are normalized (case, accents and punctuation dropped) and reduced to sets of
+character trigrams, compared by Jaccard similarity. similar_pairs() uses prefix
+filtering: grams are ordered rarest first across the whole index, and two sets with
+Jaccard similarity >= t must share at least one gram among the first
+|A| - ceil(t * |A|) + 1 of each. Only those prefixes are probed, so common grams like
+"ion" never produce candidates on their own.
+
+That alone still lets candidates grow with the number of names, as the prefixes of
+long names reach grams shared by thousands of others (70% of each name's grams, in a
+synthetic tree of "Steam engine process ..." names). Two further filters, both exact,
+keep them down (as in PPJoin):
+  - entries are visited shortest first, so an entry only meets longer ones later and
+    is indexed under the first |A| - ceil(2t / (1 + t) * |A|) + 1 grams of its
+    prefix, which are mostly its rare ones;
+  - when a candidate is first reached through a gram, no gram before it is shared, so
+    the two share at most the grams from there on in the shorter of their two tails.
+    Pairs that cannot reach the threshold that way are dropped before scoring.
+As a backstop each (bucket, gram) posting list is capped at max_postings; a full list
+is skipped and the prefix extended by the next gram. Below the cap the result is
+exact.
+
+Entries can carry an integer bucket (e.g. a decade); pairs are only looked for within
+bucket_window of each other, so buckets also bound the candidate lists.
+
+query() looks up a single text the same way: any indexed text it reaches the
+threshold with shares at least one of the query's first prefix_length grams, so only
+the postings of those (rarest) grams are scored.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+ARTICLES = {'a', 'an', 'the'}
+# Longest posting list similar_pairs() keeps per (bucket, gram)
+MAX_POSTINGS = 200
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse everything but letters and digits to spaces."""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+    return NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def singular(token):
+    """Drop a plural 's' ('engines' -> 'engine'), leaving 'glass' and short words alone."""
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokens(text):
+    """Normalized words of text, singular, without articles."""
+    return [singular(t) for t in normalize(text).split() if t not in ARTICLES]
+
+
+def ngrams(text, n=3):
+    """Set of character n-grams of the normalized text, padded so word edges count."""
+    padded = f" {normalize(text)} "
+    if len(padded) <= n:
+        return {padded} if padded.strip() else set()
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def prefix_length(size, threshold):
+    return size - math.ceil(threshold * size) + 1
+
+
+class NGramIndex:
+    """Texts keyed by caller-supplied keys, each with an optional integer bucket.
+
+    A key may be added several times (a name and a subtitle, say); pairs are reported
+    once per pair of distinct keys, with the best similarity across their texts. Keys
+    must be orderable, since each pair is reported as (smaller, larger).
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.keys = []
+        self.buckets = []
+        self.grams = []
+        self.df = Counter()
+        self._postings = None
+
+    def add(self, key, text, bucket=0):
+        grams = ngrams(text, self.n)
+        if not grams:
+            return
+        self.keys.append(key)
+        self.buckets.append(bucket)
+        self.grams.append(grams)
+        self.df.update(grams)
+        self._postings = None
+
+    def similar_pairs(self, threshold, bucket_window=0, max_postings=MAX_POSTINGS):
+        """Return {(key_a, key_b): similarity} for distinct keys whose texts reach
+        threshold (exact unless a posting list reaches max_postings, see above)."""
+        df = self.df
+        rank = {g: r for r, g in enumerate(sorted(df, key=lambda g: (df[g], g)))}
+        ranked = [sorted([rank[g] for g in grams]) for grams in self.grams]
+        sizes = [len(grams) for grams in ranked]
+        order = sorted(range(len(ranked)), key=sizes.__getitem__)
+        # bucket -> gram rank -> [(entry, position of the gram in the entry)], holding
+        # the entries of every bucket within bucket_window, so one lookup covers them
+        prefix_index = defaultdict(dict)
+        overlap_ratio = threshold / (1 + threshold)
+        best = {}
+        for i in order:
+            grams = ranked[i]
+            size = sizes[i]
+            length = prefix_length(size, threshold)
+            # Later entries are at least as long, so share at least
+            # 2t / (1 + t) * size grams with this one, within a shorter prefix
+            index_length = size - math.ceil(2 * overlap_ratio * size - 1e-9) + 1
+            bucket = self.buckets[i]
+            index = prefix_index[bucket]
+            # Visited shortest first, so every candidate is at most this long and
+            # can only reach the threshold if it is at least t times as long
+            min_size = threshold * size
+            seen = set()
+            candidates = []
+            prefix = []
+            skipped = 0
+            for position, g in enumerate(grams):
+                postings = index.get(g)
+                if postings is not None:
+                    if len(postings) >= max_postings:
+                        skipped += 1
+                        continue
+                    rest = size - position
+                    for j, other_position in postings:
+                        if j in seen:
+                            continue
+                        seen.add(j)
+                        other_size = sizes[j]
+                        # g is the first gram the two share (bar skipped ones), so
+                        # they share at most the grams from it on in the shorter tail
+                        if other_size >= min_size and skipped + min(rest, other_size - other_position) \
+                                >= math.ceil(overlap_ratio * (size + other_size) - 1e-9):
+                            candidates.append(j)
+                prefix.append((g, position))
+                if len(prefix) == length:
+                    break
+            key = self.keys[i]
+            texts = self.grams[i]
+            for j in candidates:
+                other = self.keys[j]
+                if other == key:
+                    continue
+                score = jaccard(texts, self.grams[j])
+                if score >= threshold:
+                    pair = (min(key, other), max(key, other))
+                    if score > best.get(pair, 0):
+                        best[pair] = score
+            for b in range(bucket - bucket_window, bucket + bucket_window + 1):
+                index = prefix_index[b]
+                for g, position in prefix[:index_length]:
+                    postings = index.setdefault(g, [])
+                    if len(postings) < max_postings:
+                        postings.append((i, position))
+        return best
+
+    def query(self, text, threshold):
+        """Return [(key, similarity)] for keys with a text reaching threshold against
+        text, best first, each key once."""
+        grams = ngrams(text, self.n)
+        if not grams:
+            return []
+        if self._postings is None:
+            self._postings = defaultdict(list)
+            for i, entry in enumerate(self.grams):
+                for g in entry:
+                    self._postings[g].append(i)
+        df = self.df
+        ranked = sorted(grams, key=lambda g: (df[g], g))
+        candidates = set()
+        for g in ranked[:prefix_length(len(ranked), threshold)]:
+            candidates.update(self._postings.get(g, ()))
+        best = {}
+        for i in candidates:
+            score = jaccard(grams, self.grams[i])
+            key = self.keys[i]
+            if score >= threshold and score > best.get(key, 0):
+                best[key] = score
+        return sorted(best.items(), key=lambda item: -item[1])
@@ -0,0 +1,225 @@
+"""
+Match external invention records (a name and, optionally, a year) to tech tree nodes.
+
+Candidates for a name come from an inverted index of the words (normalized,
+singular, without articles) of every node's title and subtitle: the nodes sharing a
+word with the name, taken rarest word first until common words would bring in more
+than MAX_CANDIDATES. A word of the name that is not in the tree at all (often a
+misspelling, "Daguerrotype") stands for the tree words with similar character
+trigrams, found through an NGramIndex of the tree's vocabulary.
+
+Each candidate is scored on the better of its title and subtitle:
+
+  similarity = (word score + trigram Jaccard) / 2
+  score      = similarity * (1 - YEAR_WEIGHT + YEAR_WEIGHT * prior)
+
+The word score averages the Jaccard similarity of the two word sets with the share
+of the node's words found in the name, since records tend to describe a node at
+more length ("Francis water turbine" for "Francis turbine"). The year prior is
+exp(-|record year - node year| / YEAR_SCALE), or 1 when either year is unknown.
+
+The best candidate is the match; its confidence depends on its score and on its
+margin over the runner-up. Scores below MIN_SCORE are left unmatched.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from name_index import NGramIndex, jaccard, ngrams, tokens
+from techgraph import TechGraph
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TREE_PATH = os.path.join(REPO, 'src', 'app', 'api', 'inventions', 'techtree-data.json')
+
+# Nodes gathered from shared words before common words are skipped
+MAX_CANDIDATES = 200
+# Trigram similarity for a tree word to stand in for a word not in the tree
+WORD_SIMILARITY = 0.5
+# Share of the score given to year proximity, and the years over which it decays by 1/e
+YEAR_WEIGHT = 0.25
+YEAR_SCALE = 30
+MIN_SCORE = 0.45
+# (confidence, lowest score, lowest margin over the runner-up), checked in order
+CONFIDENCE_LEVELS = [('high', 0.8, 0.1), ('medium', 0.6, 0.05), ('low', MIN_SCORE, 0.0)]
+
+
+class Match:
+    def __init__(self, name: str, year: Optional[int], code: Optional[int], score: float = 0.0,
+                 margin: float = 0.0, confidence: str = 'none', method: str = 'auto'):
+        self.name = name
+        self.year = year
+        self.code = code
+        self.score = score
+        self.margin = margin
+        self.confidence = confidence
+        self.method = method
+        # Tree title an override named but the tree no longer has
+        self.stale_override = None
+
+    @property
+    def matched(self) -> bool:
+        return self.code is not None
+
+
+class NameMatcher:
+    def __init__(self, graph: TechGraph):
+        self.graph = graph
+        self.words = defaultdict(set)
+        # Per node: [(word set, trigram set)] for its title and subtitle
+        self.names = defaultdict(list)
+        for code, (title, subtitle) in enumerate(zip(graph.titles, graph.subtitles)):
+            for name in (title, subtitle):
+                words = set(tokens(name))
+                if not words:
+                    continue
+                for word in words:
+                    self.words[word].add(code)
+                self.names[code].append((words, ngrams(name)))
+        self.vocabulary = NGramIndex()
+        for word in self.words:
+            self.vocabulary.add(word, word)
+        # Nodes for each word not in the tree, by word
+        self.stand_ins = {}
+
+    @classmethod
+    def load(cls, path: str = TREE_PATH) -> 'NameMatcher':
+        return cls(TechGraph.load(path))
+
+    def postings(self, word: str) -> set:
+        if word in self.words:
+            return self.words[word]
+        nodes = self.stand_ins.get(word)
+        if nodes is None:
+            nodes = self.stand_ins[word] = set()
+            for similar, _ in self.vocabulary.query(word, WORD_SIMILARITY):
+                nodes.update(self.words[similar])
+        return nodes
+
+    def candidates(self, words: set) -> set:
+        codes = set()
+        for nodes in sorted((self.postings(word) for word in words), key=len):
+            if codes and len(codes) + len(nodes) > MAX_CANDIDATES:
+                break
+            codes.update(nodes)
+        return codes
+
+    def similarity(self, code: int, words: set, grams: set) -> float:
+        best = 0.0
+        for w, g in self.names[code]:
+            shared = len(words & w)
+            # Records often describe the tree's name at more length ("Francis water
+            # turbine"), so how much of the node's name is covered counts too
+            word = (shared / (len(words) + len(w) - shared) + shared / len(w)) / 2
+            best = max(best, (word + jaccard(grams, g)) / 2)
+        return best
+
+    def prior(self, code: int, year: Optional[int]) -> float:
+        if year is None or not self.graph.dated[code]:
+            return 1.0
+        return math.exp(-abs(year - self.graph.years[code]) / YEAR_SCALE)
+
+    def scored(self, name: str, year: Optional[int] = None) -> List[tuple]:
+        """[(score, code)] for every candidate, best first."""
+        words, grams = set(tokens(name)), ngrams(name)
+        results = []
+        for code in self.candidates(words):
+            similarity = self.similarity(code, words, grams)
+            results.append((similarity * (1 - YEAR_WEIGHT + YEAR_WEIGHT * self.prior(code, year)), code))
+        results.sort(key=lambda item: (-item[0], item[1]))
+        return results
+
+    def match(self, name: str, year: Optional[int] = None) -> Match:
+        results = self.scored(name, year)
+        if not results or results[0][0] < MIN_SCORE:
+            return Match(name, year, None, results[0][0] if results else 0.0)
+        score, code = results[0]
+        margin = score - results[1][0] if len(results) > 1 else score
+        confidence = next(level for level, lowest, min_margin in CONFIDENCE_LEVELS
+                          if score >= lowest and margin >= min_margin or level == 'low')
+        return Match(name, year, code, score, margin, confidence)
+
+    def match_records(self, records: List[Dict], name_key: str = 'name', year_key: str = 'year',
+                      overrides: Dict[str, Optional[str]] = None) -> List[Match]:
+        """Match every record. A record whose name is in overrides takes that tree title
+        instead (None meaning "no match"), with method 'override'. If the title is no
+        longer in the tree (the node was renamed or removed), the record is matched
+        automatically and the title kept in the match's stale_override."""
+        overrides = overrides or {}
+        title_index = self.graph.title_index
+        matches = []
+        for record in records:
+            name, year = record[name_key], record.get(year_key)
+            title = overrides.get(name)
+            if name in overrides and (title is None or title in title_index):
+                code = title_index[title] if title else None
+                matches.append(Match(name, year, code, 1.0 if code is not None else 0.0, 0.0,
+                                     'override' if code is not None else 'none', 'override'))
+            else:
+                match = self.match(name, year)
+                match.stale_override = title
+                matches.append(match)
+        return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Match external invention records to tech tree nodes.')
+    parser.add_argument('records', help='JSON array of records, e.g. as written by dataset_ingest.py --out')
+    parser.add_argument('--tree', default=TREE_PATH, help='techtree-data.json to match against')
+    parser.add_argument('--name-key', default='name', help='Record field holding the name (default: %(default)s)')
+    parser.add_argument('--year-key', default='year', help='Record field holding the year (default: %(default)s)')
+    parser.add_argument('--overrides', help='JSON object of record name -> tree title (or null for no match)')
+    parser.add_argument('--out', default='name_matches.csv', help='CSV of matches (default: %(default)s)')
+    args = parser.parse_args()
+
+    with open(args.records) as f:
+        records = json.load(f)
+    overrides = None
+    if args.overrides:
+        with open(args.overrides) as f:
+            overrides = json.load(f)
+
+    start = time.perf_counter()
+    matcher = NameMatcher.load(args.tree)
+    indexed = time.perf_counter()
+    matches = matcher.match_records(records, args.name_key, args.year_key, overrides)
+    done = time.perf_counter()
+    graph = matcher.graph
+
+    print(f"Indexed {len(graph)} nodes in {indexed - start:.2f}s")
+    print(f"Matched {len(records)} records in {done - indexed:.2f}s")
+    confidences = Counter(m.confidence for m in matches)
+    print('Confidence: ' + ', '.join(f"{level} {confidences[level]}"
+                                     for level in ('override', 'high', 'medium', 'low', 'none') if confidences[level]))
+    stale = [m for m in matches if m.stale_override]
+    if stale:
+        print(f"Overrides naming titles not in the tree ({len(stale)}), matched automatically instead:")
+        for m in stale:
+            print(f"  {m.name} -> {m.stale_override}")
+    unmatched = [m.name for m in matches if not m.matched]
+    if unmatched:
+        print(f"Unmatched ({len(unmatched)}):")
+        for name in unmatched:
+            print(f"  {name}")
+
+    with open(args.out, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Year', 'Title', 'Tree year', 'Id', 'Score', 'Margin', 'Confidence', 'Method'])
+        for m in matches:
+            node = m.code
+            writer.writerow([
+                m.name, '' if m.year is None else m.year,
+                graph.titles[node] if node is not None else '',
+                graph.years[node] if node is not None and graph.dated[node] else '',
+                graph.ids[node] if node is not None else '',
+                f"{m.score:.3f}", f"{m.margin:.3f}", m.confidence, m.method,
+            ])
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+On-disk page cache for wiki_scraper.py, keyed by title and revision id.
+
+Pages (plain text and links) and the relationships extracted from them are stored
+zlib-compressed in one SQLite file. A page is reused only while its cached revision is
+still the article's latest, which CachingBackend checks for 50 titles per request
+with prop=info, so a recrawl downloads content only for pages that changed. Only
+titles already in the cache are checked: the rest are fetched straight away, and the
+revision the API backend reports with each page is cached with it.
+Relationships are additionally keyed by an extractor name, so changing the extraction
+code does not serve stale results.
+"""
+import json
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional
+
+from wiki_fetch import API_URL, Backend, resolve_titles
+
+
+def pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+class PageCache:
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' title TEXT PRIMARY KEY, revid INTEGER NOT NULL, page BLOB NOT NULL)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS relationships ('
+            ' title TEXT NOT NULL, revid INTEGER NOT NULL, extractor TEXT NOT NULL,'
+            ' relationships BLOB NOT NULL, PRIMARY KEY (title, revid, extractor))'
+        )
+
+    def get_page(self, title: str, revid: int) -> Optional[Dict]:
+        with self.lock:
+            row = self.db.execute(
+                'SELECT page FROM pages WHERE title = ? AND revid = ?', (title, revid)
+            ).fetchone()
+        return unpack(row[0]) if row else None
+
+    def cached_titles(self, titles: List[str]) -> set:
+        """Those of titles with a page in the cache, at any revision."""
+        found = set()
+        with self.lock:
+            for start in range(0, len(titles), 500):
+                chunk = titles[start:start + 500]
+                found.update(row[0] for row in self.db.execute(
+                    f"SELECT title FROM pages WHERE title IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        return found
+
+    def put_page(self, page: Dict):
+        stored = {'title': page['title'], 'text': page['text'], 'links': page['links']}
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO pages (title, revid, page) VALUES (?, ?, ?)',
+                (page['title'], page['revid'], pack(stored))
+            )
+
+    def get_relationships(self, title: str, revid: int, extractor: str) -> Optional[List[tuple]]:
+        with self.lock:
+            row = self.db.execute(
+                'SELECT relationships FROM relationships WHERE title = ? AND revid = ? AND extractor = ?',
+                (title, revid, extractor)
+            ).fetchone()
+        return [tuple(r) for r in unpack(row[0])] if row else None
+
+    def put_relationships(self, title: str, revid: int, extractor: str, relationships: List[tuple]):
+        with self.lock:
+            # Older revisions of the page are never asked for again
+            self.db.execute('DELETE FROM relationships WHERE title = ? AND revid != ?', (title, revid))
+            self.db.execute(
+                'INSERT OR REPLACE INTO relationships (title, revid, extractor, relationships) VALUES (?, ?, ?, ?)',
+                (title, revid, extractor, pack(relationships))
+            )
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class CachingBackend(Backend):
+    """Serves pages from a PageCache when their revision is current, fetching the rest
+    through the wrapped backend and caching them."""
+
+    def __init__(self, inner: Backend, cache: PageCache, api_url: str = API_URL):
+        super().__init__(inner.rate_limiter, inner.pool, inner.metrics, inner.relationship_keywords)
+        self.inner = inner
+        self.cache = cache
+        self.api_url = api_url
+        self.batch_size = max(inner.batch_size, 50)
+        self.stats = {'cached': 0, 'fetched': 0}
+
+    def latest_revisions(self, titles: List[str]) -> Dict[str, tuple]:
+        """Map each requested title to (canonical title, latest revision id), 50 per request.
+        Redirects are followed, so aliases map to their target."""
+        revisions = {}
+        for start in range(0, len(titles), 50):
+            chunk = titles[start:start + 50]
+            data = self.get(self.api_url, params={
+                'action': 'query',
+                'format': 'json',
+                'formatversion': 2,
+                'prop': 'info',
+                'redirects': 1,
+                'titles': '|'.join(chunk),
+            }).json()
+            result = data.get('query', {})
+            latest = {page['title']: page['lastrevid'] for page in result.get('pages', []) if 'lastrevid' in page}
+            for title, resolved in resolve_titles(chunk, result).items():
+                if resolved in latest:
+                    revisions[title] = (resolved, latest[resolved])
+        return revisions
+
+    def fetch(self, titles) -> Iterator[Dict]:
+        if self.inner.revisions:
+            # Titles never cached are fetched without asking for their revision first
+            cached = self.cache.cached_titles(titles)
+            unchecked = [title for title in titles if title not in cached]
+            titles = [title for title in titles if title in cached]
+        else:
+            unchecked = []
+        revisions = self.latest_revisions(titles) if titles else {}
+        # Requested titles by the page they resolve to; missing pages are dropped
+        requested = {}
+        for title in titles:
+            if title in revisions:
+                requested.setdefault(revisions[title], []).append(title)
+
+        stale = []
+        for (canonical, revid), aliases in requested.items():
+            page = self.cache.get_page(canonical, revid)
+            if page is None:
+                stale.append((canonical, revid))
+                continue
+            self.stats['cached'] += 1
+            self.metrics.count('cache_hits')
+            yield dict(page, requested=aliases, revid=revid)
+
+        # Fetch stale pages under their resolved titles, then the uncached ones
+        for start in range(0, len(stale), self.inner.batch_size):
+            chunk = dict(stale[start:start + self.inner.batch_size])
+            for page in self.inner.fetch(list(chunk)):
+                page['revid'] = page.get('revid') or chunk.get(page['title'])
+                if page['title'] in chunk:
+                    page['requested'] = requested[(page['title'], chunk[page['title']])]
+                yield self._fetched(page)
+        for start in range(0, len(unchecked), self.inner.batch_size):
+            for page in self.inner.fetch(unchecked[start:start + self.inner.batch_size]):
+                yield self._fetched(page)
+
+    def _fetched(self, page: Dict) -> Dict:
+        if page.get('revid'):
+            self.cache.put_page(page)
+        self.stats['fetched'] += 1
+        self.metrics.count('cache_misses')
+        return page
@@ -0,0 +1,176 @@
+"""
+Predecessor gaps and dependency chains for every node of the tech tree.
+
+For each node, over the connections that are not of an excluded type:
+  - binding predecessor: the latest dated predecessor (ties broken by title, then
+    connection type, as in build_potter_mapping.py)
+  - gap: the node's year minus its binding predecessor's year
+  - chain: the number of connections on the longest dependency chain ending at the
+    node, and the critical predecessor, the predecessor that chain comes through
+
+Everything comes out of one pass over the nodes in topological order, reading each
+node's in-edges from TechGraph's CSR adjacency, so each connection is looked at
+once. Time paradoxes can make cycles; the pass goes over the strongly connected
+components instead, predecessors first, and connections between two nodes of the
+same cycle are left out of chains (they still count for binding predecessors), so
+nodes on and after a cycle get a chain like any other.
+
+Usage:
+  python src/scripts/predecessor_gaps.py [--tree techtree-data.json] [--out predecessor_gaps.csv]
+"""
+import argparse
+import csv
+import os
+import time
+from array import array
+
+from techgraph import TechGraph
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TREE_PATH = os.path.join(REPO, 'src', 'app', 'api', 'inventions', 'techtree-data.json')
+
+# Connections that say two nodes are parallel rather than one depending on the other
+EXCLUDE_TYPES = {'Independently invented', 'Concurrent development'}
+
+
+class PredecessorGaps:
+    """Per-node columns, indexed by node code; -1 where a node has no binding or
+    critical predecessor. gap is only meaningful where binding >= 0."""
+
+    def __init__(self, graph: TechGraph, exclude_types=EXCLUDE_TYPES):
+        self.graph = graph
+        n = len(graph)
+        self.binding = array('l', [-1]) * n
+        self.binding_edge = array('l', [-1]) * n
+        self.gap = array('q', [0]) * n
+        self.chain = array('l', [-1]) * n
+        self.critical = array('l', [-1]) * n
+
+        offsets, sources, edges = graph.in_adjacency
+        excluded = graph.type_code_set(exclude_types)
+        edge_type, type_names = graph.edge_type, graph.type_names
+        years, dated, titles = graph.years, graph.dated, graph.titles
+        binding, binding_edge, gap = self.binding, self.binding_edge, self.gap
+        chain, critical = self.chain, self.critical
+
+        # Components come successors first, so reversed they are in topological order
+        components = graph.components(exclude_types)
+        component = array('l', [0]) * n
+        for c, members in enumerate(components):
+            for code in members:
+                component[code] = c
+        # Nodes on a cycle, whose connections to each other are left out of chains
+        self.cyclic = sum(len(members) for members in components if len(members) > 1)
+        for code in (code for members in reversed(components) for code in members):
+            best_key = best_k = None
+            longest, via = 0, -1
+            for k in range(offsets[code], offsets[code + 1]):
+                e = edges[k]
+                if edge_type[e] in excluded:
+                    continue
+                source = sources[k]
+                if dated[source]:
+                    key = (years[source], titles[source], type_names[edge_type[e]])
+                    if best_key is None or key > best_key:
+                        best_key, best_k = key, k
+                if component[source] == component[code]:
+                    continue
+                length = chain[source] + 1
+                if length > longest or length == longest and via >= 0 and years[source] > years[via]:
+                    longest, via = length, source
+            if best_k is not None:
+                binding[code] = sources[best_k]
+                binding_edge[code] = edges[best_k]
+                if dated[code]:
+                    gap[code] = years[code] - best_key[0]
+            chain[code] = longest
+            critical[code] = via
+
+    def has_gap(self, code: int) -> bool:
+        return self.binding[code] >= 0 and bool(self.graph.dated[code])
+
+    def gaps(self):
+        return [self.gap[c] for c in range(len(self.graph)) if self.has_gap(c)]
+
+    def longest_chain(self):
+        """Codes along the longest dependency chain, first to last."""
+        if not len(self.graph):
+            return []
+        code = max(range(len(self.graph)), key=lambda c: self.chain[c])
+        path = []
+        while code >= 0:
+            path.append(code)
+            code = self.critical[code]
+        return path[::-1]
+
+    def rows(self):
+        graph = self.graph
+        for code, title in enumerate(graph.titles):
+            if not title:
+                continue
+            b, e, c = self.binding[code], self.binding_edge[code], self.critical[code]
+            yield {
+                'id': graph.ids[code],
+                'title': title,
+                'year': graph.years[code] if graph.dated[code] else '',
+                'binding_predecessor': graph.titles[b] if b >= 0 else '',
+                'binding_year': graph.years[b] if b >= 0 else '',
+                'binding_type': graph.type_names[graph.edge_type[e]] if e >= 0 else '',
+                'gap': self.gap[code] if self.has_gap(code) else '',
+                'chain_length': self.chain[code] if self.chain[code] >= 0 else '',
+                'critical_predecessor': graph.titles[c] if c >= 0 else '',
+            }
+
+
+def percentile(ordered, p):
+    # Nearest rank on an already sorted list
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(analysis: PredecessorGaps):
+    gaps = sorted(analysis.gaps())
+    print(f"Nodes with a binding predecessor: {len(gaps)}")
+    if gaps:
+        print(f"  gap mean {sum(gaps) / len(gaps):.1f} years, "
+              + ', '.join(f"p{p} {percentile(gaps, p)}" for p in (10, 25, 50, 75, 90, 99))
+              + f", max {gaps[-1]}")
+        print(f"  negative gaps (node before its predecessor): {sum(1 for g in gaps if g < 0)}")
+        print(f"  zero gaps: {sum(1 for g in gaps if g == 0)}")
+    chains = sorted(length for length in analysis.chain if length >= 0)
+    if chains:
+        print(f"Chain length median {percentile(chains, 50)}, p90 {percentile(chains, 90)}, max {chains[-1]}")
+    if analysis.cyclic:
+        print(f"Nodes on a cycle (connections within it left out of chains): {analysis.cyclic}")
+    path = analysis.longest_chain()
+    if len(path) > 1:
+        graph = analysis.graph
+        print("Longest chain:")
+        for code in path:
+            print(f"  {graph.years[code] if graph.dated[code] else '?':>8}  {graph.titles[code] or graph.ids[code]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Predecessor gaps and longest dependency chains for the whole tree.')
+    parser.add_argument('--tree', default=TREE_PATH, help='techtree-data.json to analyze')
+    parser.add_argument('--out', default='predecessor_gaps.csv', help='CSV with one row per node (default: %(default)s)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = TechGraph.load(args.tree)
+    loaded = time.perf_counter()
+    analysis = PredecessorGaps(graph)
+    done = time.perf_counter()
+    print(f"Loaded {len(graph)} nodes and {graph.edge_count} connections in {loaded - start:.2f}s")
+    print(f"Analyzed in {done - loaded:.3f}s")
+    summarize(analysis)
+
+    rows = list(analysis.rows())
+    with open(args.out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Precomputed ancestors and descendants of every tech tree node, as packed bitsets.
+
+Node i's ancestors are the nodes it ultimately depends on (everything reachable
+backwards along connections), its descendants what it ultimately enabled. Both are
+stored as one row of bits per node, bit j set if node j is in the set, alongside
+the size of every set, in a single file that is memory-mapped when read:
+
+  MAGIC (8 bytes) | header length (u32) | header JSON (padded to 8 bytes)
+  | ancestor rows | descendant rows | ancestor counts (u32) | descendant counts (u32)
+
+The header holds the node count, the row size in bytes, the connection types that
+were left out and every node's record id, in code order. Rows are little-endian
+bit order, row_bytes each. Counts and "does a depend on b" are O(1) reads; listing a
+set reads one row.
+
+Sets are Python integers used as bitsets, built in one pass over the strongly
+connected components in topological order: a node's ancestors are the union of its
+predecessors' ancestors and the predecessors themselves, and descendants the same
+way in reverse. All nodes of a component (a cycle, usually from a dating mistake)
+share their sets, which include the component itself.
+
+Usage:
+  python src/scripts/reachability.py build [--tree techtree-data.json] [--out reachability.bin]
+  python src/scripts/reachability.py query "Steam engine" [--index reachability.bin]
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Iterable, List
+
+from predecessor_gaps import EXCLUDE_TYPES
+from techgraph import TechGraph
+
+MAGIC = b'TTREACH1'
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TREE_PATH = os.path.join(REPO, 'src', 'app', 'api', 'inventions', 'techtree-data.json')
+INDEX_PATH = os.path.join(REPO, 'src', 'app', 'api', 'inventions', 'reachability.bin')
+
+
+def _component_sets(graph: TechGraph, adjacency, order, components, component_of, members, excluded) -> List[int]:
+    # order visits components so that every neighbour's component is done first
+    offsets, neighbours, edges = adjacency
+    edge_type = graph.edge_type
+    reached = [0] * len(components)
+    for c in order:
+        bits = 0
+        cyclic = len(components[c]) > 1
+        for code in components[c]:
+            for k in range(offsets[code], offsets[code + 1]):
+                if edge_type[edges[k]] in excluded:
+                    continue
+                d = component_of[neighbours[k]]
+                if d != c:
+                    bits |= reached[d] | members[d]
+                else:
+                    cyclic = True
+        # Nodes on a cycle reach each other, and themselves
+        reached[c] = bits | members[c] if cyclic else bits
+    return reached
+
+
+def closure(graph: TechGraph, exclude_types=EXCLUDE_TYPES):
+    """(ancestors, descendants): one integer bitset per node code."""
+    excluded = graph.type_code_set(exclude_types)
+    components = graph.components(exclude_types)
+    component_of = array('l', [0]) * len(graph)
+    members = []
+    for c, component in enumerate(components):
+        bits = 0
+        for code in component:
+            component_of[code] = c
+            bits |= 1 << code
+        members.append(bits)
+    # Components come successors first, so descendants are built in that order and
+    # ancestors in the reverse one
+    order = range(len(components))
+    descendants = _component_sets(graph, graph.out_adjacency, order, components, component_of, members, excluded)
+    ancestors = _component_sets(graph, graph.in_adjacency, reversed(order), components, component_of, members,
+                                excluded)
+    return ([ancestors[component_of[code]] for code in range(len(graph))],
+            [descendants[component_of[code]] for code in range(len(graph))])
+
+
+def write_index(graph: TechGraph, path: str, exclude_types=EXCLUDE_TYPES):
+    ancestors, descendants = closure(graph, exclude_types)
+    n = len(graph)
+    row_bytes = (n + 63) // 64 * 8
+    header = json.dumps({
+        'nodes': n, 'row_bytes': row_bytes, 'exclude_types': sorted(exclude_types), 'ids': graph.ids,
+    }).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        for rows in (ancestors, descendants):
+            for bits in rows:
+                f.write(bits.to_bytes(row_bytes, 'little'))
+        for rows in (ancestors, descendants):
+            f.write(array('I', (bin(bits).count('1') for bits in rows)).tobytes())
+    os.replace(tmp, path)
+
+
+class ReachabilityIndex:
+    """Read-only view of a file written by write_index, memory-mapped."""
+
+    def __init__(self, path: str = INDEX_PATH):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a reachability index")
+        (length,) = struct.unpack_from('<I', self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self.map[start:start + length])
+        self.nodes = header['nodes']
+        self.row_bytes = header['row_bytes']
+        self.exclude_types = header['exclude_types']
+        self.ids = header['ids']
+        self.index = {record_id: code for code, record_id in enumerate(self.ids)}
+        self.ancestor_offset = start + length
+        self.descendant_offset = self.ancestor_offset + self.nodes * self.row_bytes
+        counts = memoryview(self.map)[self.descendant_offset + self.nodes * self.row_bytes:]
+        self.ancestor_counts = counts[:4 * self.nodes].cast('I')
+        self.descendant_counts = counts[4 * self.nodes:8 * self.nodes].cast('I')
+
+    def code(self, record_id: str) -> int:
+        return self.index[record_id]
+
+    def _bit(self, offset: int, row: int, bit: int) -> bool:
+        return bool(self.map[offset + row * self.row_bytes + (bit >> 3)] >> (bit & 7) & 1)
+
+    def _members(self, offset: int, row: int) -> List[int]:
+        start = offset + row * self.row_bytes
+        bits = int.from_bytes(self.map[start:start + self.row_bytes], 'little')
+        members = []
+        while bits:
+            low = bits & -bits
+            members.append(low.bit_length() - 1)
+            bits ^= low
+        return members
+
+    def depends_on(self, code: int, other: int) -> bool:
+        """Whether other is among code's ancestors."""
+        return self._bit(self.ancestor_offset, code, other)
+
+    def enabled(self, code: int, other: int) -> bool:
+        """Whether other is among code's descendants."""
+        return self._bit(self.descendant_offset, code, other)
+
+    def ancestors(self, code: int) -> List[int]:
+        return self._members(self.ancestor_offset, code)
+
+    def descendants(self, code: int) -> List[int]:
+        return self._members(self.descendant_offset, code)
+
+    def ancestor_count(self, code: int) -> int:
+        return self.ancestor_counts[code]
+
+    def descendant_count(self, code: int) -> int:
+        return self.descendant_counts[code]
+
+    def close(self):
+        self.ancestor_counts.release()
+        self.descendant_counts.release()
+        self.map.close()
+
+
+def _titles(graph: TechGraph, index: ReachabilityIndex, codes: Iterable[int]) -> List[str]:
+    # Index codes are those of the tree the index was built from, so go through the
+    # record ids; a node deleted since then is shown by its id
+    titles = []
+    for c in codes:
+        record_id = index.ids[c]
+        code = graph.index.get(record_id)
+        titles.append(graph.titles[code] or record_id if code is not None else record_id)
+    return sorted(titles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the ancestor/descendant index of the tech tree.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Compute the closure and write the index')
+    build.add_argument('--tree', default=TREE_PATH, help='techtree-data.json to index')
+    build.add_argument('--out', default=INDEX_PATH, help='Index file to write (default: next to the tree data)')
+    build.add_argument('--exclude-type', action='append', metavar='TYPE',
+                       help='Connection type to leave out; repeatable (default: %s)' % ', '.join(sorted(EXCLUDE_TYPES)))
+    build.add_argument('--all-types', action='store_true', help='Follow connections of every type')
+    query = sub.add_parser('query', help='List what a node depends on and what it enabled')
+    query.add_argument('title', help='Node title')
+    query.add_argument('--tree', default=TREE_PATH, help='techtree-data.json the index was built from')
+    query.add_argument('--index', default=INDEX_PATH, help='Index file to read')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = TechGraph.load(args.tree)
+    loaded = time.perf_counter()
+    if args.command == 'build':
+        exclude_types = set() if args.all_types else set(args.exclude_type or EXCLUDE_TYPES)
+        write_index(graph, args.out, exclude_types)
+        done = time.perf_counter()
+        print(f"Loaded {len(graph)} nodes in {loaded - start:.2f}s, built the index in {done - loaded:.2f}s")
+        print(f"Wrote {args.out} ({os.path.getsize(args.out) / 2 ** 20:.1f} MiB)")
+        return
+
+    index = ReachabilityIndex(args.index)
+    code = graph.title_index.get(args.title)
+    if code is None:
+        parser.error(f"No node titled {args.title!r}")
+    code = index.index.get(graph.ids[code])
+    if code is None:
+        index.close()
+        parser.error(f"{args.title!r} is not in the index, rebuild it (reachability.py build)")
+    print(f"{args.title} depends on {index.ancestor_count(code)} nodes:")
+    for title in _titles(graph, index, index.ancestors(code)):
+        print(f"  {title}")
+    print(f"{args.title} enabled {index.descendant_count(code)} nodes:")
+    for title in _titles(graph, index, index.descendants(code)):
+        print(f"  {title}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Single-pass relationship extraction for wiki_scraper.py.
+
+All relationship keywords are compiled into one alternation, so a page is lowercased
+once and scanned once, whatever the number of keywords. Around each keyword hit the
+phrases on either side are read from bounded windows that stop at the neighbouring
+keyword hits, cut at the nearest clause or sentence boundary (any character other
+than a letter, digit or space), at coordinating conjunctions and at MAX_PHRASE_WORDS
+words, so "the engine was inspired by the pump and uses pistons" gives (engine, pump)
+and not (engine, "pump and uses pistons"). Nothing is matched with unbounded repetition, so the cost per
+page is linear in its length.
+"""
+import re
+from typing import Dict, List, Tuple
+
+# Relationship type -> the phrases that signal it, as used by wiki_scraper.py and wiki_dump.py
+RELATIONSHIP_KEYWORDS = {
+    'inspired': ['inspired by', 'based on', 'influenced by', 'derived from'],
+    'prerequisite': ['required', 'necessary', 'needed', 'dependent on', 'relies on'],
+    'component': ['consists of', 'contains', 'uses', 'incorporates', 'integrated'],
+    'improvement': ['improved', 'enhanced', 'advanced', 'developed from', 'evolution of']
+}
+
+# Longest phrase kept on either side of a keyword
+MAX_PHRASE_WORDS = 6
+# Characters read on either side of a keyword to find that phrase
+WINDOW = 120
+
+BOUNDARY = re.compile(r'[^\w\s]')
+# Dropped from the end of the left phrase ("the engine was inspired by") and the
+# start of the right one ("inspired by the windmill"); articles from both
+TRAILING_WORDS = {'was', 'were', 'is', 'are', 'be', 'been', 'being', 'has', 'have', 'had', 'also', 'which', 'that'}
+ARTICLES = {'a', 'an', 'the'}
+CONJUNCTIONS = {'and', 'or', 'but', 'nor'}
+LEADING_WORDS = ARTICLES | {'by', 'on', 'of', 'from', 'its', 'their'}
+
+
+class RelationshipExtractor:
+    def __init__(self, relationship_keywords: Dict[str, List[str]]):
+        self.keyword_types = {}
+        for rel_type, keywords in relationship_keywords.items():
+            for keyword in keywords:
+                self.keyword_types.setdefault(keyword.lower(), rel_type)
+        # Longest first, so "developed from" wins over a shorter keyword at the same spot
+        alternation = '|'.join(
+            re.escape(k).replace(r'\ ', r'\s+')
+            for k in sorted(self.keyword_types, key=len, reverse=True)
+        )
+        self.pattern = re.compile(rf'(?<=\s)(?:{alternation})(?=\s)')
+
+    def keyword_type(self, matched: str) -> str:
+        return self.keyword_types[' '.join(matched.split())]
+
+    @staticmethod
+    def left_phrase(window: str) -> str:
+        words = BOUNDARY.split(window)[-1].split()
+        for i in range(len(words) - 1, -1, -1):
+            if words[i] in CONJUNCTIONS:
+                words = words[i + 1:]
+                break
+        words = words[-MAX_PHRASE_WORDS:]
+        while words and words[-1] in TRAILING_WORDS:
+            words.pop()
+        while words and words[0] in ARTICLES:
+            words.pop(0)
+        return ' '.join(words)
+
+    @staticmethod
+    def right_phrase(window: str) -> str:
+        words = BOUNDARY.split(window, 1)[0].split()
+        for i, word in enumerate(words):
+            if word in CONJUNCTIONS:
+                words = words[:i]
+                break
+        words = words[:MAX_PHRASE_WORDS]
+        while words and words[0] in LEADING_WORDS:
+            words.pop(0)
+        return ' '.join(words)
+
+    def extract(self, text: str) -> List[Tuple[str, str, str]]:
+        """Return (phrase before, phrase after, relationship type) for every keyword hit."""
+        text = text.lower()
+        relationships = []
+        matches = list(self.pattern.finditer(text))
+        for i, match in enumerate(matches):
+            start, end = match.span()
+            # A phrase never reaches into the next or previous keyword
+            left_stop = matches[i - 1].end() if i else 0
+            right_stop = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            tech1 = self.left_phrase(text[max(left_stop, start - WINDOW):start])
+            tech2 = self.right_phrase(text[end:min(right_stop, end + WINDOW)])
+            if tech1 and tech2:
+                relationships.append((tech1, tech2, self.keyword_type(match.group())))
+        return relationships
+
+
+# One extractor per keyword set per process, so pool workers compile the pattern once
+_extractors = {}
+
+
+def extract_relationships(relationship_keywords: Dict[str, List[str]], text: str) -> List[Tuple[str, str, str]]:
+    """RelationshipExtractor(relationship_keywords).extract(text), picklable for a process pool."""
+    key = tuple((rel_type, tuple(keywords)) for rel_type, keywords in relationship_keywords.items())
+    extractor = _extractors.get(key)
+    if extractor is None:
+        extractor = _extractors[key] = RelationshipExtractor(relationship_keywords)
+    return extractor.extract(text)
@@ -0,0 +1,156 @@
+"""
+Split techtree-data.json into year-range shards the viewer can load on demand.
+
+Each shard holds the full records of the nodes dated within its year range and every
+link incident to one of them, so a link between two shards appears in both. Shard
+files are named after a hash of their contents and never change once written: the
+front end can cache them indefinitely and a rebuild only replaces the shards whose
+contents changed.
+
+Next to the shards, index.json lists each shard's year range, file, content hash and
+sizes, plus a compact table of every node (parallel id, year and shard columns), so
+the viewer can lay out the whole timeline and fetch only the shards of the visible
+window.
+
+Default boundaries follow the viewer's timeline periods, with the industrial era (where
+most nodes are) split every 50 years.
+
+Usage:
+  python src/scripts/shard_techtree.py [--tree techtree-data.json] [--out public/techtree-shards]
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TREE_PATH = os.path.join(REPO, 'src', 'app', 'api', 'inventions', 'techtree-data.json')
+OUT_DIR = os.path.join(REPO, 'public', 'techtree-shards')
+INDEX_NAME = 'index.json'
+# Bump when the shard or index layout changes
+FORMAT_VERSION = 1
+
+# First year of every shard but the first (see the timeline periods in TechTreeViewer.tsx)
+BOUNDARIES = [
+    -100000, -50000, -10000, -5000, -1000, -400, 500, 1000, 1500,
+    1750, 1800, 1850, 1900, 1950, 2000,
+]
+
+
+def serialize(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def content_hash(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def shard_ranges(boundaries: List[int]):
+    """(start, end) of each shard, end exclusive, None for unbounded."""
+    edges = [None] + sorted(boundaries) + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def build_shards(data: Dict, boundaries: List[int] = BOUNDARIES):
+    """Return (shards, index): shard payloads by file name, and the index document."""
+    boundaries = sorted(boundaries)
+    ranges = shard_ranges(boundaries)
+    nodes = data['nodes']
+    shard_of = [bisect.bisect_right(boundaries, node['year']) for node in nodes]
+    shard_by_id = {node['id']: s for node, s in zip(nodes, shard_of)}
+
+    members = [[] for _ in ranges]
+    for node, s in zip(nodes, shard_of):
+        members[s].append(node)
+    incident = [[] for _ in ranges]
+    for link in data['links']:
+        shards = {shard_by_id.get(link['source']), shard_by_id.get(link['target'])} - {None}
+        for s in sorted(shards):
+            incident[s].append(link)
+
+    shards = {}
+    entries = []
+    for s, (start, end) in enumerate(ranges):
+        if not members[s]:
+            continue
+        payload = serialize({'start': start, 'end': end, 'nodes': members[s], 'links': incident[s]})
+        digest = content_hash(payload)
+        name = f"shard-{s:02d}-{digest[:16]}.json"
+        shards[name] = payload
+        entries.append({
+            'start': start, 'end': end, 'file': name, 'hash': digest,
+            'nodes': len(members[s]), 'links': len(incident[s]), 'bytes': len(payload),
+        })
+
+    # Shard columns refer to positions in the shard list
+    position = {s: i for i, s in enumerate(s for s in range(len(ranges)) if members[s])}
+    index = {
+        'version': FORMAT_VERSION,
+        'shards': entries,
+        'nodes': {
+            'id': [node['id'] for node in nodes],
+            'year': [node['year'] for node in nodes],
+            'shard': [position[s] for s in shard_of],
+        },
+    }
+    return shards, index
+
+
+def write_shards(shards: Dict[str, bytes], index: Dict, out_dir: str) -> Dict[str, int]:
+    """Write new shards, then the index, then remove shards the index no longer
+    lists, so the index never points at a missing file. Returns counts."""
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {'written': 0, 'unchanged': 0, 'removed': 0}
+    for name, payload in shards.items():
+        path = os.path.join(out_dir, name)
+        # Content-addressed: an existing file of this name already has this content
+        if os.path.exists(path):
+            counts['unchanged'] += 1
+            continue
+        with open(path + '.tmp', 'wb') as f:
+            f.write(payload)
+        os.replace(path + '.tmp', path)
+        counts['written'] += 1
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    with open(index_path + '.tmp', 'wb') as f:
+        f.write(serialize(index))
+    os.replace(index_path + '.tmp', index_path)
+    for name in os.listdir(out_dir):
+        if name.startswith('shard-') and name.endswith('.json') and name not in shards:
+            os.remove(os.path.join(out_dir, name))
+            counts['removed'] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split techtree-data.json into year-range shards and an index.')
+    parser.add_argument('--tree', default=TREE_PATH, help='techtree-data.json to split')
+    parser.add_argument('--out', default=OUT_DIR, help='Directory for the shards and index.json (default: public/techtree-shards)')
+    parser.add_argument('--boundaries', type=lambda s: [int(y) for y in s.split(',')], default=BOUNDARIES,
+                        metavar='YEAR,YEAR,...', help='First year of every shard but the first')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.tree, encoding='utf-8') as f:
+        data = json.load(f)
+    shards, index = build_shards(data, args.boundaries)
+    counts = write_shards(shards, index, args.out)
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(payload) for payload in shards.values())
+    print(f"{len(data['nodes'])} nodes and {len(data['links'])} links in {len(shards)} shards "
+          f"({total / 2 ** 20:.1f} MiB) in {elapsed:.2f}s")
+    for entry in index['shards']:
+        span = f"{entry['start'] if entry['start'] is not None else '...'} to " \
+               f"{entry['end'] if entry['end'] is not None else '...'}"
+        print(f"  {span:>22}: {entry['nodes']:6} nodes {entry['links']:6} links {entry['bytes'] / 1024:8.0f} KiB")
+    index_size = os.path.getsize(os.path.join(args.out, INDEX_NAME))
+    print(f"Index: {index_size / 1024:.0f} KiB. Shards written {counts['written']}, "
+          f"unchanged {counts['unchanged']}, removed {counts['removed']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+SQLite-backed frontier and edge store shared by cooperating wiki_scraper.py processes.
+
+Each title has one row in frontier, in one of four states. Workers claim batches of
+queued titles, shallowest first, which leases them for lease_seconds. Finishing a
+page records its edges, marks it (and the titles it was requested under) done and
+queues its links, all in one transaction. A lease that runs out, because its worker
+crashed or hung, puts the title back in the queue on the next claim; a title claimed
+MAX_ATTEMPTS times without finishing is marked failed instead. A worker can only
+finish titles it holds or nobody holds: once its lease has run out and another worker
+has claimed the title, its result is dropped.
+
+A link is queued once. If it is found again at a shallower depth while still
+queued, its depth is lowered, so titles are still crawled from roughly their
+shortest distance to a seed, although several depths may be in flight at once. A
+title already done at a deeper depth is queued again at the shallower one: its links
+were queued too deep, or not at all if it was at max_depth, and would otherwise be
+missing from the crawl (this happens when a worker dies holding a seed and other
+seeds reach its neighbourhood first). Likewise a title finished while leased is
+expanded from the shallowest depth it was found at meanwhile.
+
+Every write is a short BEGIN IMMEDIATE transaction in WAL mode, so any number of
+processes on one machine can share the file. The database is also the crawl's
+checkpoint: starting workers on it again carries on where the last ones stopped.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+QUEUED, LEASED, DONE, FAILED = 0, 1, 2, 3
+STATES = {QUEUED: 'queued', LEASED: 'leased', DONE: 'done', FAILED: 'failed'}
+MAX_ATTEMPTS = 3
+
+
+class SharedFrontier:
+    def __init__(self, path: str, lease_seconds: float = 300.0):
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS frontier ('
+            ' title TEXT PRIMARY KEY, depth INTEGER NOT NULL, state INTEGER NOT NULL DEFAULT 0,'
+            ' owner TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (state, depth)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, title TEXT NOT NULL)')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS edges ('
+            ' page TEXT NOT NULL, tech1 TEXT NOT NULL, tech2 TEXT NOT NULL, relationship TEXT NOT NULL,'
+            ' PRIMARY KEY (page, tech1, tech2, relationship))'
+        )
+        self.db.execute('CREATE TABLE IF NOT EXISTS crawl (key TEXT PRIMARY KEY, value)')
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+            self.db.execute('COMMIT')
+
+    def start(self, seeds: List[str], max_depth: int):
+        """Queue the seeds, unless this database already holds a crawl."""
+        with self.transaction() as db:
+            db.execute("INSERT OR IGNORE INTO crawl (key, value) VALUES ('max_depth', ?)", (max_depth,))
+            db.executemany('INSERT OR IGNORE INTO frontier (title, depth) VALUES (?, 0)', [(s,) for s in seeds])
+
+    @property
+    def max_depth(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT value FROM crawl WHERE key = 'max_depth'").fetchone()[0]
+
+    def claim(self, owner: str, n: int) -> List[Tuple[str, int]]:
+        """Lease up to n queued (title, depth) pairs to owner, shallowest first, after
+        returning expired leases to the queue."""
+        now = time.time()
+        with self.transaction() as db:
+            db.execute(
+                'UPDATE frontier SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = NULL'
+                ' WHERE state = ? AND lease_expires < ?', (MAX_ATTEMPTS, FAILED, QUEUED, LEASED, now)
+            )
+            rows = db.execute(
+                'SELECT title, depth FROM frontier WHERE state = ? ORDER BY depth LIMIT ?', (QUEUED, n)
+            ).fetchall()
+            db.executemany(
+                'UPDATE frontier SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE title = ?',
+                [(LEASED, owner, now + self.lease_seconds, title) for title, _ in rows]
+            )
+        return rows
+
+    def adopt(self, owner: str, title: str, depth: int) -> bool:
+        """Lease title to owner if nobody else has it or has finished it. Used when a
+        claimed alias resolves to a title that may be queued on its own."""
+        with self.transaction() as db:
+            row = db.execute('SELECT state, owner FROM frontier WHERE title = ?', (title,)).fetchone()
+            if row is None:
+                db.execute(
+                    'INSERT INTO frontier (title, depth, state, owner, lease_expires, attempts) VALUES (?, ?, ?, ?, ?, 1)',
+                    (title, depth, LEASED, owner, time.time() + self.lease_seconds)
+                )
+                return True
+            state, current = row
+            if state == QUEUED:
+                db.execute(
+                    'UPDATE frontier SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE title = ?',
+                    (LEASED, owner, time.time() + self.lease_seconds, title)
+                )
+                return True
+            return state == LEASED and current == owner
+
+    def _finish(self, db, owner: str, titles: List[str], aliases: Dict[str, str]):
+        db.executemany('INSERT OR REPLACE INTO aliases (alias, title) VALUES (?, ?)', aliases.items())
+        db.executemany(
+            'UPDATE frontier SET state = ?, owner = NULL WHERE title = ? AND (owner = ? OR state != ?)',
+            [(DONE, t, owner, LEASED) for t in titles]
+        )
+
+    def finish(self, owner: str, titles: List[str], aliases: Dict[str, str] = None):
+        """Mark titles done without edges (missing pages, or aliases of a page
+        analyzed elsewhere), except those another worker has leased since."""
+        with self.transaction() as db:
+            self._finish(db, owner, titles, aliases or {})
+
+    def complete(self, owner: str, page: Dict, depth: int, relationships: List[tuple], links: List[str]) -> bool:
+        """Record one analyzed page: its edges, its titles done and, unless it is at
+        max_depth, its links queued at depth + 1. Returns False, recording nothing,
+        if another worker has leased the page since owner's lease ran out."""
+        title = page['title']
+        aliases = {alias: title for alias in page['requested'] if alias != title}
+        max_depth = self.max_depth
+        with self.transaction() as db:
+            row = db.execute('SELECT state, owner FROM frontier WHERE title = ?', (title,)).fetchone()
+            if row is not None and row[0] == LEASED and row[1] != owner:
+                return False
+            # Found at a shallower depth since it was claimed
+            placeholders = ', '.join('?' * len(page['requested']))
+            shallowest = db.execute(
+                f'SELECT MIN(depth) FROM frontier WHERE title IN (?, {placeholders})', [title] + page['requested']
+            ).fetchone()[0]
+            if shallowest is not None:
+                depth = min(depth, shallowest)
+            db.executemany(
+                'INSERT OR IGNORE INTO edges (page, tech1, tech2, relationship) VALUES (?, ?, ?, ?)',
+                [(title,) + tuple(r) for r in relationships]
+            )
+            self._finish(db, owner, [title] + page['requested'], aliases)
+            db.execute('UPDATE frontier SET depth = ? WHERE title = ?', (depth, title))
+            if depth < max_depth:
+                db.executemany(
+                    'INSERT INTO frontier (title, depth)'
+                    ' VALUES (COALESCE((SELECT title FROM aliases WHERE alias = ?1), ?1), ?2)'
+                    ' ON CONFLICT (title) DO UPDATE SET depth = excluded.depth,'
+                    ' state = CASE WHEN frontier.state = ?4 THEN ?3 ELSE frontier.state END,'
+                    ' attempts = CASE WHEN frontier.state = ?4 THEN 0 ELSE frontier.attempts END'
+                    ' WHERE excluded.depth < frontier.depth AND frontier.state != ?5',
+                    [(link, depth + 1, QUEUED, DONE, FAILED) for link in links]
+                )
+        return True
+
+    def release(self, owner: str, titles: List[str]):
+        """Give up owner's leases on titles after an error: back to the queue, or
+        failed once out of attempts."""
+        with self.transaction() as db:
+            db.executemany(
+                'UPDATE frontier SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = NULL'
+                ' WHERE title = ? AND owner = ? AND state = ?',
+                [(MAX_ATTEMPTS, FAILED, QUEUED, title, owner, LEASED) for title in titles]
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.db.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall()
+        counts = {name: 0 for name in STATES.values()}
+        counts.update({STATES[state]: n for state, n in rows})
+        return counts
+
+    def outstanding(self) -> int:
+        """Titles queued or leased, i.e. work that may still add to the crawl."""
+        with self.lock:
+            return self.db.execute(
+                'SELECT COUNT(*) FROM frontier WHERE state IN (?, ?)', (QUEUED, LEASED)
+            ).fetchone()[0]
+
+    def edges(self) -> Iterator[Tuple[str, str, str]]:
+        with self.lock:
+            rows = self.db.execute('SELECT tech1, tech2, relationship FROM edges ORDER BY rowid').fetchall()
+        return iter(rows)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
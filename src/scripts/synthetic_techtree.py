@@ -0,0 +1,240 @@
+"""
+Generate synthetic tech-tree datasets for exercising the analysis scripts at scale.
+
+The generator builds one random tree and renders it in either of the two shapes the
+scripts consume:
+  - Airtable records, as returned by pyairtable's table.all() for the Innovations and
+    Connections tables (what data_validation.py reads)
+  - techtree-data.json, as written by fetch-and-save-inventions.ts (what the
+    analysis scripts read)
+
+Years follow the tree's real skew (a thin prehistoric tail, most nodes after 1750),
+predecessors are picked by preferential attachment so a few hubs collect most of the
+out-edges, and the known data problems are injected at configurable rates: time
+paradoxes, duplicate connections, near-duplicate innovations, orphans, undated
+records and missing endpoints.
+
+Usage:
+  python src/scripts/synthetic_techtree.py 25000 --out /tmp/synthetic-techtree.json
+  python src/scripts/synthetic_techtree.py 25000 --airtable --out /tmp/synthetic-airtable.json
+"""
+import argparse
+import json
+import random
+import string
+
+# (weight, first year, last year). Roughly the shape of the real tree: a few
+# prehistoric nodes spread over millions of years, most of it industrial or later.
+ERAS = [
+    (0.03, -3300000, -10000),
+    (0.07, -10000, 500),
+    (0.08, 500, 1500),
+    (0.12, 1500, 1750),
+    (0.30, 1750, 1900),
+    (0.40, 1900, 2025),
+]
+
+LINK_TYPES = [
+    ('Prerequisite', 0.55),
+    ('Improvement', 0.15),
+    ('Component', 0.1),
+    ('Inspiration', 0.07),
+    ('Link plausible but unclear', 0.04),
+    ('Speculative', 0.03),
+    ('Independently invented', 0.03),
+    ('Concurrent development', 0.02),
+    ('Obsolescence', 0.01),
+]
+
+PREFIXES = [
+    'Steam', 'Electric', 'Hydraulic', 'Rotary', 'Compound', 'Portable', 'Mechanical',
+    'Optical', 'Magnetic', 'Chemical', 'Pneumatic', 'Thermal', 'Digital', 'Reinforced',
+    'Synthetic', 'Automatic', 'Wireless', 'Solar', 'Nuclear', 'Vacuum', 'Iron', 'Glass',
+]
+BASES = [
+    'engine', 'loom', 'press', 'lamp', 'pump', 'kiln', 'telegraph', 'turbine', 'lathe',
+    'furnace', 'battery', 'microscope', 'clock', 'plough', 'mill', 'valve', 'rifle',
+    'bridge', 'boat', 'camera', 'motor', 'cement', 'dye', 'fiber', 'tube', 'saw', 'wheel',
+]
+SUFFIXES = ['', '', '', ' process', ' system', ' method', ' machine']
+
+ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def record_id(rng):
+    return 'rec' + ''.join(rng.choice(ID_ALPHABET) for _ in range(14))
+
+
+def sample_year(rng):
+    weights = [w for w, _, _ in ERAS]
+    _, lo, hi = rng.choices(ERAS, weights)[0]
+    # Skew towards the end of each era, like the real data
+    return int(hi - (hi - lo) * rng.random() ** 2)
+
+
+def sample_title(rng, n):
+    base = f"{rng.choice(PREFIXES)} {rng.choice(BASES)}{rng.choice(SUFFIXES)}"
+    # Titles in the real tree are unique, so disambiguate the combinatorial ones with
+    # a random word rather than a counter, which would make neighbours look alike
+    if n < len(PREFIXES) * len(BASES):
+        return base
+    return f"{base} {''.join(rng.choice(string.ascii_lowercase) for _ in range(6))}"
+
+
+def misspell(rng, title):
+    """A variant spelling of title, like "Carbon fibers" or "Tunnelling shield"."""
+    variant = rng.randrange(3)
+    if variant == 0:
+        return title + 's'
+    i = rng.randrange(1, len(title))
+    if variant == 1:
+        return title[:i] + title[i - 1] + title[i:]
+    return title[:i - 1] + title[i:]
+
+
+def generate(n_nodes, seed=0, mean_in_degree=1.6, paradox_rate=0.01,
+             duplicate_rate=0.005, orphan_rate=0.02, undated_rate=0.03,
+             missing_endpoint_rate=0.002, no_image_rate=0.05, near_duplicate_rate=0.002,
+             extra_titles=()):
+    """Build a synthetic tree as {'nodes': [...], 'links': [...]}.
+
+    Nodes carry id, title, subtitle, year (None when undated) and image. Links carry
+    an ID, source, target (None for a missing endpoint) and type, and may be
+    duplicates or point backwards in time. Near-duplicate nodes are respellings of an
+    earlier node's title dated a few years off. extra_titles are used verbatim for the
+    first nodes, so scripts that look nodes up by title find them.
+    """
+    rng = random.Random(seed)
+    extra_titles = list(extra_titles)
+    nodes = []
+    for n in range(n_nodes):
+        if n >= len(extra_titles) and nodes and rng.random() < near_duplicate_rate:
+            original = rng.choice(nodes)
+            title = misspell(rng, original['title'])
+            year = original['year'] + rng.randint(-5, 5)
+        else:
+            title = extra_titles[n] if n < len(extra_titles) else sample_title(rng, n)
+            year = sample_year(rng)
+        nodes.append({
+            'id': record_id(rng),
+            'title': title,
+            'subtitle': f"{rng.choice(PREFIXES)} {title.lower()}" if rng.random() < 0.2 else '',
+            'year': year,
+            'image': '' if rng.random() < no_image_rate else f"https://upload.wikimedia.org/{n}.jpg",
+        })
+
+    order = sorted(range(n_nodes), key=lambda i: nodes[i]['year'])
+    orphans = {i for i in range(n_nodes) if rng.random() < orphan_rate}
+    type_names = [t for t, _ in LINK_TYPES]
+    type_weights = [w for _, w in LINK_TYPES]
+
+    # Preferential attachment: every connected node enters the urn once, and once
+    # more each time it is used as a predecessor, so hubs keep growing
+    urn = []
+    links = []
+    for i in order:
+        if i in orphans:
+            continue
+        if urn:
+            k = min(len(urn), 1 + int(rng.expovariate(1 / max(mean_in_degree - 1, 1e-9))))
+            for src in {rng.choice(urn) for _ in range(k)}:
+                links.append([src, i])
+                urn.append(src)
+        urn.append(i)
+
+    out = []
+    for src, dst in links:
+        if rng.random() < paradox_rate:
+            src, dst = dst, src
+        link = {
+            'ID': len(out) + 1,
+            'source': nodes[src]['id'],
+            'target': nodes[dst]['id'],
+            'type': rng.choices(type_names, type_weights)[0],
+        }
+        if rng.random() < missing_endpoint_rate:
+            link[rng.choice(('source', 'target'))] = None
+        out.append(link)
+    for link in rng.sample(out, int(len(out) * duplicate_rate)):
+        out.append(dict(link, ID=len(out) + 1))
+
+    for i in range(n_nodes):
+        if rng.random() < undated_rate:
+            nodes[i]['year'] = None
+    return {'nodes': nodes, 'links': out}
+
+
+def to_airtable(tree):
+    """Render as (dated innovations, connections, all innovations) Airtable records."""
+    rng = random.Random(0)
+    all_innovations = []
+    for node in tree['nodes']:
+        fields = {'Name': node['title']}
+        if node['subtitle']:
+            fields['Secondary name'] = node['subtitle']
+        if node['year'] is not None:
+            fields['Date'] = node['year']
+        if node['image']:
+            fields['Image URL'] = node['image']
+        all_innovations.append({'id': node['id'], 'fields': fields})
+    connections = []
+    for link in tree['links']:
+        fields = {'ID': link['ID'], 'Type': link['type']}
+        if link['source']:
+            fields['From'] = [link['source']]
+        if link['target']:
+            fields['To'] = [link['target']]
+        connections.append({'id': record_id(rng), 'fields': fields})
+    dated = [inv for inv in all_innovations if 'Date' in inv['fields']]
+    return dated, connections, all_innovations
+
+
+def to_techtree_json(tree):
+    """Render in the techtree-data.json shape, filtered the way fetch-and-save does."""
+    nodes = [
+        {
+            'id': node['id'],
+            'title': node['title'],
+            'subtitle': node['subtitle'],
+            'year': node['year'],
+            'image': node['image'] or '/placeholder-invention.jpg',
+            'fields': [],
+        }
+        for node in tree['nodes'] if node['year'] is not None
+    ]
+    dated_ids = {node['id'] for node in nodes}
+    links = [
+        {
+            'source': link['source'],
+            'target': link['target'],
+            'type': link['type'],
+            'details': '',
+        }
+        for link in tree['links']
+        if link['source'] in dated_ids and link['target'] in dated_ids
+    ]
+    return {'nodes': nodes, 'links': links}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic tech-tree dataset.')
+    parser.add_argument('nodes', type=int, help='Number of innovations to generate')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--airtable', action='store_true',
+                        help='Write Airtable records ({"innovations", "connections"}) instead of techtree-data.json')
+    parser.add_argument('--out', required=True, help='Output JSON path')
+    args = parser.parse_args()
+
+    tree = generate(args.nodes, seed=args.seed)
+    if args.airtable:
+        _, connections, innovations = to_airtable(tree)
+        data = {'innovations': innovations, 'connections': connections}
+    else:
+        data = to_techtree_json(tree)
+    with open(args.out, 'w') as f:
+        json.dump(data, f)
+    print(f"Wrote {args.out}: {len(tree['nodes'])} innovations, {len(tree['links'])} connections")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Compact in-memory tech tree shared by the analysis scripts.
+
+Loads either techtree-data.json (as written by fetch-and-save-inventions.ts) or raw
+Airtable Innovations/Connections records into flat arrays instead of dicts of full
+records:
+  - every record id is interned to an integer code, in load order
+  - titles, subtitles, years and flags are parallel per-node columns
+  - connections are parallel edge columns (from, to, type code), with -1 standing in
+    for a missing endpoint
+  - out- and in-adjacency are CSR arrays built on first use, so successor and
+    predecessor queries are slices rather than scans
+
+Ids that only appear as connection endpoints are interned as undated nodes with no
+title, so every edge column entry is either a valid code or -1.
+"""
+import json
+from array import array
+from functools import cached_property
+
+
+def first_id(value):
+    # Linked-record fields come back from Airtable as lists of record ids
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value or None
+
+
+class TechGraph:
+    def __init__(self):
+        self.ids = []
+        self.index = {}
+        self.titles = []
+        self.subtitles = []
+        self.years = array('q')
+        self.dated = bytearray()
+        self.has_image = bytearray()
+        # Nodes loaded as dated records come first; codes below this are all dated
+        self.dated_count = 0
+
+        self.edge_ids = []
+        self.edge_from = array('l')
+        self.edge_to = array('l')
+        self.edge_type = array('H')
+        self.type_names = []
+        self.type_codes = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_from)
+
+    def add_node(self, record_id, title='', subtitle='', year=None, has_image=False):
+        """Intern record_id (or update it if it was only seen as an endpoint) and return its code."""
+        code = self.index.get(record_id)
+        if code is None:
+            code = self.index[record_id] = len(self.ids)
+            self.ids.append(record_id)
+            self.titles.append(title)
+            self.subtitles.append(subtitle)
+            self.years.append(0)
+            self.dated.append(0)
+            self.has_image.append(0)
+        else:
+            self.titles[code] = title
+            self.subtitles[code] = subtitle
+        if year is not None:
+            self.years[code] = year
+            self.dated[code] = 1
+        self.has_image[code] = 1 if has_image else 0
+        return code
+
+    def code(self, record_id):
+        """Code for record_id, interning unknown ids as untitled undated nodes; -1 for None."""
+        if record_id is None:
+            return -1
+        code = self.index.get(record_id)
+        if code is None:
+            code = self.add_node(record_id)
+        return code
+
+    def add_edge(self, edge_id, source, target, type_name='default'):
+        type_code = self.type_codes.get(type_name)
+        if type_code is None:
+            type_code = self.type_codes[type_name] = len(self.type_names)
+            self.type_names.append(type_name)
+        self.edge_ids.append(edge_id)
+        self.edge_from.append(self.code(source))
+        self.edge_to.append(self.code(target))
+        self.edge_type.append(type_code)
+
+    @classmethod
+    def from_airtable(cls, inventions, connections, all_inventions=()):
+        """Build from Airtable records. inventions are the dated ones and get the first
+        codes, in order; all_inventions adds titles for the undated ones."""
+        graph = cls()
+        for inv in inventions:
+            fields = inv['fields']
+            graph.add_node(
+                inv['id'], fields.get('Name', 'Unknown'), fields.get('Secondary name', ''),
+                int(float(fields['Date'])), bool(fields.get('Image URL'))
+            )
+        graph.dated_count = len(graph.ids)
+        for inv in all_inventions:
+            if inv['id'] not in graph.index:
+                fields = inv['fields']
+                graph.add_node(
+                    inv['id'], fields.get('Name', 'Unknown'), fields.get('Secondary name', ''),
+                    has_image=bool(fields.get('Image URL'))
+                )
+        for conn in connections:
+            fields = conn['fields']
+            graph.add_edge(
+                fields.get('ID', conn['id']), first_id(fields.get('From')),
+                first_id(fields.get('To')), fields.get('Type', 'default')
+            )
+        return graph
+
+    @classmethod
+    def from_techtree_json(cls, data):
+        """Build from the parsed contents of techtree-data.json. Edges are numbered by
+        their position in data['links']."""
+        graph = cls()
+        for node in data['nodes']:
+            image = node.get('image', '')
+            graph.add_node(
+                node['id'], node.get('title', ''), node.get('subtitle', ''), int(node['year']),
+                bool(image) and image != '/placeholder-invention.jpg'
+            )
+        graph.dated_count = len(graph.ids)
+        for i, link in enumerate(data['links']):
+            graph.add_edge(i, link['source'] or None, link['target'] or None, link.get('type', 'default'))
+        return graph
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_techtree_json(json.load(f))
+
+    def _csr(self, keys, values):
+        # Counting sort of edge positions by key, skipping edges missing an endpoint
+        n = len(self.ids)
+        offsets = array('l', [0]) * (n + 1)
+        edge_from, edge_to = self.edge_from, self.edge_to
+        live = [e for e in range(len(keys)) if edge_from[e] >= 0 and edge_to[e] >= 0]
+        for e in live:
+            offsets[keys[e] + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        fill = array('l', offsets)
+        edges = array('l', [0]) * len(live)
+        for e in live:
+            k = keys[e]
+            edges[fill[k]] = e
+            fill[k] += 1
+        neighbours = array('l', (values[e] for e in edges))
+        return offsets, neighbours, edges
+
+    @cached_property
+    def out_adjacency(self):
+        """(offsets, targets, edge positions): node i's out-edges are [offsets[i], offsets[i+1])."""
+        return self._csr(self.edge_from, self.edge_to)
+
+    @cached_property
+    def in_adjacency(self):
+        """(offsets, sources, edge positions): node i's in-edges are [offsets[i], offsets[i+1])."""
+        return self._csr(self.edge_to, self.edge_from)
+
+    @cached_property
+    def title_index(self):
+        """Title -> code. Like a dict comprehension over the nodes, the last one wins."""
+        return {title: code for code, title in enumerate(self.titles) if title}
+
+    def type_code_set(self, type_names):
+        return {self.type_codes[t] for t in type_names if t in self.type_codes}
+
+    def _neighbours(self, adjacency, code, exclude_types):
+        offsets, neighbours, edges = adjacency
+        lo, hi = offsets[code], offsets[code + 1]
+        if not exclude_types:
+            return neighbours[lo:hi]
+        excluded = self.type_code_set(exclude_types)
+        edge_type = self.edge_type
+        return array('l', (
+            neighbours[k] for k in range(lo, hi) if edge_type[edges[k]] not in excluded
+        ))
+
+    def successors(self, code, exclude_types=()):
+        return self._neighbours(self.out_adjacency, code, exclude_types)
+
+    def predecessors(self, code, exclude_types=()):
+        return self._neighbours(self.in_adjacency, code, exclude_types)
+
+    def in_edges(self, code):
+        """Edge positions of the connections into code."""
+        offsets, _, edges = self.in_adjacency
+        return edges[offsets[code]:offsets[code + 1]]
+
+    def out_edges(self, code):
+        """Edge positions of the connections out of code."""
+        offsets, _, edges = self.out_adjacency
+        return edges[offsets[code]:offsets[code + 1]]
+
+    def topological_order(self, exclude_types=()):
+        """Codes in dependency order (every node after its predecessors), following
+        connections not of exclude_types. Nodes on or downstream of a cycle are left
+        out, so the result is shorter than the graph when there are cycles."""
+        offsets, targets, edges = self.out_adjacency
+        excluded = self.type_code_set(exclude_types)
+        edge_type = self.edge_type
+        live = bytearray(1 if edge_type[e] not in excluded else 0 for e in edges)
+        indegree = array('l', [0]) * len(self.ids)
+        for k, t in enumerate(targets):
+            if live[k]:
+                indegree[t] += 1
+        order = array('l', (code for code in range(len(self.ids)) if not indegree[code]))
+        i = 0
+        while i < len(order):
+            code = order[i]
+            i += 1
+            for k in range(offsets[code], offsets[code + 1]):
+                if live[k]:
+                    t = targets[k]
+                    indegree[t] -= 1
+                    if not indegree[t]:
+                        order.append(t)
+        return order
+
+    def components(self, exclude_types=()):
+        """Strongly connected components, following connections not of exclude_types,
+        as a list of code arrays. Components come successors first: every component's
+        successors are in components before it (Tarjan's algorithm, iterative)."""
+        offsets, targets, edges = self.out_adjacency
+        excluded = self.type_code_set(exclude_types)
+        edge_type = self.edge_type
+        n = len(self.ids)
+        index = array('l', [-1]) * n
+        low = array('l', [0]) * n
+        on_stack = bytearray(n)
+        stack = []
+        components = []
+        counter = 0
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            # (node, next adjacency position) for the depth-first search
+            path = [(root, offsets[root])]
+            while path:
+                code, k = path[-1]
+                end = offsets[code + 1]
+                while k < end and (edge_type[edges[k]] in excluded or index[targets[k]] >= 0):
+                    t = targets[k]
+                    if edge_type[edges[k]] not in excluded and on_stack[t] and index[t] < low[code]:
+                        low[code] = index[t]
+                    k += 1
+                if k < end:
+                    t = targets[k]
+                    path[-1] = (code, k + 1)
+                    index[t] = low[t] = counter
+                    counter += 1
+                    stack.append(t)
+                    on_stack[t] = 1
+                    path.append((t, offsets[t]))
+                    continue
+                path.pop()
+                if path and low[code] < low[path[-1][0]]:
+                    low[path[-1][0]] = low[code]
+                if low[code] == index[code]:
+                    component = array('l')
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == code:
+                            break
+                    components.append(component)
+        return components
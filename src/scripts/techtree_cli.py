@@ -0,0 +1,66 @@
+"""
+One entry point for the repo's Python tools.
+
+  python src/scripts/techtree_cli.py <command> [arguments...]
+  python src/scripts/techtree_cli.py <command> --help
+
+Commands are looked up in COMMANDS and their module is only imported once the command
+is chosen, so listing commands or running a light one never loads the heavy
+dependencies (Pillow, pyairtable, requests, networkx) of the others. Everything after
+the command name is handed to that script's own argument parser, so each command takes
+exactly the arguments its script does when run directly.
+"""
+import importlib
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(os.path.dirname(HERE))
+
+# name -> (module, directory holding it, summary)
+COMMANDS = {
+    'images': ('update_images', HERE, 'Download and crop images and update credits from Airtable'),
+    'validate': ('data_validation', HERE, 'Check the Airtable data for paradoxes, duplicates and orphans'),
+    'scrape': ('wiki_scraper', HERE, 'Crawl Wikipedia for technology relationships'),
+    'dump': ('wiki_dump', HERE, 'Extract relationships from a Wikipedia XML dump'),
+    'resolve': ('entity_resolution', HERE, 'Propose Connections from scraped relationships'),
+    'potter': ('build_potter_mapping', os.path.join(REPO, 'analysis', 'brian_potter'),
+               "Map Brian Potter's invention dating onto the tree"),
+    'ingest': ('dataset_ingest', HERE, 'Parse an external dating dataset into records'),
+    'match': ('name_matching', HERE, 'Match external records to tree nodes'),
+    'gaps': ('predecessor_gaps', HERE, 'Predecessor gaps and dependency chains for the whole tree'),
+    'reachability': ('reachability', HERE, 'Build or query the ancestor/descendant index'),
+    'shards': ('shard_techtree', HERE, 'Split techtree-data.json into year shards'),
+    'pipeline': ('update_pipeline', HERE, 'Run the data refresh pipeline'),
+    'image-hashes': ('image_hash_index', HERE, 'Find near-duplicate and placeholder images'),
+}
+
+
+def usage() -> str:
+    lines = [__doc__.strip().splitlines()[0], '', 'Commands:']
+    lines += [f"  {name:14} {summary}" for name, (_, _, summary) in COMMANDS.items()]
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    name = argv[0]
+    if name not in COMMANDS:
+        print(f"Unknown command: {name}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module_name, directory, _ = COMMANDS[name]
+    for path in (HERE, directory):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    module = importlib.import_module(module_name)
+    # The script's parser reads sys.argv and names itself after argv[0]
+    sys.argv = [f"{os.path.basename(sys.argv[0])} {name}"] + argv[1:]
+    result = module.main()
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
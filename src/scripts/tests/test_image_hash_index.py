@@ -0,0 +1,31 @@
+from PIL import Image, ImageDraw
+
+from image_hash_index import ImageHashIndex, distance
+
+
+def draw(path, shift):
+    img = Image.new('RGB', (200, 150), 'white')
+    canvas = ImageDraw.Draw(img)
+    canvas.ellipse((30 + shift, 20, 150 + shift, 130), fill='black')
+    canvas.rectangle((0, 0, 40, 40), fill='gray')
+    img.save(path)
+
+
+def test_distance():
+    assert distance(0b1011, 0b0001) == 2
+    assert distance(1 << 127, 0) == 1
+
+
+def test_images_written_in_one_run_are_compared(tmp_path):
+    draw(tmp_path / 'lamp.webp', 0)
+    index = ImageHashIndex(str(tmp_path), str(tmp_path / 'hashes.json'))
+    index.refresh()
+    assert index.duplicates_of('lamp.webp') == []
+
+    # Two new images, each checked as soon as it is written, as update_images.py does
+    draw(tmp_path / 'engine.webp', 40)
+    assert index.update('engine.webp')
+    assert index.duplicates_of('engine.webp') == []
+    draw(tmp_path / 'engine-copy.webp', 41)
+    assert index.update('engine-copy.webp')
+    assert [name for _, name in index.duplicates_of('engine-copy.webp')] == ['engine.webp']
@@ -0,0 +1,48 @@
+import json
+import sys
+
+import pytest
+
+from reachability import main, write_index
+from techgraph import TechGraph
+
+
+def tree(nodes, links):
+    return {
+        'nodes': [{'id': record_id, 'title': title, 'year': year} for record_id, title, year in nodes],
+        'links': [{'source': source, 'target': target, 'type': 'Prerequisite'} for source, target in links],
+    }
+
+
+OLD_TREE = tree(
+    [('recA', 'Wheel', -3500), ('recB', 'Cart', -3000), ('recC', 'Carriage', 1500)],
+    [('recA', 'recB'), ('recB', 'recC')],
+)
+# A node added since, ahead of the others so every code shifts
+NEW_TREE = tree(
+    [('recN', 'Axle', -3600), ('recA', 'Wheel', -3500), ('recB', 'Cart', -3000), ('recC', 'Carriage', 1500)],
+    [('recN', 'recA'), ('recA', 'recB'), ('recB', 'recC')],
+)
+
+
+def query(monkeypatch, tmp_path, title):
+    with open(tmp_path / 'tree.json', 'w') as f:
+        json.dump(NEW_TREE, f)
+    write_index(TechGraph.from_techtree_json(OLD_TREE), str(tmp_path / 'reachability.bin'))
+    monkeypatch.setattr(sys, 'argv', ['reachability.py', 'query', title, '--tree', str(tmp_path / 'tree.json'),
+                                      '--index', str(tmp_path / 'reachability.bin')])
+    main()
+
+
+def test_query_an_index_built_from_an_older_tree(monkeypatch, tmp_path, capsys):
+    query(monkeypatch, tmp_path, 'Cart')
+    assert capsys.readouterr().out.splitlines() == [
+        'Cart depends on 1 nodes:', '  Wheel',
+        'Cart enabled 1 nodes:', '  Carriage',
+    ]
+
+
+def test_query_a_node_missing_from_the_index(monkeypatch, tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        query(monkeypatch, tmp_path, 'Axle')
+    assert "'Axle' is not in the index, rebuild it" in capsys.readouterr().err
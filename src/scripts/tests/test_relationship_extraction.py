@@ -0,0 +1,27 @@
+from relationship_extraction import RELATIONSHIP_KEYWORDS, RelationshipExtractor
+
+extractor = RelationshipExtractor(RELATIONSHIP_KEYWORDS)
+
+
+def test_phrases_around_a_keyword():
+    assert extractor.extract('The Newcomen engine was inspired by the Savery pump.') == [
+        ('newcomen engine', 'savery pump', 'inspired'),
+    ]
+
+
+def test_phrases_stop_at_neighbouring_keywords_and_conjunctions():
+    text = 'The Newcomen engine was inspired by the Savery pump and uses pistons.'
+    assert extractor.extract(text) == [('newcomen engine', 'savery pump', 'inspired')]
+    text = 'The telescope uses lenses or mirrors, and the microscope contains lenses.'
+    assert extractor.extract(text) == [
+        ('telescope', 'lenses', 'component'),
+        ('microscope', 'lenses', 'component'),
+    ]
+
+
+def test_adjacent_keywords_share_no_words():
+    text = 'the pump uses pistons based on cylinders'
+    assert extractor.extract(text) == [
+        ('pump', 'pistons', 'component'),
+        ('pistons', 'cylinders', 'inspired'),
+    ]
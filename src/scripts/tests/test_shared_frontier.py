@@ -0,0 +1,21 @@
+import time
+
+from shared_frontier import SharedFrontier
+
+
+def test_expired_lease_cannot_complete(tmp_path):
+    frontier = SharedFrontier(str(tmp_path / 'frontier.sqlite'), lease_seconds=0.05)
+    frontier.start(['Steam engine'], 2)
+    assert frontier.claim('first', 5) == [('Steam engine', 0)]
+    time.sleep(0.1)
+    assert frontier.claim('second', 5) == [('Steam engine', 0)]
+    page = {'title': 'Steam engine', 'requested': ['Steam engine']}
+
+    assert not frontier.complete('first', page, 0, [('steam engine', 'boiler', 'component')], ['Boiler'])
+    assert list(frontier.edges()) == []
+    assert frontier.counts()['leased'] == 1
+
+    assert frontier.complete('second', page, 0, [('steam engine', 'piston', 'component')], ['Piston'])
+    assert list(frontier.edges()) == [('steam engine', 'piston', 'component')]
+    assert frontier.counts() == {'queued': 1, 'leased': 0, 'done': 1, 'failed': 0}
+    frontier.close()
@@ -0,0 +1,42 @@
+import os
+
+from graph_store import load_arrays
+from wiki_dump import ingest, iter_pages, wikitext_to_text
+
+# Five pages: two technology articles (one with an infobox, a reference and a table),
+# a redirect, a project-namespace page and an article without a technology category
+DUMP = os.path.join(os.path.dirname(__file__), 'fixtures', 'tiny-pages-articles.xml.bz2')
+
+
+def test_iter_pages():
+    pages = list(iter_pages(DUMP))
+    assert [(p['title'], p['ns'], p['redirect']) for p in pages] == [
+        ('Newcomen atmospheric engine', 0, None),
+        ('Spinning jenny', 0, None),
+        ('Steam engine (disambiguation)', 0, 'Steam engine'),
+        ('Wikipedia:Inventions', 4, None),
+        ('River Thames', 0, None),
+    ]
+    text, links = wikitext_to_text(pages[0]['text'])
+    assert links == ['Savery pump', 'Watt steam engine']
+    assert 'Infobox' not in text and 'cite book' not in text and 'Dudley' not in text
+
+
+def test_ingest(tmp_path):
+    output = str(tmp_path / 'tiny.edges')
+    stats = ingest(DUMP, output, processes=1)
+    assert stats == {'pages': 5, 'candidates': 2, 'relationships': 4}
+    assert list(load_arrays(output)) == [
+        ('newcomen engine', 'savery pump', 'inspired'),
+        ('watt steam engine', 'newcomen engine', 'improvement'),
+        ('spinning jenny', 'eight spindles', 'component'),
+        ('water frame', 'spinning jenny', 'inspired'),
+    ]
+
+
+def test_ingest_titles(tmp_path):
+    output = str(tmp_path / 'tiny.edges')
+    # An allowlist replaces the category test, but redirects are still skipped
+    stats = ingest(DUMP, output, processes=1, titles={'River Thames', 'Steam engine (disambiguation)'})
+    assert stats == {'pages': 5, 'candidates': 1, 'relationships': 1}
+    assert list(load_arrays(output)) == [('thames barrier', 'dutch delta works', 'inspired')]
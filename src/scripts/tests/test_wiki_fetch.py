@@ -0,0 +1,14 @@
+from wiki_fetch import canonical_title
+
+
+def test_canonical_title_of_urls_and_paths():
+    assert canonical_title('https://en.wikipedia.org/wiki/Steam_engine') == 'Steam engine'
+    assert canonical_title('/wiki/steam_engine#History') == 'Steam engine'
+    assert canonical_title('/wiki/Steam_engine?oldid=123') == 'Steam engine'
+    assert canonical_title('/wiki/What%3F_(film)') == 'What? (film)'
+
+
+def test_canonical_title_keeps_question_marks_in_titles():
+    assert canonical_title('What? (film)') == 'What? (film)'
+    assert canonical_title('why?_(american band)') == 'Why? (american band)'
+    assert canonical_title('Steam  engine#History') == 'Steam engine'
@@ -1,21 +1,21 @@
 import os
-import requests
 import re
 from urllib.parse import unquote
-from pyairtable import Api
-from dotenv import load_dotenv
 import time
 from typing import Union
-from PIL import Image, ImageOps
 import io
 import hashlib
 import argparse
 import math
 
+from airtable_reader import iter_records
+from image_hash_index import ImageHashIndex
+
+# requests, Pillow, pyairtable and dotenv are imported where they are first needed, and
+# nothing (environment, HTTP session, images directory) is set up at import time, so
+# importing parse_crop or normalize_wikimedia_url, or a --credits-only run, stays cheap.
+
 # --- Configuration ---
-load_dotenv(dotenv_path='.env.local')
-AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
-AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 AIRTABLE_TABLE_NAME = "Innovations" # Make sure this matches your table name
 IMAGE_URL_FIELD = "Image URL"       # The field containing Wikimedia image URLs
 CREDITS_FIELD = "Image credits"     # The field to store the text credits
@@ -48,18 +48,22 @@ THUMB_URL_RE = re.compile(
     r'(?P<prefix>(?:lossy-|lossless-)?(?:page\d+-)?)(?P<width>\d+)px-(?P<rest>[^/]+)$'
 )
 
-# Create a session with proper headers
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'TechTree/1.0 (https://historicaltechtree.com; etienne@historicaltechtree.com) Python/3.x',
-    'Accept': 'image/webp,image/*,*/*;q=0.8'
-})
-
-# Ensure images directory exists
-os.makedirs(IMAGES_DIR, exist_ok=True)
+_session = None
 
 # --- Helper Functions ---
 
+def get_session():
+    """The shared HTTP session with proper headers, created on first use."""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        _session.headers.update({
+            'User-Agent': 'TechTree/1.0 (https://historicaltechtree.com; etienne@historicaltechtree.com) Python/3.x',
+            'Accept': 'image/webp,image/*,*/*;q=0.8'
+        })
+    return _session
+
 def parse_crop(value) -> Union[tuple, None]:
     """Parses an 'x,y,w,h' crop string (percentages of the source image) into a tuple of floats.
 
@@ -141,6 +145,9 @@ def normalize_wikimedia_url(url: str, crop: Union[tuple, None] = None) -> str:
 
 def download_and_optimize_image(url: str, title: str, rotation: int = 0, crop: Union[tuple, None] = None) -> Union[str, None]:
     """Downloads and optimizes an image, returns the local path."""
+    import requests
+    from PIL import Image, ImageEnhance, ImageOps
+    session = get_session()
     try:
         # Generate a filename from the title
         safe_title = re.sub(r'[^a-z0-9]', '-', title.lower())
@@ -206,7 +213,6 @@ def download_and_optimize_image(url: str, title: str, rotation: int = 0, crop: U
         img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
         
         # Apply subtle sharpening to enhance details
-        from PIL import ImageEnhance
         enhancer = ImageEnhance.Sharpness(img)
         img = enhancer.enhance(1.2)  # Slight sharpening
         
@@ -221,6 +227,27 @@ def download_and_optimize_image(url: str, title: str, rotation: int = 0, crop: U
         print(f"    Error processing image: {e}")
         return None
 
+def check_image_hash(hashes, filename: str):
+    """Adds a newly written image to the perceptual-hash index and warns if it looks
+    like a placeholder or like another record's image."""
+    try:
+        hashes.update(filename)
+    except Exception as e:
+        print(f"    Could not hash image: {e}")
+        return
+    for d, placeholder in hashes.placeholder_matches(filename):
+        print(f"    Warning: image looks like the placeholder {placeholder} ({d} bits apart)")
+    for d, other in hashes.duplicates_of(filename):
+        print(f"    Warning: image looks like {other} ({d} bits apart)")
+
+def until_error(records, errors: list):
+    """Yields from records until it raises, appending the exception to errors, so a
+    failure partway through an Airtable stream still lets the caller save its work."""
+    try:
+        yield from records
+    except Exception as e:
+        errors.append(e)
+
 def extract_filename_from_url(url: str) -> Union[str, None]:
     """Extracts the filename from various URL formats."""
     if not url:
@@ -259,8 +286,9 @@ def get_wikimedia_credits(filename: str) -> Union[dict, None]:
         "titles": f"File:{filename}",
         "origin": "*" # Required for CORS
     }
+    import requests
     try:
-        response = session.get(WIKIMEDIA_API_URL, params=params, timeout=FETCH_TIMEOUT)
+        response = get_session().get(WIKIMEDIA_API_URL, params=params, timeout=FETCH_TIMEOUT)
         response.raise_for_status()
         data = response.json()
 
@@ -371,6 +399,11 @@ def main():
     
     args = parser.parse_args()
 
+    from dotenv import load_dotenv
+    from pyairtable import Api
+    load_dotenv(dotenv_path='.env.local')
+    AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
+    AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
     if not AIRTABLE_API_KEY or not AIRTABLE_BASE_ID:
         print("Error: AIRTABLE_API_KEY and AIRTABLE_BASE_ID must be set in .env file")
         return 1
@@ -384,7 +417,7 @@ def main():
         # First, try to get the fields to check if Local image exists
         try:
             fields = [IMAGE_URL_FIELD, CREDITS_FIELD, CREDITS_URL_FIELD, LOCAL_IMAGE_FIELD, "Name", "Image rotation", CROP_FIELD]
-            records = table.all(fields=fields, max_records=1)
+            records = list(iter_records(table, fields=fields, max_records=1, prefetch=0))
             
             # Debug: Print available fields from first record
             if records:
@@ -399,60 +432,58 @@ def main():
             else:
                 raise e
 
-        # Fetch records based on the selected mode and whether we're in credits-only mode
+        # Select records based on the selected mode and whether we're in credits-only
+        # mode. Except for --only, records are streamed page by page as they are
+        # processed rather than all fetched first.
         if args.only:
             # Targeted mode: just the named records, so a single re-crop doesn't
             # re-download the whole table
             names = ", ".join(f"{{Name}} = '{escape_formula_string(name)}'" for name in args.only)
-            records = table.all(
+            records = list(iter_records(
+                table,
                 fields=fields,
                 formula=f"AND({{Image URL}} != '', OR({names}))"
-            )
+            ))
             print(f"Found {len(records)} of {len(args.only)} named record(s) with an image URL.")
             found_names = {r.get('fields', {}).get('Name') for r in records}
             for missing in [n for n in args.only if n not in found_names]:
                 print(f"  Warning: no record named '{missing}' with an image URL.")
         elif args.cropped:
-            records = table.all(
-                fields=fields,
-                formula=f"AND({{Image URL}} != '', {{{CROP_FIELD}}} != '')"
-            )
-            print(f"Found {len(records)} records with a crop value.")
+            formula = f"AND({{Image URL}} != '', {{{CROP_FIELD}}} != '')"
+            description = "records with a crop value"
         elif args.credits_only:
             if args.new:
                 # In credits-only mode, fetch records that have no credits
-                records = table.all(
-                    fields=fields,
-                    formula=f"AND({{Image URL}} != '', {{Image credits}} = '')"
-                )
-                print(f"Found {len(records)} records without credits.")
+                formula = f"AND({{Image URL}} != '', {{Image credits}} = '')"
+                description = "records without credits"
             else:  # args.all
                 # In credits-only mode, fetch all records with image URLs
-                records = table.all(
-                    fields=fields,
-                    formula=f"{{Image URL}} != ''"
-                )
-                print(f"Found {len(records)} records with image URLs.")
+                formula = f"{{Image URL}} != ''"
+                description = "records with image URLs"
         else:
             if args.new:
                 # Normal mode: fetch records without local images
-                records = table.all(
-                    fields=fields,
-                    formula=f"AND({{Image URL}} != '', {{Local image}} = '')"
-                )
-                print(f"Found {len(records)} records without local images.")
+                formula = f"AND({{Image URL}} != '', {{Local image}} = '')"
+                description = "records without local images"
             else:  # args.all
                 # Normal mode: fetch all records with image URLs
-                records = table.all(
-                    fields=fields,
-                    formula=f"{{Image URL}} != ''"
-                )
-                print(f"Found {len(records)} records with image URLs.")
+                formula = f"{{Image URL}} != ''"
+                description = "records with image URLs"
+        if not args.only:
+            records = iter_records(table, fields=fields, formula=formula)
+            print(f"Reading {description} from Airtable page by page.")
 
     except Exception as e:
         print(f"Error connecting to or fetching from Airtable: {e}")
         return 1
 
+    # Ensure images directory exists, and keep the perceptual hashes of the images
+    # up to date as they are written
+    hashes = None
+    if not args.credits_only:
+        os.makedirs(IMAGES_DIR, exist_ok=True)
+        hashes = ImageHashIndex.load(IMAGES_DIR)
+
     updates = []
     processed_count = 0
     updated_count = 0
@@ -460,8 +491,9 @@ def main():
     error_count = 0
     image_errors = []  # Track image processing errors
     credits_errors = []  # Track image link/credits errors
+    fetch_errors = []  # Airtable errors that cut the record stream short
 
-    for record in records:
+    for record in until_error(records, fetch_errors):
         processed_count += 1
         record_id = record['id']
         image_url = record.get('fields', {}).get(IMAGE_URL_FIELD)
@@ -470,7 +502,7 @@ def main():
         current_credits = record.get('fields', {}).get(CREDITS_FIELD)
         current_crop = record.get('fields', {}).get(CROP_FIELD)
 
-        print(f"\nProcessing record {processed_count}/{len(records)}: {record_id}")
+        print(f"\nProcessing record {processed_count}: {record_id}")
         print(f"  Title: {title}")
         print(f"  Image URL: {image_url}")
         print(f"  {CROP_FIELD}: {current_crop if current_crop else '(none set)'}")
@@ -510,6 +542,8 @@ def main():
             local_image_path = download_and_optimize_image(image_url, title, rotation, crop)
             if not local_image_path:
                 image_errors.append({"title": title, "record_id": record_id, "url": image_url})
+            else:
+                check_image_hash(hashes, os.path.basename(local_image_path))
 
         if credits_data or local_image_path:
             update_payload = {}
@@ -568,6 +602,10 @@ def main():
                 error_count += len(updates)
                 updates = []
 
+    if fetch_errors:
+        print(f"\nError fetching records from Airtable, stopping after {processed_count}: {fetch_errors[0]}")
+        error_count += 1
+
     # Send any remaining updates
     if updates:
         print("\n--- Sending final batch update ---")
@@ -578,6 +616,9 @@ def main():
             print(f"--- Final batch update failed: {e} ---")
             error_count += len(updates)
 
+    if hashes is not None:
+        hashes.save()
+
     print("\n--- Script Finished ---")
     print(f"Total Records Processed: {processed_count}")
     print(f"Records Updated: {updated_count}")
@@ -0,0 +1,281 @@
+"""
+Data refresh pipeline: images, tree data, changelog and derived artifacts, run as a DAG.
+
+Each stage declares the command it runs, the local files it reads and the files it
+writes. A stage depends on every stage that writes one of its inputs and starts as
+soon as those have finished, so stages that do not depend on each other run side by
+side. In a default run that is nothing: images, data and changelog run one after the
+other, as update-data.sh always ran them. Only with --extras do stages overlap (the
+image hashes alongside the data fetch, the shards and reachability index together).
+
+Stages can also wait on a stage that writes nothing they read locally: the tree data
+is fetched after the images, because update_images.py writes each new image's "Local
+image" field to Airtable and fetch-and-save-inventions.ts reads it back. That kind of
+dependency only orders the stages; a failure there (some image could not be
+downloaded) does not stop the later stage, as the other records are still up to date.
+The changelog waits on the data stage the same way, and is regenerated from the
+tree data on disk even if the fetch failed.
+
+A stage is skipped when its inputs and command are unchanged since its last
+successful run and its outputs are still there. Fingerprints are kept in
+.pipeline-state.json at the repo root. Stages that read from Airtable cannot tell
+whether anything changed there, so they always run. If a stage fails, the stages that
+read its outputs are not run.
+
+The images, data and changelog stages are what update-data.sh has always run. The
+derived artifacts (year shards, reachability index, image hashes) are opt-in with
+--extras, or by naming them in --only, so a refresh does no more work than before
+unless asked to.
+
+Every stage's output is printed line by line, prefixed with the stage's name, and
+each stage's wall time is reported at the end.
+
+Usage:
+  python src/scripts/update_pipeline.py            # run what needs running
+  python src/scripts/update_pipeline.py --extras   # and the derived artifacts
+  python src/scripts/update_pipeline.py --force    # run everything
+  python src/scripts/update_pipeline.py --only changelog shards
+  python src/scripts/update_pipeline.py --list
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STATE_PATH = os.path.join(REPO, '.pipeline-state.json')
+TREE_DATA = 'src/app/api/inventions/techtree-data.json'
+TSX = ['npx', 'tsx']
+NODE_ENV = {'NODE_OPTIONS': '--no-deprecation'}
+
+
+class Stage:
+    """One step of the pipeline. inputs and outputs are paths relative to the repo
+    root (files or directories); remote stages read from Airtable as well. after names
+    stages to wait for, successful or not, when no local file links them. Optional
+    stages only run with --extras or --only."""
+
+    def __init__(self, name: str, command: List[str], inputs: List[str] = (), outputs: List[str] = (),
+                 remote: bool = False, env: Dict[str, str] = None, after: List[str] = (),
+                 optional: bool = False):
+        self.name = name
+        self.command = command
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.remote = remote
+        self.env = env or {}
+        self.after = list(after)
+        self.optional = optional
+
+
+# --new only looks at records with no local image, so a record that already has one
+# is left alone, crop or no crop. To apply a crop added after the image was
+# downloaded, re-run by hand:
+#   .venv/bin/python src/scripts/update_images.py --only "Record name"
+STAGES = [
+    Stage('images', [sys.executable, 'src/scripts/update_images.py', '--new'],
+          inputs=['src/scripts/update_images.py'], outputs=['public/tech-images'], remote=True),
+    # Reads the "Local image" fields the images stage writes to Airtable
+    Stage('data', TSX + ['src/scripts/fetch-and-save-inventions.ts'],
+          inputs=['src/scripts/fetch-and-save-inventions.ts'], outputs=[TREE_DATA], remote=True, env=NODE_ENV,
+          after=['images']),
+    # Also reads the Milestones table, which can change on its own. Reads the tree data
+    # too, but only waits for it: update-data.sh always regenerated the changelog
+    Stage('changelog', TSX + ['src/scripts/generate-changelog.ts'],
+          inputs=['src/scripts/generate-changelog.ts'], outputs=['src/app/api/inventions/changelog.txt'],
+          remote=True, env=NODE_ENV, after=['data']),
+    Stage('shards', [sys.executable, 'src/scripts/shard_techtree.py'],
+          inputs=['src/scripts/shard_techtree.py', TREE_DATA], outputs=['public/techtree-shards'], optional=True),
+    Stage('reachability', [sys.executable, 'src/scripts/reachability.py', 'build'],
+          inputs=['src/scripts/reachability.py', 'src/scripts/techgraph.py', TREE_DATA],
+          outputs=['src/app/api/inventions/reachability.bin'], optional=True),
+    Stage('image-hashes', [sys.executable, 'src/scripts/image_hash_index.py'],
+          inputs=['src/scripts/image_hash_index.py', 'public/tech-images'], outputs=['.image-hashes.json'],
+          optional=True),
+]
+
+
+def dependencies(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Stage name -> names of the stages that write one of its inputs. A failure in
+    one of these stops the stage."""
+    writers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            writers[path] = stage.name
+    return {
+        stage.name: sorted({writers[path] for path in stage.inputs if path in writers} - {stage.name})
+        for stage in stages
+    }
+
+
+def ordering(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Stage name -> names of all the stages it waits for: the ones it depends on plus
+    its after stages, when they are part of this run."""
+    names = {stage.name for stage in stages}
+    depends = dependencies(stages)
+    return {stage.name: sorted(set(depends[stage.name]) | (set(stage.after) & names)) for stage in stages}
+
+
+def _hash_path(digest, path: str):
+    full = os.path.join(REPO, path)
+    if os.path.isdir(full):
+        # Directories of many files (images) are fingerprinted by name, size and
+        # modification time rather than read in full
+        for root, dirs, files in os.walk(full):
+            dirs.sort()
+            for name in sorted(files):
+                st = os.stat(os.path.join(root, name))
+                digest.update(f"{os.path.relpath(os.path.join(root, name), full)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    elif os.path.exists(full):
+        with open(full, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    else:
+        digest.update(b'\0missing')
+
+
+def fingerprint(stage: Stage) -> str:
+    digest = hashlib.sha256(json.dumps([stage.command[1:], stage.env]).encode('utf-8'))
+    for path in sorted(stage.inputs):
+        digest.update(f"\n{path}\n".encode('utf-8'))
+        _hash_path(digest, path)
+    return digest.hexdigest()
+
+
+def is_current(stage: Stage, state: Dict[str, str]) -> bool:
+    if stage.remote:
+        return False
+    if any(not os.path.exists(os.path.join(REPO, path)) for path in stage.outputs):
+        return False
+    return state.get(stage.name) == fingerprint(stage)
+
+
+def load_state() -> Dict[str, str]:
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state: Dict[str, str]):
+    with open(STATE_PATH + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(STATE_PATH + '.tmp', STATE_PATH)
+
+
+print_lock = threading.Lock()
+
+
+def run_stage(stage: Stage) -> bool:
+    """Run stage's command from the repo root, printing its output prefixed with its
+    name. Returns whether it succeeded."""
+    env = dict(os.environ, **stage.env)
+    try:
+        proc = subprocess.Popen(stage.command, cwd=REPO, env=env, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True, bufsize=1)
+    except OSError as e:
+        with print_lock:
+            print(f"[{stage.name}] could not start: {e}", flush=True)
+        return False
+    for line in proc.stdout:
+        with print_lock:
+            print(f"[{stage.name}] {line}", end='', flush=True)
+    return proc.wait() == 0
+
+
+def run_pipeline(stages: List[Stage], force: bool = False, jobs: int = 0) -> Dict[str, Dict]:
+    """Run stages in dependency order, independent ones in parallel. Returns
+    {name: {'status': 'ran'|'skipped'|'failed'|'blocked', 'seconds': wall time}}."""
+    depends = dependencies(stages)
+    waits = ordering(stages)
+    by_name = {stage.name: stage for stage in stages}
+    state = load_state()
+    results = {}
+    running = {}
+    pending = [stage.name for stage in stages]
+
+    def start_ready(pool):
+        for name in list(pending):
+            if any(dep not in results for dep in waits[name]):
+                continue
+            pending.remove(name)
+            stage = by_name[name]
+            if any(results[dep]['status'] in ('failed', 'blocked') for dep in depends[name]):
+                results[name] = {'status': 'blocked', 'seconds': 0.0}
+                continue
+            # A dependency that ran may have left this stage's inputs unchanged
+            if not force and is_current(stage, state):
+                results[name] = {'status': 'skipped', 'seconds': 0.0}
+                with print_lock:
+                    print(f"[{name}] inputs unchanged, skipping", flush=True)
+                continue
+            with print_lock:
+                print(f"[{name}] starting: {' '.join(stage.command)}", flush=True)
+            running[pool.submit(run_stage, stage)] = (name, time.perf_counter())
+
+    with ThreadPoolExecutor(jobs or len(stages)) as pool:
+        start_ready(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, started = running.pop(future)
+                ok = future.result()
+                results[name] = {'status': 'ran' if ok else 'failed', 'seconds': time.perf_counter() - started}
+                if ok:
+                    state[name] = fingerprint(by_name[name])
+                    save_state(state)
+            # Skipped and blocked stages can unblock others without anything running
+            before = None
+            while before != len(pending):
+                before = len(pending)
+                start_ready(pool)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the tech tree data, running independent stages in parallel.')
+    parser.add_argument('--only', nargs='+', metavar='STAGE', help='Run only these stages (their dependencies are not run)')
+    parser.add_argument('--extras', action='store_true', help='Also build the optional derived artifacts (shards, reachability index, image hashes)')
+    parser.add_argument('--force', action='store_true', help='Run stages even if their inputs are unchanged')
+    parser.add_argument('--jobs', type=int, default=0, help='Most stages to run at once (default: no limit)')
+    parser.add_argument('--list', action='store_true', help='List the stages and their dependencies, then exit')
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if args.extras or not stage.optional]
+    if args.only:
+        unknown = set(args.only) - {stage.name for stage in STAGES}
+        if unknown:
+            parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+        stages = [stage for stage in STAGES if stage.name in args.only]
+    if args.list:
+        waits = ordering(STAGES)
+        for stage in STAGES:
+            after = f" (after {', '.join(waits[stage.name])})" if waits[stage.name] else ''
+            optional = ' [--extras]' if stage.optional else ''
+            print(f"{stage.name:14} {' '.join(stage.command)}{after}{optional}")
+        return
+
+    start = time.perf_counter()
+    results = run_pipeline(stages, args.force, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f"\nPipeline finished in {elapsed:.1f}s")
+    for stage in stages:
+        result = results[stage.name]
+        seconds = f"{result['seconds']:8.1f}s" if result['status'] in ('ran', 'failed') else ' ' * 9
+        print(f"  {stage.name:14} {result['status']:8} {seconds}")
+    failed = [name for name, result in results.items() if result['status'] in ('failed', 'blocked')]
+    if failed:
+        print(f"\nStages that failed or could not run: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
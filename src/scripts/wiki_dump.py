@@ -0,0 +1,216 @@
+"""
+Offline relationship extraction from a Wikipedia XML dump (pages-articles.xml.bz2).
+
+The dump is decompressed and parsed as a stream with ElementTree.iterparse: each
+<page> is read, handed on and cleared, so memory stays flat however large the dump.
+Only main-namespace articles that are not redirects and look like technology
+articles are kept. By default that means having a category that matches
+TECH_CATEGORY; an allowlist of titles can replace this.
+
+Kept pages go to a process pool in batches, where their wikitext is reduced to plain
+text and run through the same RelationshipExtractor as wiki_scraper.py. At most a
+few batches per process are in flight, so a slow pool holds back the reader instead
+of filling memory. Edges are streamed to an edge file (see graph_store.py) as
+batches come back.
+
+Single-threaded bz2 decompression is usually the slowest step. Passing '-' reads
+the uncompressed XML from stdin, so a parallel decompressor can feed it:
+  lbzip2 -dc enwiki-latest-pages-articles.xml.bz2 | python wiki_dump.py -
+"""
+import argparse
+import bz2
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Set, Tuple
+from xml.etree import ElementTree as ET
+
+from graph_store import EdgeWriter
+from relationship_extraction import RELATIONSHIP_KEYWORDS, extract_relationships
+from wiki_fetch import canonical_title, followable
+
+# Categories that mark a page as a candidate technology article
+TECH_CATEGORY = re.compile(
+    r'\[\[\s*Category\s*:[^\]]*\b(?:technolog|invent|engineering|machin|devices?\b|tools?\b|instruments?\b|'
+    r'inventions?\b|vehicles?\b|materials?\b|weapons?\b|electronic|computing|industrial|manufactur)',
+    re.IGNORECASE
+)
+# Pages per task sent to the pool
+BATCH_PAGES = 64
+
+COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+REF = re.compile(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', re.DOTALL | re.IGNORECASE)
+# Innermost templates and tables; removed repeatedly to unwind nesting
+TEMPLATE = re.compile(r'\{\{[^{}]*\}\}')
+TABLE = re.compile(r'\{\|[^{}]*?\|\}', re.DOTALL)
+FILE_LINK = re.compile(r'\[\[\s*(?:File|Image|Category)\s*:[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]', re.IGNORECASE)
+LINK = re.compile(r'\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]')
+EXTERNAL_LINK = re.compile(r'\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]')
+HEADING = re.compile(r'^=+\s*(.*?)\s*=+\s*$', re.MULTILINE)
+EMPHASIS = re.compile(r"'{2,}")
+TAG = re.compile(r'<[^>]+>')
+
+
+def _unnest(pattern: re.Pattern, text: str) -> str:
+    while True:
+        text, n = pattern.subn('', text)
+        if not n:
+            return text
+
+
+def wikitext_to_text(wikitext: str) -> Tuple[str, List[str]]:
+    """Plain text of an article's wikitext, and the article titles it links to.
+
+    Templates, tables, references, files and categories are dropped; links keep
+    their label. This is an approximation of what the API's plain-text extracts
+    return, good enough for keyword extraction.
+    """
+    text = COMMENT.sub('', wikitext)
+    text = REF.sub('', text)
+    text = _unnest(TEMPLATE, text)
+    text = _unnest(TABLE, text)
+    text = FILE_LINK.sub('', text)
+    links = [canonical_title(m.group(1)) for m in LINK.finditer(text) if m.group(1) and ':' not in m.group(1)]
+    text = LINK.sub(lambda m: m.group(2) or m.group(1), text)
+    text = EXTERNAL_LINK.sub(r'\1', text)
+    text = HEADING.sub(r'\1.', text)
+    text = EMPHASIS.sub('', text)
+    text = TAG.sub('', text)
+    return text, [link for link in links if link and followable(link)]
+
+
+def _local(tag: str) -> str:
+    # '{http://www.mediawiki.org/xml/export-0.10/}page' -> 'page'
+    return tag.rsplit('}', 1)[-1]
+
+
+def open_dump(path: str):
+    if path == '-':
+        return open(sys.stdin.fileno(), 'rb', closefd=False)
+    return bz2.open(path, 'rb') if path.endswith('.bz2') else open(path, 'rb')
+
+
+def iter_pages(path: str) -> Iterator[Dict]:
+    """Yield {'title', 'ns', 'id', 'redirect', 'text'} for each page of a dump, clearing
+    each page's elements once it has been read."""
+    with open_dump(path) as f:
+        root = None
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event != 'end' or _local(elem.tag) != 'page':
+                continue
+            page = {'title': '', 'ns': 0, 'id': 0, 'redirect': None, 'text': ''}
+            for child in elem:
+                name = _local(child.tag)
+                if name == 'title':
+                    page['title'] = child.text or ''
+                elif name == 'ns':
+                    page['ns'] = int(child.text or 0)
+                elif name == 'id':
+                    page['id'] = int(child.text or 0)
+                elif name == 'redirect':
+                    page['redirect'] = child.get('title')
+                elif name == 'revision':
+                    for field in child:
+                        if _local(field.tag) == 'text':
+                            page['text'] = field.text or ''
+            yield page
+            # Drop this page and everything before it
+            elem.clear()
+            root.clear()
+
+
+def is_candidate(page: Dict, titles: Set[str] = None) -> bool:
+    if page['ns'] != 0 or page['redirect'] is not None:
+        return False
+    if titles is not None:
+        return page['title'] in titles
+    return TECH_CATEGORY.search(page['text']) is not None
+
+
+def extract_batch(pages: List[Tuple[str, str]], relationship_keywords: Dict[str, List[str]]) -> List[Tuple[str, list]]:
+    """(title, relationships) for each (title, wikitext) pair; runs in the pool."""
+    results = []
+    for title, wikitext in pages:
+        text, _ = wikitext_to_text(wikitext)
+        results.append((title, extract_relationships(relationship_keywords, text)))
+    return results
+
+
+def ingest(dump_path: str, output: str, processes: int = None, titles: Set[str] = None,
+           limit: int = 0, progress_every: int = 10000) -> Dict[str, int]:
+    """Extract relationships from every candidate article of a dump into an edge file.
+    Returns counts of pages read, candidates and relationships."""
+    stats = {'pages': 0, 'candidates': 0, 'relationships': 0}
+    writer = EdgeWriter(output)
+    processes = processes or os.cpu_count() or 1
+    in_flight = deque()
+    start = time.perf_counter()
+
+    def collect(future):
+        for _, relationships in future.result():
+            writer.add_many(relationships)
+            stats['relationships'] += len(relationships)
+
+    with ProcessPoolExecutor(processes) as pool:
+        batch = []
+        for page in iter_pages(dump_path):
+            stats['pages'] += 1
+            if stats['pages'] % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{stats['pages']} pages ({stats['pages'] / elapsed:.0f}/s), "
+                      f"{stats['candidates']} candidates, {stats['relationships']} relationships")
+            if not is_candidate(page, titles):
+                continue
+            stats['candidates'] += 1
+            batch.append((page['title'], page['text']))
+            if len(batch) >= BATCH_PAGES:
+                in_flight.append(pool.submit(extract_batch, batch, RELATIONSHIP_KEYWORDS))
+                batch = []
+                # Keep the pool busy without reading ahead of it
+                while len(in_flight) > 2 * processes:
+                    collect(in_flight.popleft())
+            if limit and stats['candidates'] >= limit:
+                break
+        if batch:
+            in_flight.append(pool.submit(extract_batch, batch, RELATIONSHIP_KEYWORDS))
+        while in_flight:
+            collect(in_flight.popleft())
+    writer.close()
+    return stats
+
+
+def read_titles(path: str) -> Set[str]:
+    with open(path, encoding='utf-8') as f:
+        return {canonical_title(line.strip()) for line in f if line.strip()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract technology relationships from a Wikipedia XML dump.')
+    parser.add_argument('dump', help="pages-articles.xml.bz2, an uncompressed .xml, or '-' for XML on stdin")
+    parser.add_argument('--output', default='tech_relationships.edges', help='Edge file to write (default: %(default)s)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='Extraction processes (default: %(default)s)')
+    parser.add_argument('--titles', metavar='PATH',
+                        help='Only process the articles listed in this file, one title per line, '
+                             'instead of those with a technology category')
+    parser.add_argument('--limit', type=int, default=0, help='Stop after this many candidate articles')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = ingest(args.dump, args.output, args.processes, read_titles(args.titles) if args.titles else None,
+                   args.limit)
+    elapsed = time.perf_counter() - start
+    print(f"\nRead {stats['pages']} pages in {elapsed:.1f}s")
+    if not args.limit and args.dump != '-':
+        print(f"That is {os.path.getsize(args.dump) / 2 ** 20 / elapsed:.1f} MiB/s of dump")
+    print(f"Candidate technology articles: {stats['candidates']}")
+    print(f"Relationships written to {args.output}: {stats['relationships']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Fetch backends for wiki_scraper.py.
+
+Both backends take a batch of article titles and yield one dict per page found:
+  {'title': canonical title, 'requested': [titles asked for that led here],
+   'text': plain article text, 'links': [linked article titles],
+   'revid': latest revision id, when the backend knows it}
+
+HtmlBackend downloads each rendered article and reads mw-content-text, one page per
+request. With a process pool, each page is parsed (and its relationships extracted,
+given the keywords) in one pool task while the next page downloads, and the page
+comes back with a 'relationships' list. ApiBackend asks the MediaWiki API for links and plain-text extracts of up to
+50 titles per request and follows continuation, so no HTML is downloaded or parsed.
+
+requests and BeautifulSoup are imported on first use, so the title helpers can be
+imported (by wiki_dump.py, say) without loading either.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import quote, unquote
+
+from crawl_metrics import CrawlMetrics
+from relationship_extraction import extract_relationships
+
+BASE_URL = "https://en.wikipedia.org"
+API_URL = BASE_URL + "/w/api.php"
+USER_AGENT = 'TechTree/1.0 (https://historicaltechtree.com; etienne@historicaltechtree.com) Python/3.x'
+
+# Links to pages whose title contains any of these are not followed
+SKIP_TITLE_PARTS = ['disambiguation', 'category:', 'file:', 'help:']
+
+
+def title_from_url(url: str) -> str:
+    """'https://en.wikipedia.org/wiki/Steam_engine' -> 'Steam engine'."""
+    return unquote(url.split('/wiki/', 1)[-1]).replace('_', ' ')
+
+
+def canonical_title(link: str) -> str:
+    """Normalize a link (URL, /wiki/ path or title) the way MediaWiki does, so that
+    '/wiki/steam_engine#History' and 'Steam  engine' both become 'Steam engine'.
+
+    Redirects are not known locally; see resolve_titles for those. Only a URL or path
+    has a query string to drop: '?' is valid in titles ('What? (film)').
+    """
+    if '/wiki/' in link:
+        link = link.split('/wiki/', 1)[1].split('?', 1)[0]
+    link = link.split('#', 1)[0]
+    title = ' '.join(unquote(link).replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+
+def resolve_titles(titles: List[str], result: Dict) -> Dict[str, str]:
+    """Map each requested title to the page title a query answered it with, following
+    the 'normalized' and 'redirects' lists of a query result."""
+    normalized = {entry['from']: entry['to'] for entry in result.get('normalized', [])}
+    redirects = {entry['from']: entry['to'] for entry in result.get('redirects', [])}
+    resolved = {}
+    for title in titles:
+        target = normalized.get(title, title)
+        resolved[title] = redirects.get(target, target)
+    return resolved
+
+
+def url_from_title(title: str) -> str:
+    return f"{BASE_URL}/wiki/{quote(title.replace(' ', '_'))}"
+
+
+def followable(title: str) -> bool:
+    lowered = title.lower()
+    return not any(x in lowered for x in SKIP_TITLE_PARTS)
+
+
+def parse_article_html(html: str) -> Tuple[str, List[str]]:
+    """Return the text of an article's mw-content-text and the article titles it links to.
+
+    Uses lxml when it is installed. Otherwise BeautifulSoup is told to build only the
+    content subtree, which skips the page chrome but is still pure Python.
+    """
+    try:
+        import lxml.html
+    except ImportError:
+        lxml = None
+    if lxml is not None:
+        root = lxml.html.fromstring(html)
+        found = root.xpath('//div[@id="mw-content-text"]')
+        if not found:
+            return '', []
+        content = found[0]
+        hrefs = content.xpath('.//a/@href')
+        text = content.text_content()
+    else:
+        from bs4 import BeautifulSoup, SoupStrainer
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', id='mw-content-text'))
+        content = soup.find('div', {'id': 'mw-content-text'})
+        if not content:
+            return '', []
+        hrefs = [link.get('href', '') for link in content.find_all('a')]
+        text = content.get_text()
+    links = [canonical_title(href) for href in hrefs if href.startswith('/wiki/') and ':' not in href]
+    return text, links
+
+
+def parse_and_extract(html: str, relationship_keywords: Dict[str, List[str]] = None) -> Tuple:
+    """parse_article_html, then the page's relationships (None without keywords), in
+    one pool task so the page crosses to the pool once. Returns (text, links,
+    relationships, parse seconds, extract seconds)."""
+    start = time.perf_counter()
+    text, links = parse_article_html(html)
+    parsed = time.perf_counter()
+    relationships = extract_relationships(relationship_keywords, text) if text and relationship_keywords else None
+    return text, links, relationships, parsed - start, time.perf_counter() - parsed
+
+
+class RateLimiter:
+    """Spaces calls to wait() at least 1/rate seconds apart, across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Backend:
+    batch_size = 1
+    # Whether fetched pages carry their latest revision id ('revid')
+    revisions = False
+
+    def __init__(self, rate_limiter: RateLimiter, pool: Executor = None, metrics: CrawlMetrics = None,
+                 relationship_keywords: Dict[str, List[str]] = None):
+        self.rate_limiter = rate_limiter
+        # CPU-bound work is handed to this pool when there is one
+        self.pool = pool
+        # Backends that hand whole pages to the pool extract relationships there too
+        self.relationship_keywords = relationship_keywords
+        self.metrics = metrics or CrawlMetrics()
+        self._local = threading.local()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """A requests session per worker thread."""
+        if not hasattr(self._local, 'session'):
+            import requests
+            self._local.session = requests.Session()
+            self._local.session.headers['User-Agent'] = USER_AGENT
+        return self._local.session
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        self.rate_limiter.wait()
+        # Batched requests are labelled by their first title
+        titles = kwargs.get('params', {}).get('titles', '').split('|')
+        label = f"{titles[0]} (+{len(titles) - 1})" if len(titles) > 1 else titles[0] or url
+        with self.metrics.timer('fetch', label):
+            response = self.session.get(url, **kwargs)
+        self.metrics.count('requests')
+        self.metrics.count('bytes', len(response.content))
+        self.metrics.observe('response_bytes', len(response.content))
+        response.raise_for_status()
+        return response
+
+    def fetch(self, titles: List[str]) -> Iterator[Dict]:
+        raise NotImplementedError
+
+
+class HtmlBackend(Backend):
+    """One rendered article per request. The fetching thread only downloads; parsing
+    and extraction run in the pool, so they are not serialized behind the GIL, while
+    the thread downloads the next page of its batch. A page that fails to download
+    does not hold back the rest of the batch: its error is raised after them."""
+    batch_size = 8
+
+    def fetch(self, titles):
+        pending = deque()
+        error = None
+        for title in titles:
+            try:
+                html = self.get(url_from_title(title)).text
+            except Exception as e:
+                error = error or e
+                continue
+            if not self.pool:
+                with self.metrics.timer('parse', title):
+                    text, links = parse_article_html(html)
+                if text:
+                    yield {'title': title, 'requested': [title], 'text': text, 'links': links}
+                continue
+            pending.append((title, self.pool.submit(parse_and_extract, html, self.relationship_keywords)))
+            # Hand on the pages parsed so far without waiting for the others
+            while pending and pending[0][1].done():
+                yield from self._parsed(*pending.popleft())
+        while pending:
+            yield from self._parsed(*pending.popleft())
+        if error is not None:
+            raise error
+
+    def _parsed(self, title: str, future) -> Iterator[Dict]:
+        text, links, relationships, parse_seconds, extract_seconds = future.result()
+        self.metrics.observe('parse', parse_seconds, title)
+        if not text:
+            return
+        page = {'title': title, 'requested': [title], 'text': text, 'links': links}
+        if relationships is not None:
+            self.metrics.observe('extract', extract_seconds, title)
+            page['relationships'] = relationships
+        yield page
+
+
+class ApiBackend(Backend):
+    """Links and plain-text extracts from the MediaWiki query API, 50 titles per request.
+
+    Redirects are followed, so a page requested under an alias comes back under its
+    target's title, with the alias in 'requested'.
+
+    Links for the whole batch come back up to 500 per response. TextExtracts only
+    returns one full-page extract per response, so the rest of the batch's text
+    arrives over the continuation rounds; those rounds are still small JSON replies.
+    """
+    batch_size = 50
+    revisions = True
+
+    def __init__(self, rate_limiter: RateLimiter, pool: Executor = None, metrics: CrawlMetrics = None,
+                 relationship_keywords: Dict[str, List[str]] = None, api_url: str = API_URL):
+        super().__init__(rate_limiter, pool, metrics, relationship_keywords)
+        self.api_url = api_url
+
+    def query(self, titles: List[str]) -> Iterator[Dict]:
+        """Yield each response of a continued prop=links|extracts|info query."""
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': 2,
+            'titles': '|'.join(titles),
+            'redirects': 1,
+            'prop': 'links|extracts|info',
+            'plnamespace': 0,
+            'pllimit': 'max',
+            'explaintext': 1,
+            'exlimit': 'max',
+        }
+        cont = {}
+        while True:
+            data = self.get(self.api_url, params={**params, **cont}).json()
+            if 'error' in data:
+                import requests
+                raise requests.HTTPError(f"MediaWiki API error: {data['error'].get('info', data['error'])}")
+            yield data
+            if 'continue' not in data:
+                return
+            cont = data['continue']
+
+    def fetch(self, titles):
+        pages = {}
+        requested = {}
+        for data in self.query(titles):
+            result = data.get('query', {})
+            if not requested:
+                for title, resolved in resolve_titles(titles, result).items():
+                    requested.setdefault(resolved, []).append(title)
+            for page in result.get('pages', []):
+                if page.get('missing') or page.get('invalid'):
+                    continue
+                current = pages.setdefault(page['title'], {
+                    'title': page['title'],
+                    'requested': requested.get(page['title'], [page['title']]),
+                    'text': '',
+                    'links': [],
+                })
+                current['links'].extend(canonical_title(link['title']) for link in page.get('links', []))
+                if page.get('lastrevid'):
+                    current['revid'] = page['lastrevid']
+                if page.get('extract'):
+                    current['text'] = page['extract']
+        yield from pages.values()
@@ -1,93 +1,354 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import networkx as nx
 import re
 from collections import defaultdict
-import time
 from typing import Dict, Set, List, Tuple
+from crawl_metrics import CrawlMetrics, ProgressReporter
+from crawl_state import BloomFilter, CrawlJournal, VisitedSet
+from graph_store import write_edges
+from page_cache import CachingBackend, PageCache
+from relationship_extraction import RELATIONSHIP_KEYWORDS, RelationshipExtractor, extract_relationships
+from shared_frontier import SharedFrontier
+from wiki_fetch import ApiBackend, HtmlBackend, RateLimiter, canonical_title, followable
+
+BACKENDS = {'api': ApiBackend, 'html': HtmlBackend}
+# Names the output of find_relationships in the page cache. Change it whenever the
+# extraction logic changes, so cached relationships from the old logic are not reused.
+EXTRACTOR = 'keyword-span-1'
 
 class WikiTechScraper:
-    def __init__(self):
+    def __init__(self, workers: int = 8, requests_per_second: float = 5.0, backend: str = 'api',
+                 cache_path: str = None, processes: int = 0, bloom_capacity: int = 0,
+                 checkpoint_dir: str = None, checkpoint_interval: float = 30.0,
+                 progress_interval: float = 0, verbose: bool = True):
         self.base_url = "https://en.wikipedia.org"
-        self.session = requests.Session()
+        self.workers = workers
+        # One budget for the whole crawl, shared by every worker, to stay polite to Wikipedia
+        self.rate_limiter = RateLimiter(requests_per_second)
+        # Parsing and extraction are CPU-bound, so with processes > 0 the worker threads
+        # only fetch and hand pages to this pool
+        self.pool = ProcessPoolExecutor(processes) if processes else None
+        # Fetch, parse and extraction timings, bytes, errors and frontier size
+        self.metrics = CrawlMetrics()
+        self.progress_interval = progress_interval
+        self.verbose = verbose
+        self.relationship_keywords = {rel_type: list(keywords) for rel_type, keywords in RELATIONSHIP_KEYWORDS.items()}
+        self.extractor = RelationshipExtractor(self.relationship_keywords)
+        self.backend = BACKENDS[backend](self.rate_limiter, self.pool, self.metrics, self.relationship_keywords)
+        self.cache = PageCache(cache_path) if cache_path else None
+        if self.cache:
+            self.backend = CachingBackend(self.backend, self.cache)
+        self._lock = threading.Lock()
         self.graph = nx.DiGraph()
-        self.visited_pages = set()
-        self.relationship_keywords = {
-            'inspired': ['inspired by', 'based on', 'influenced by', 'derived from'],
-            'prerequisite': ['required', 'necessary', 'needed', 'dependent on', 'relies on'],
-            'component': ['consists of', 'contains', 'uses', 'incorporates', 'integrated'],
-            'improvement': ['improved', 'enhanced', 'advanced', 'developed from', 'evolution of']
-        }
-        
-    def get_page_content(self, url: str) -> BeautifulSoup:
-        """Fetch and parse a Wikipedia page."""
-        response = self.session.get(url)
-        response.raise_for_status()
-        return BeautifulSoup(response.text, 'html.parser')
+        # Canonical titles already queued. For very large crawls a Bloom filter keeps
+        # this at a fixed size, at the cost of skipping a few unseen pages.
+        self.visited_pages = BloomFilter(bloom_capacity) if bloom_capacity else VisitedSet()
+        # Redirect and normalization aliases seen so far -> the title they resolve to
+        self.aliases = {}
+        # Edges and finished pages are logged here as the crawl goes, so it can be resumed
+        self.journal = CrawlJournal(checkpoint_dir, checkpoint_interval) if checkpoint_dir else None
         
     def extract_year(self, text: str) -> int:
         """Extract year from text using regex."""
         year_match = re.search(r'\b(1\d{3}|20[0-2]\d)\b', text)
         return int(year_match.group()) if year_match else None
         
-    def find_relationships(self, text: str) -> List[Tuple[str, str]]:
-        """Find technological relationships in text."""
-        relationships = []
-        
-        for rel_type, keywords in self.relationship_keywords.items():
-            for keyword in keywords:
-                # Look for patterns like "X was inspired by Y" or "Y inspired X"
-                pattern = rf'([\w\s]+)\s+{keyword}\s+([\w\s]+)'
-                matches = re.finditer(pattern, text.lower())
-                
-                for match in matches:
-                    tech1 = match.group(1).strip()
-                    tech2 = match.group(2).strip()
-                    relationships.append((tech1, tech2, rel_type))
-                    
+    def find_relationships(self, text: str) -> List[Tuple[str, str, str]]:
+        """Find technological relationships in text, in one pass over it."""
+        return self.extractor.extract(text)
+
+    def page_relationships(self, page: Dict) -> List[Tuple[str, str, str]]:
+        """Relationships in one fetched page: extracted along with it by the backend,
+        or from the cache when its revision is there."""
+        cached = self.cache and page.get('revid')
+        relationships = page.get('relationships')
+        if relationships is None and cached:
+            relationships = self.cache.get_relationships(page['title'], page['revid'], EXTRACTOR)
+            if relationships is not None:
+                return relationships
+        if relationships is None:
+            with self.metrics.timer('extract', page['title']):
+                if self.pool:
+                    relationships = self.pool.submit(extract_relationships, self.relationship_keywords, page['text']).result()
+                else:
+                    relationships = self.find_relationships(page['text'])
+        if cached:
+            self.cache.put_relationships(page['title'], page['revid'], EXTRACTOR, relationships)
         return relationships
-        
-    def analyze_page(self, url: str, depth: int = 0, max_depth: int = 2):
-        """Recursively analyze a Wikipedia page and its linked pages."""
-        if depth > max_depth or url in self.visited_pages:
-            return
-            
-        print(f"Analyzing page: {url}")
-        self.visited_pages.add(url)
-        
-        try:
-            soup = self.get_page_content(url)
-            
-            # Get the main content
-            content = soup.find('div', {'id': 'mw-content-text'})
-            if not content:
-                return
-                
-            # Extract text and find relationships
-            text = content.get_text()
-            relationships = self.find_relationships(text)
-            
-            # Add nodes and edges to the graph
+
+    @staticmethod
+    def page_links(page: Dict) -> List[str]:
+        # Follow links to other articles, skipping disambiguation and the like, once
+        # per page however often each is linked
+        return [title for title in dict.fromkeys(page['links']) if followable(title)]
+
+    def process_page(self, page: Dict) -> List[str]:
+        """Extract relationships from one fetched page into the graph and return the titles it links to."""
+        relationships = self.page_relationships(page)
+
+        # Add nodes and edges to the graph
+        with self._lock:
             for tech1, tech2, rel_type in relationships:
                 self.graph.add_edge(tech1, tech2, relationship=rel_type)
-            
-            # Find relevant links to other technology pages
-            for link in content.find_all('a'):
-                href = link.get('href', '')
-                if href.startswith('/wiki/') and ':' not in href:
-                    # Skip disambiguation and category pages
-                    if any(x in href.lower() for x in ['disambiguation', 'category:', 'file:', 'help:']):
-                        continue
-                        
-                    next_url = self.base_url + href
-                    self.analyze_page(next_url, depth + 1, max_depth)
-                    
-            # Be nice to Wikipedia's servers
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"Error analyzing {url}: {str(e)}")
-            
+        if self.journal:
+            self.journal.record_edges(relationships)
+        self.metrics.count('relationships', len(relationships))
+        return self.page_links(page)
+
+    def crawl(self, seed_urls: List[str], max_depth: int = 2, resume: bool = False):
+        """Breadth-first crawl from the seed pages with a pool of worker threads.
+
+        Links are canonicalized (fragments dropped, titles normalized, known redirects
+        resolved) and each title is queued once. The crawl goes one depth at a time,
+        so every page is reached at its shortest distance from a seed however the
+        workers interleave, and pages deeper than max_depth are not fetched. Workers
+        take as many queued titles as the backend fetches per request.
+
+        With a checkpoint directory, every edge and every finished title is journaled:
+        pages analyzed (or that failed to analyze), titles with no page, and redirects
+        to a page already queued.
+        resume=True restores the graph, visited set, aliases and frontier from the
+        journal instead of starting from the seeds, and only fetches pages that were
+        queued but not finished. A resumed crawl keeps the seeds and max_depth it was
+        started with, whatever is passed in.
+
+        Progress is counted in self.metrics, and summarized on one line every
+        progress_interval seconds when that is set.
+        """
+        state = self.journal.resume() if resume else None
+        if state:
+            seeds = [canonical_title(url) for url in seed_urls]
+            if state['max_depth'] != max_depth or set(state['seeds']) != set(seeds):
+                print(f"Resuming with the journaled seeds and max depth {state['max_depth']}, "
+                      f"not the ones given")
+            max_depth = state['max_depth']
+        frontier = queue.Queue()
+        levels = [[] for _ in range(max_depth + 1)]
+
+        def enqueue(title, depth):
+            """Queue title at depth and return its canonical form, or None if already seen."""
+            title = canonical_title(title)
+            with self._lock:
+                title = self.aliases.get(title, title)
+                if not self.visited_pages.add(title):
+                    return None
+                levels[depth].append(title)
+            return title
+
+        def first_visit(page):
+            """Record the aliases a page was requested under; False if its resolved
+            title was already queued on its own, so it is analyzed only once."""
+            title = page['title']
+            with self._lock:
+                for alias in page['requested']:
+                    if alias != title:
+                        self.aliases[alias] = title
+                return title in page['requested'] or self.visited_pages.add(title)
+
+        def take_batch():
+            batch = [frontier.get()]
+            while batch[0] is not None and len(batch) < self.backend.batch_size:
+                try:
+                    item = frontier.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Shutting down: leave the sentinel for another worker
+                    frontier.put(None)
+                    frontier.task_done()
+                    break
+                batch.append(item)
+            return batch
+
+        def worker():
+            while True:
+                batch = take_batch()
+                if batch[0] is None:
+                    frontier.task_done()
+                    return
+                depths = dict(batch)
+                answered = set()
+                try:
+                    for page in self.backend.fetch(list(depths)):
+                        answered.update(page['requested'])
+                        depth = min(depths.get(t, max_depth) for t in page['requested'])
+                        if not first_visit(page):
+                            if self.journal:
+                                self.journal.record_finished(page['requested'], page['title'])
+                            continue
+                        if self.verbose:
+                            print(f"Analyzing page (depth {depth}): {page['title']}")
+                        try:
+                            links = self.process_page(page)
+                        except Exception as e:
+                            self.metrics.count('analyze_errors')
+                            print(f"Error analyzing {page['title']}: {str(e)}")
+                            # Not retried on resume either
+                            if self.journal:
+                                self.journal.record_page(page['title'], page['requested'], depth, [])
+                            continue
+                        self.metrics.count('pages')
+                        queued = []
+                        if depth < max_depth:
+                            for title in links:
+                                title = enqueue(title, depth + 1)
+                                if title:
+                                    queued.append(title)
+                        if self.journal:
+                            self.journal.record_page(page['title'], page['requested'], depth, queued)
+                        self.metrics.set_gauge('frontier', frontier.qsize() + sum(len(level) for level in levels))
+                    missing = [t for t in depths if t not in answered]
+                    if missing and self.journal:
+                        self.journal.record_finished(missing)
+                except Exception as e:
+                    # Journaled as neither done nor finished, so a resume fetches them again
+                    unanswered = [t for t in depths if t not in answered]
+                    self.metrics.count('fetch_errors', len(unanswered))
+                    print(f"Error fetching {', '.join(unanswered)}: {str(e)}")
+                finally:
+                    for _ in batch:
+                        frontier.task_done()
+
+        if state:
+            self.restore(state, levels)
+        else:
+            if self.journal:
+                self.journal.start([canonical_title(url) for url in seed_urls], max_depth)
+            for url in seed_urls:
+                enqueue(url, 0)
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        reporter = ProgressReporter(self.metrics, self.progress_interval)
+        reporter.start()
+        try:
+            for depth in range(max_depth + 1):
+                # Workers only add to the next level while this one drains
+                self.metrics.set_gauge('depth', depth)
+                for title in levels[depth]:
+                    frontier.put((title, depth))
+                levels[depth] = []
+                frontier.join()
+            for _ in threads:
+                frontier.put(None)
+            for thread in threads:
+                thread.join()
+        finally:
+            reporter.stop()
+            if self.journal:
+                self.journal.close()
+        self.metrics.set_gauge('frontier', 0)
+
+    def restore(self, state: Dict, levels: List[List[str]]):
+        """Load a journaled crawl (CrawlJournal.resume()) into the graph and visited
+        set, and put the titles it queued but never finished back into levels."""
+        for tech1, tech2, rel_type in state['edges']:
+            self.graph.add_edge(tech1, tech2, relationship=rel_type)
+        self.aliases.update(state['aliases'])
+        for title in state['done']:
+            self.visited_pages.add(title)
+        pending = 0
+        for title, depth in state['queued'].items():
+            self.visited_pages.add(title)
+            if title not in state['done'] and depth < len(levels):
+                levels[depth].append(title)
+                pending += 1
+        print(f"Resuming crawl: {len(state['done'])} pages done, {pending} queued, "
+              f"{self.graph.number_of_edges()} relationships so far")
+
+    def crawl_shared(self, frontier: SharedFrontier, owner: str, poll_seconds: float = 0.2):
+        """Work on a crawl kept in a SharedFrontier, alongside any other processes
+        doing the same, until nothing is queued or leased.
+
+        Each of self.workers threads claims as many titles as the backend fetches per
+        request. Edges go to the shared store as well as self.graph. Titles that fail
+        to fetch or analyze are released for another try; titles the backend finds no
+        page for are marked done.
+        """
+        max_depth = frontier.max_depth
+
+        def worker(name):
+            while True:
+                batch = frontier.claim(name, self.backend.batch_size)
+                if not batch:
+                    # Others may still queue links from the pages they hold
+                    if not frontier.outstanding():
+                        return
+                    time.sleep(poll_seconds)
+                    continue
+                depths = dict(batch)
+                answered = set()
+                try:
+                    for page in self.backend.fetch(list(depths)):
+                        answered.update(page['requested'])
+                        title = page['title']
+                        depth = min(depths.get(t, max_depth) for t in page['requested'])
+                        if title not in page['requested'] and not frontier.adopt(name, title, depth):
+                            # Resolved to a page another worker has or had
+                            frontier.finish(name, page['requested'], {alias: title for alias in page['requested']})
+                            continue
+                        if self.verbose:
+                            print(f"Analyzing page (depth {depth}): {title}")
+                        try:
+                            relationships = self.page_relationships(page)
+                        except Exception as e:
+                            self.metrics.count('analyze_errors')
+                            print(f"Error analyzing {title}: {str(e)}")
+                            frontier.release(name, [title] + page['requested'])
+                            continue
+                        links = [canonical_title(t) for t in self.page_links(page)]
+                        if not frontier.complete(name, page, depth, relationships, links):
+                            # Held too long: another worker has the page now, so only
+                            # the aliases are finished here
+                            self.metrics.count('lost_leases')
+                            frontier.finish(name, page['requested'],
+                                            {alias: title for alias in page['requested'] if alias != title})
+                            continue
+                        with self._lock:
+                            for tech1, tech2, rel_type in relationships:
+                                self.graph.add_edge(tech1, tech2, relationship=rel_type)
+                        self.metrics.count('pages')
+                        self.metrics.count('relationships', len(relationships))
+                except Exception as e:
+                    unanswered = [t for t in depths if t not in answered]
+                    self.metrics.count('fetch_errors', len(unanswered))
+                    print(f"Error fetching {', '.join(unanswered)}: {str(e)}")
+                    frontier.release(name, unanswered)
+                    continue
+                missing = [t for t in depths if t not in answered]
+                if missing:
+                    frontier.finish(name, missing)
+                self.metrics.set_gauge('frontier', frontier.outstanding())
+
+        threads = [threading.Thread(target=worker, args=(f"{owner}/{n}",), daemon=True) for n in range(self.workers)]
+        reporter = ProgressReporter(self.metrics, self.progress_interval)
+        reporter.start()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            reporter.stop()
+
+    def analyze_page(self, url: str, depth: int = 0, max_depth: int = 2):
+        """Analyze a Wikipedia page and the pages it links to, up to max_depth links away."""
+        self.crawl([url], max_depth - depth)
+
+    def close(self):
+        """Stop the process pool and close the page cache."""
+        if self.pool:
+            self.pool.shutdown()
+        if self.cache:
+            self.cache.close()
+
     def get_technology_timeline(self) -> Dict[int, Set[str]]:
         """Create a timeline of technologies based on extracted years."""
         timeline = defaultdict(set)
@@ -100,8 +361,12 @@ class WikiTechScraper:
         return dict(sorted(timeline.items()))
         
     def export_graph(self, filename: str):
-        """Export the relationship graph to a GraphML file."""
-        nx.write_graphml(self.graph, filename)
+        """Export the relationship graph: as GraphML if filename ends in .graphml,
+        otherwise as a compact edge file (see graph_store.py)."""
+        if filename.endswith('.graphml'):
+            nx.write_graphml(self.graph, filename)
+        else:
+            write_edges(self.graph, filename)
         
     def print_summary(self):
         """Print a summary of the analyzed technology relationships."""
@@ -116,21 +381,124 @@ class WikiTechScraper:
             
         for rel_type, count in relationship_counts.items():
             print(f"- {rel_type}: {count}")
-            
+
+        if self.cache:
+            stats = self.backend.stats
+            print(f"\nPages served from cache: {stats['cached']}, downloaded: {stats['fetched']}")
+
+
+def run_shared_worker(frontier_path: str, options: Dict, metrics_path: str = None, lease_seconds: float = 300.0):
+    """Entry point of one cooperative crawl process (see WikiTechScraper.crawl_shared)."""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    scraper = WikiTechScraper(**options)
+    frontier = SharedFrontier(frontier_path, lease_seconds)
+    try:
+        scraper.crawl_shared(frontier, owner)
+    finally:
+        print(f"[{owner}] {scraper.metrics.progress_line()}")
+        if metrics_path:
+            scraper.metrics.dump(metrics_path)
+        frontier.close()
+        scraper.close()
+
+
+def crawl_cooperatively(args, seed_pages: List[str]) -> nx.DiGraph:
+    """Run args.crawl_processes worker processes on the shared frontier in
+    args.frontier_db and return the graph of everything it has collected."""
+    frontier = SharedFrontier(args.frontier_db, args.lease)
+    frontier.start([canonical_title(url) for url in seed_pages], args.max_depth)
+    # Split the request budget and the extraction processes, so the crawl processes
+    # together stay within --rate and --processes
+    options = dict(workers=args.workers, requests_per_second=args.rate / args.crawl_processes,
+                   backend=args.backend, cache_path=None if args.no_cache else args.cache,
+                   processes=max(1, args.processes // args.crawl_processes) if args.processes else 0,
+                   progress_interval=args.progress_interval, verbose=not args.quiet)
+    stem, ext = os.path.splitext(args.metrics)
+    processes = [
+        multiprocessing.Process(target=run_shared_worker, args=(args.frontier_db, options, f"{stem}.{i}{ext}", args.lease))
+        for i in range(args.crawl_processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    graph = nx.DiGraph()
+    for tech1, tech2, rel_type in frontier.edges():
+        graph.add_edge(tech1, tech2, relationship=rel_type)
+    print(f"\nShared frontier: {', '.join(f'{n} {state}' for state, n in frontier.counts().items())}")
+    frontier.close()
+    return graph
+
+
 def main():
-    scraper = WikiTechScraper()
-    
+    parser = argparse.ArgumentParser(description='Crawl Wikipedia for technology relationships.')
+    parser.add_argument('--max-depth', type=int, default=2, help='How many links away from the seed pages to crawl')
+    parser.add_argument('--workers', type=int, default=8, help='Number of concurrent fetch workers')
+    parser.add_argument('--rate', type=float, default=5.0, help='Requests per second across all workers')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='api',
+                        help='Fetch pages through the MediaWiki API (batched, no HTML) or as rendered HTML')
+    parser.add_argument('--cache', default='.wiki_cache.sqlite', metavar='PATH',
+                        help='Page cache keyed by revision, reused across runs (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='Fetch every page, without reading or writing the cache')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='Processes for parsing and extraction, 0 to do it on the fetch threads; with --frontier-db, '
+                             'split among the crawl processes (default: %(default)s)')
+    parser.add_argument('--bloom-capacity', type=int, default=0, metavar='N',
+                        help='Track visited pages in a Bloom filter sized for N titles instead of an exact set')
+    parser.add_argument('--checkpoint', default='.crawl_checkpoint', metavar='DIR',
+                        help='Directory the crawl journals its progress to (default: %(default)s)')
+    parser.add_argument('--checkpoint-interval', type=float, default=30.0, metavar='SECONDS',
+                        help='How often the journal is flushed to disk (default: %(default)s)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the crawl journaled in --checkpoint instead of starting over')
+    parser.add_argument('--output', default='tech_relationships.edges', metavar='PATH',
+                        help='Edge file to export the graph to (default: %(default)s)')
+    parser.add_argument('--graphml', metavar='PATH', help='Also export the graph as GraphML to PATH')
+    parser.add_argument('--progress-interval', type=float, default=10.0, metavar='SECONDS',
+                        help='Print a one-line progress summary this often, 0 to disable (default: %(default)s)')
+    parser.add_argument('--metrics', default='crawl_metrics.json', metavar='PATH',
+                        help='Where to write crawl metrics as JSON at exit (default: %(default)s)')
+    parser.add_argument('--quiet', action='store_true', help="Don't print a line for every page analyzed")
+    parser.add_argument('--frontier-db', metavar='PATH',
+                        help='Crawl with several processes sharing a frontier and edge store in this SQLite file. '
+                             'Running again on the same file continues the crawl')
+    parser.add_argument('--crawl-processes', type=int, default=4,
+                        help='Worker processes for --frontier-db (default: %(default)s)')
+    parser.add_argument('--lease', type=float, default=300.0, metavar='SECONDS',
+                        help='How long a --frontier-db worker may hold titles before they are requeued (default: %(default)s)')
+    args = parser.parse_args()
+    if args.resume and not CrawlJournal(args.checkpoint).exists():
+        parser.error(f"no crawl to resume in {args.checkpoint}")
+
     # Start with some seed pages
     seed_pages = [
         "https://en.wikipedia.org/wiki/History_of_technology",
         "https://en.wikipedia.org/wiki/Timeline_of_historic_inventions",
     ]
-    
-    for page in seed_pages:
-        scraper.analyze_page(page, max_depth=2)
+
+    if args.frontier_db:
+        # The worker processes fetch and extract; this one only collects the graph
+        scraper = WikiTechScraper(workers=args.workers, requests_per_second=args.rate, backend=args.backend)
+        scraper.graph = crawl_cooperatively(args, seed_pages)
+    else:
+        scraper = WikiTechScraper(workers=args.workers, requests_per_second=args.rate, backend=args.backend,
+                                  cache_path=None if args.no_cache else args.cache, processes=args.processes,
+                                  bloom_capacity=args.bloom_capacity, checkpoint_dir=args.checkpoint,
+                                  checkpoint_interval=args.checkpoint_interval,
+                                  progress_interval=args.progress_interval, verbose=not args.quiet)
+        try:
+            scraper.crawl(seed_pages, max_depth=args.max_depth, resume=args.resume)
+        finally:
+            # Written even when the crawl is interrupted, to see where the time went
+            scraper.metrics.dump(args.metrics)
+            print(f"\n[progress] {scraper.metrics.progress_line()}")
+            print(f"Metrics written to {args.metrics}")
         
     # Export results
-    scraper.export_graph("tech_relationships.graphml")
+    scraper.export_graph(args.output)
+    if args.graphml:
+        scraper.export_graph(args.graphml)
     scraper.print_summary()
     
     # Print timeline
@@ -139,5 +507,7 @@ def main():
     for year, techs in timeline.items():
         print(f"{year}: {', '.join(techs)}")
 
+    scraper.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
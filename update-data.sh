@@ -35,30 +35,11 @@ if [ ! -d "node_modules" ]; then
     yarn install
 fi
 
-# Track errors
-IMAGE_ERRORS=0
-DATA_ERRORS=0
-CHANGELOG_ERRORS=0
-
-# Update images. --new only looks at records with no local image, so a record that
-# already has one is left alone, crop or no crop. To apply a crop added after the
-# image was downloaded, re-run by hand:
-#   .venv/bin/python src/scripts/update_images.py --only "Record name"
-echo "Updating images..."
-if ! $VENV_PYTHON src/scripts/update_images.py --new; then
-    IMAGE_ERRORS=1
-fi
-
-# Run the update script
-echo "Updating tech tree data..."
-if ! NODE_OPTIONS="--no-deprecation" npx tsx src/scripts/fetch-and-save-inventions.ts; then
-    DATA_ERRORS=1
-fi
-
-# Generate changelog
-echo "Generating changelog..."
-if ! NODE_OPTIONS="--no-deprecation" npx tsx src/scripts/generate-changelog.ts; then
-    CHANGELOG_ERRORS=1
+# Update images, then tree data, then the changelog; see src/scripts/update_pipeline.py
+# (--list shows the stages, --extras also builds the derived artifacts).
+PIPELINE_ERRORS=0
+if ! $VENV_PYTHON src/scripts/update_pipeline.py; then
+    PIPELINE_ERRORS=1
 fi
 
 # Trigger a rebuild if in production
@@ -75,11 +56,8 @@ fi
 echo "Done!"
 
 # Report errors if any occurred
-if [ $IMAGE_ERRORS -eq 1 ] || [ $DATA_ERRORS -eq 1 ] || [ $CHANGELOG_ERRORS -eq 1 ]; then
+if [ $PIPELINE_ERRORS -eq 1 ]; then
     echo ""
-    echo "⚠️  ERRORS DETECTED:"
-    [ $IMAGE_ERRORS -eq 1 ] && echo "  - Image processing errors (check output above for details)"
-    [ $DATA_ERRORS -eq 1 ] && echo "  - Data update errors"
-    [ $CHANGELOG_ERRORS -eq 1 ] && echo "  - Changelog generation errors"
+    echo "⚠️  ERRORS DETECTED: some pipeline stages failed (see the summary above)"
     echo ""
-fi 
\ No newline at end of file
+fi